@@ -0,0 +1,167 @@
+import nextcord
+import asyncio
+import contextlib
+import time
+from config import Config
+from storage import Storage
+from logs import get_logger
+
+log = get_logger(__name__)
+
+HOUR = 3600
+DAY = 86400
+
+def bucket_start(timestamp: int, size: int) -> int:
+    return timestamp - timestamp % size
+
+def format_duration(seconds: int) -> str:
+    hours, remainder = divmod(int(seconds), 3600)
+    if hours:
+        return f"{hours}h {remainder // 60}m"
+    return f"{remainder // 60}m"
+
+def split_into_buckets(started_at: int, ended_at: int, size: int):
+    """Yields (bucket_start, seconds) for every bucket a session overlaps."""
+    start = started_at
+    while start < ended_at:
+        bucket = bucket_start(start, size)
+        end = min(ended_at, bucket + size)
+        yield bucket, end - start
+        start = end
+
+class PlaySessionRecorder:
+    """Tracks open play sessions in memory and writes closed ones in batches.
+
+    The rollup deltas for every closed session (sessions, play time and peak
+    concurrent players per game and hour/day) are computed here and added onto
+    the rollup tables, so stats queries never scan the session log.
+    """
+    def __init__(self, db: Storage, flush_interval: float = Config.PLAY_SESSION_FLUSH_INTERVAL):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.open_sessions = {}  # user_id -> (game_name, started_at)
+        self.concurrent = {}     # game_name -> players right now
+        self.closed = []         # finished sessions waiting to be written
+        self.peaks = {}          # (game_name, hour) -> highest concurrent count seen
+        self._task = None
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    def session_started(self, user_id: int, game_name: str, now: int = None):
+        """Opens a session, closing whatever the user was playing before.
+
+        Sessions are keyed by the game's primary name, so stats asked for by any of its
+        aliases (or the spelling the game's presence uses) find them.
+        """
+        now = int(time.time() if now is None else now)
+        game_name = self.db.name_index.canonical_name(game_name)
+        self.session_ended(user_id, now)
+        self.open_sessions[user_id] = (game_name, now)
+        players = self.concurrent.get(game_name, 0) + 1
+        self.concurrent[game_name] = players
+        key = (game_name, bucket_start(now, HOUR))
+        if players > self.peaks.get(key, 0):
+            self.peaks[key] = players
+
+    def session_ended(self, user_id: int, now: int = None):
+        session = self.open_sessions.pop(user_id, None)
+        if not session:
+            return
+        game_name, started_at = session
+        self.concurrent[game_name] -= 1
+        if not self.concurrent[game_name]:
+            del self.concurrent[game_name]
+        self.closed.append((user_id, game_name, started_at, int(time.time() if now is None else now)))
+
+    def close_all(self, now: int = None):
+        """Ends every open session, queueing them for the next flush."""
+        now = int(time.time() if now is None else now)
+        for user_id in list(self.open_sessions):
+            self.session_ended(user_id, now)
+
+    def _build_deltas(self, sessions, peaks):
+        hourly, daily, players = {}, {}, set()
+        for user_id, game_name, started_at, ended_at in sessions:
+            # A session counts once, in the bucket it started in; its play time is split across buckets
+            hourly.setdefault((game_name, bucket_start(started_at, HOUR)), [0, 0, 0])[0] += 1
+            daily.setdefault((game_name, bucket_start(started_at, DAY)), [0, 0, 0])[0] += 1
+            for hour, seconds in split_into_buckets(started_at, ended_at, HOUR):
+                hourly.setdefault((game_name, hour), [0, 0, 0])[1] += seconds
+            for day, seconds in split_into_buckets(started_at, ended_at, DAY):
+                daily.setdefault((game_name, day), [0, 0, 0])[1] += seconds
+                players.add((game_name, day, user_id))
+
+        for (game_name, hour), peak in peaks.items():
+            hourly_row = hourly.setdefault((game_name, hour), [0, 0, 0])
+            hourly_row[2] = max(hourly_row[2], peak)
+            daily_row = daily.setdefault((game_name, bucket_start(hour, DAY)), [0, 0, 0])
+            daily_row[2] = max(daily_row[2], peak)
+        return hourly, daily, players
+
+    async def flush(self):
+        async with self._flush_lock:
+            await self._flush()
+
+    async def _flush(self):
+        # Players still mid-session count towards the current hour's peak too
+        hour = bucket_start(int(time.time()), HOUR)
+        for game_name, players in self.concurrent.items():
+            if players > self.peaks.get((game_name, hour), 0):
+                self.peaks[(game_name, hour)] = players
+
+        if not self.closed and not self.peaks:
+            return
+        sessions, self.closed = self.closed, []
+        peaks, self.peaks = self.peaks, {}
+        hourly, daily, players = self._build_deltas(sessions, peaks)
+        try:
+            await self.db.apply_play_session_batch(sessions, hourly, daily, players)
+        except Exception:
+            log.exception("Error writing play sessions, will retry", extra={"sessions": len(sessions)})
+            self.closed = sessions + self.closed
+            for key, peak in peaks.items():
+                self.peaks[key] = max(peak, self.peaks.get(key, 0))
+
+    @contextlib.asynccontextmanager
+    async def paused(self):
+        """Writes out closed sessions, then holds every write until the block exits. Sessions keep
+        being tracked in memory meanwhile and go out with the next flush."""
+        await self.flush()
+        async with self._flush_lock:
+            yield
+
+    async def _flush_loop(self):
+        while not self._stopping.is_set():
+            try:
+                # Woken early by drain(), so shutdown never sits out the rest of an interval
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    async def drain(self):
+        """Closes every open session and writes everything out (used on shutdown)."""
+        if self._task:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        self.close_all()
+        await self.flush()
+
+async def top_games_embed(db: Storage, days: int = 7, limit: int = 10):
+    """Embed listing the most played games over the last `days` days, read from the daily rollup."""
+    since_day = bucket_start(int(time.time()), DAY) - (days - 1) * DAY
+    rows = await db.get_top_played_games(since_day, limit)
+    embed = nextcord.Embed(title=f"📊 Most Played Games — last {days} days", color=nextcord.Color.blue())
+    if not rows:
+        embed.description = "No play sessions recorded yet."
+    for rank, (game_name, play_seconds, sessions, peak) in enumerate(rows, start=1):
+        embed.add_field(
+            name=f"{rank}. {game_name}",
+            value=f"⏱️ {format_duration(play_seconds)} • 🎮 {sessions} sessions • 📈 peak {peak}",
+            inline=False
+        )
+    return embed
@@ -0,0 +1,230 @@
+"""Online snapshots of the SQLite database, plus restore and vacuum commands for when the bot is down.
+
+    python -m backup list
+    python -m backup restore backups/bot-20250101-120000.db
+    python -m backup vacuum
+"""
+import argparse
+import asyncio
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+from config import Config
+
+SNAPSHOT_PREFIX = "bot-"
+BUSY_TIMEOUT = 30  # seconds to wait for the bot's own writes to get out of the way
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def snapshot_into(source_path: str, target_path: str):
+    """Writes a consistent, compacted copy of a live database with `VACUUM INTO`.
+
+    The copy is read inside one transaction, so writes landing meanwhile don't restart it the
+    way they restart a paged backup. The bot's database is in WAL mode (see Database.init_db),
+    so those writes also go through while the copy runs. On a file still in rollback-journal
+    mode they would fail with "database is locked" once their busy timeout ran out.
+    The snapshot itself is written in rollback-journal mode, as a single self-contained file.
+    """
+    if os.path.exists(target_path):
+        os.remove(target_path)  # Left over from an interrupted snapshot; VACUUM INTO won't overwrite
+    source = sqlite3.connect(source_path, timeout=BUSY_TIMEOUT)
+    try:
+        source.execute("VACUUM INTO ?", (target_path,))
+    finally:
+        source.close()
+
+def copy_over(source_path: str, target_path: str):
+    """Copies a database over another in a single backup step, holding the target's lock throughout."""
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    target = sqlite3.connect(target_path, timeout=BUSY_TIMEOUT)
+    try:
+        source.backup(target, pages=-1)
+    finally:
+        target.close()
+        source.close()
+
+def uses_incremental_vacuum(db_path: str) -> bool:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+def enable_incremental_vacuum(db_path: str):
+    """Switches a database created before incremental auto-vacuum over, with the one full VACUUM
+    that takes. Blocks every other connection while it runs, so only use it with the bot stopped."""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+class ChecksumError(Exception):
+    pass
+
+class BackupManager:
+    """Takes, rotates, exports and restores snapshots of the bot database.
+
+    All file and SQLite work runs in a worker thread, so the event loop never waits
+    on disk. Every snapshot gets a `.sha256` file next to it, checked before a restore.
+    """
+    def __init__(self, db_path: str, backup_dir: str = Config.BACKUP_DIR, keep: int = Config.BACKUP_KEEP):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self._lock = asyncio.Lock()  # One snapshot/export/restore at a time
+
+    # --- Snapshot files ---
+    def snapshots(self):
+        """Snapshot paths, newest first."""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        paths = [os.path.join(self.backup_dir, name) for name in os.listdir(self.backup_dir)
+                 if name.startswith(SNAPSHOT_PREFIX) and name.endswith(".db")]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    def resolve(self, name: str):
+        """Finds a snapshot by file name (no directories, so admins can't point outside backup_dir)."""
+        path = os.path.join(self.backup_dir, os.path.basename(name))
+        if not path.endswith(".db"):
+            path += ".db"
+        return path if os.path.isfile(path) else None
+
+    def _new_path(self, suffix: str):
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d-%H%M%S")
+        path, n = os.path.join(self.backup_dir, f"{SNAPSHOT_PREFIX}{stamp}{suffix}"), 1
+        while os.path.exists(path):
+            path, n = os.path.join(self.backup_dir, f"{SNAPSHOT_PREFIX}{stamp}-{n}{suffix}"), n + 1
+        return path
+
+    def _rotate(self):
+        for path in self.snapshots()[self.keep:]:
+            for stale in (path, path + ".sha256", path[:-3] + ".jsonl.gz"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+
+    def verify(self, path: str):
+        """Checks a snapshot against its .sha256 file. Raises ChecksumError if it doesn't match."""
+        try:
+            with open(path + ".sha256", encoding="utf-8") as f:
+                expected = f.read().split()[0]
+        except (OSError, IndexError):
+            raise ChecksumError(f"No checksum recorded for {os.path.basename(path)}")
+        actual = file_sha256(path)
+        if actual != expected:
+            raise ChecksumError(f"Checksum mismatch for {os.path.basename(path)}: expected {expected[:12]}…, got {actual[:12]}…")
+
+    # --- Blocking work, run in a thread ---
+    def snapshot_sync(self, rotate: bool = True):
+        path = self._new_path(".db")
+        partial = path + ".partial"
+        snapshot_into(self.db_path, partial)
+
+        check = sqlite3.connect(partial)
+        try:
+            result = check.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            check.close()
+        if result != "ok":
+            os.remove(partial)
+            raise RuntimeError(f"Snapshot failed its integrity check: {result}")
+
+        os.replace(partial, path)
+        with open(path + ".sha256", "w", encoding="utf-8") as f:
+            f.write(f"{file_sha256(path)}  {os.path.basename(path)}\n")
+        if rotate:
+            self._rotate()
+        return path
+
+    def export_sync(self, snapshot_path: str):
+        """Writes a snapshot as gzip-compressed JSON lines: one {"table", "row"} object per row."""
+        path = snapshot_path[:-3] + ".jsonl.gz"
+        conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+        try:
+            tables = [name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+            with gzip.open(path, "wt", encoding="utf-8") as out:
+                out.write(json.dumps({"snapshot": os.path.basename(snapshot_path), "sha256": file_sha256(snapshot_path)}) + "\n")
+                for table in tables:
+                    cursor = conn.execute(f'SELECT * FROM "{table}"')
+                    columns = [column[0] for column in cursor.description]
+                    for row in cursor:
+                        out.write(json.dumps({"table": table, "row": dict(zip(columns, row))}, default=str) + "\n")
+        finally:
+            conn.close()
+        return path
+
+    def restore_sync(self, snapshot_path: str):
+        """Verifies a snapshot and copies it over the live database. Returns the pre-restore snapshot.
+
+        Every other writer is locked out until the copy finishes, so the bot should hold its
+        write-behind buffers off for the duration (see RegistrationBuffer.paused).
+        """
+        self.verify(snapshot_path)
+        # So a bad restore can itself be undone; rotate afterwards so the source isn't pruned first
+        safety = self.snapshot_sync(rotate=False)
+        copy_over(snapshot_path, self.db_path)
+        self._rotate()
+        return safety
+
+    # --- Async API for the bot ---
+    async def snapshot(self):
+        async with self._lock:
+            return await asyncio.to_thread(self.snapshot_sync)
+
+    async def export(self):
+        """Takes a fresh snapshot and exports it. Returns the .jsonl.gz path."""
+        async with self._lock:
+            snapshot_path = await asyncio.to_thread(self.snapshot_sync)
+            return await asyncio.to_thread(self.export_sync, snapshot_path)
+
+    async def restore(self, snapshot_path: str):
+        async with self._lock:
+            return await asyncio.to_thread(self.restore_sync, snapshot_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage bot database snapshots.")
+    parser.add_argument("--db", default=Config.DATABASE_PATH)
+    parser.add_argument("--dir", default=Config.BACKUP_DIR)
+    sub = parser.add_subparsers(dest="action", required=True)
+    sub.add_parser("list")
+    sub.add_parser("snapshot")
+    restore = sub.add_parser("restore", help="verify a snapshot's checksum and restore it over --db")
+    restore.add_argument("snapshot")
+    sub.add_parser("vacuum", help="one-time full VACUUM switching --db to incremental auto-vacuum (stop the bot first)")
+    args = parser.parse_args()
+
+    backups = BackupManager(args.db, args.dir)
+    if args.action == "list":
+        for path in backups.snapshots():
+            print(f"{os.path.basename(path)}  {os.path.getsize(path) / 1024:.0f} KiB")
+    elif args.action == "snapshot":
+        print(f"✅ Snapshot written to {backups.snapshot_sync()}")
+    elif args.action == "restore":
+        path = args.snapshot if os.path.isfile(args.snapshot) else backups.resolve(args.snapshot)
+        if not path:
+            raise SystemExit(f"❌ No snapshot named {args.snapshot}")
+        try:
+            safety = backups.restore_sync(path)
+        except ChecksumError as e:
+            raise SystemExit(f"❌ {e}")
+        print(f"✅ Restored {os.path.basename(path)} (previous database saved as {os.path.basename(safety)})")
+    elif args.action == "vacuum":
+        if uses_incremental_vacuum(args.db):
+            return print(f"✅ {args.db} already uses incremental auto-vacuum; nothing to do")
+        safety = backups.snapshot_sync(rotate=False)
+        enable_incremental_vacuum(args.db)
+        print(f"✅ {args.db} now uses incremental auto-vacuum (previous database saved as {os.path.basename(safety)})")
+
+if __name__ == "__main__":
+    main()
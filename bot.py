@@ -1,9 +1,20 @@
 import os
+import multiprocessing
 import nextcord
 from nextcord.ext import commands
 import asyncio
 from dotenv import load_dotenv
 from database import Database
+from memory_storage import MemoryDatabase
+from registration_buffer import RegistrationBuffer
+from analytics import PlaySessionRecorder
+from loop_watchdog import LoopWatchdog
+from ipc import IPCPublisher
+from backup import BackupManager
+from delivery import DeliveryPreferences, DMWorkerPool
+from interactions import InteractionDispatcher
+from logs import setup_logging, get_logger
+import notifier
 
 # Import all your cogs
 from cogs.games import Games
@@ -11,35 +22,108 @@ from cogs.gamedetection import GameDetection
 from cogs.admin import Admin
 from cogs.controlpanel import ControlPanel
 from cogs.userpanel import UserPanel
+from cogs.rolesync import RoleSync
+from cogs.events import Events
+from cogs.maintenance import Maintenance
+from cogs.preferences import Preferences
+from config import Config
+from loadtest.recorder import EventRecorder
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Log records are queued and written by a background thread, never on the event loop
+setup_logging()
+log = get_logger("bot")
+
+class ShutdownHooksMixin:
+    """Runs shutdown hooks (e.g. draining write buffers) before the bot disconnects."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shutdown_hooks = []
+
+    async def close(self):
+        for hook in self.shutdown_hooks:
+            try:
+                await hook()
+            except Exception:
+                log.exception("Error during shutdown")
+        await super().close()
+
+class MinasBot(ShutdownHooksMixin, commands.Bot):
+    pass
+
+class ShardedMinasBot(ShutdownHooksMixin, commands.AutoShardedBot):
+    pass
+
 # --- Bot Setup ---
 intents = nextcord.Intents.default()
 intents.message_content = True
 intents.presences = True
 intents.members = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+if Config.AUTOSHARD:
+    bot = ShardedMinasBot(command_prefix='!', intents=intents, shard_count=Config.SHARD_COUNT)
+else:
+    bot = MinasBot(command_prefix='!', intents=intents)
+
+# Panel clicks are deferred right away and handled on a fair worker pool. Stopped first at
+# shutdown, so handlers still finishing can write through the buffers drained after it.
+interactions = InteractionDispatcher()
+bot.shutdown_hooks.append(interactions.stop)
 
 # --- Database Setup ---
-db = Database()
+db = MemoryDatabase() if Config.STORAGE_BACKEND == 'memory' else Database(Config.DATABASE_PATH)
+backups = BackupManager(Config.DATABASE_PATH) if isinstance(db, Database) else None
+registrations = RegistrationBuffer(db)
+bot.shutdown_hooks.append(registrations.drain)
+sessions = PlaySessionRecorder(db)
+bot.shutdown_hooks.append(sessions.drain)
+watchdog = LoopWatchdog()
+
+# In the split deployment, notifications are sent by a separate notifier process
+publisher = IPCPublisher(Config.IPC_SOCKET_PATH) if Config.BOT_PROCESSES == 'split' else None
+if publisher:
+    bot.shutdown_hooks.append(publisher.close)
+
+# Delivery preferences are compiled in memory; DMs go out from this process unless the notifier sends them
+prefs = DeliveryPreferences(db)
+dms = None if publisher else DMWorkerPool(bot)
+if dms:
+    bot.shutdown_hooks.append(dms.drain)
 
 @bot.event
 async def on_ready():
-    print(f'✅ {bot.user} has connected to Discord!')
-    print(f'🎯 Running on server: {bot.guilds[0].name if bot.guilds else "No servers"}')
+    watchdog.start()
+    if publisher:
+        publisher.start()
+    log.info("Connected to Discord", extra={"user": str(bot.user), "guilds": len(bot.guilds),
+                                            "guild": bot.guilds[0].id if bot.guilds else None})
     
     # Initialize the database tables
     await db.init_db()
     await db.init_config_table()
+    await registrations.start()
+    sessions.start()
+    await prefs.load()
+    if dms:
+        dms.start()
+    interactions.start()
     
     # Load all cogs and pass the database instance to them
     bot.add_cog(Games(bot, db))
-    bot.add_cog(GameDetection(bot, db))
-    bot.add_cog(Admin(bot, db))
-    bot.add_cog(ControlPanel(bot, db))
-    bot.add_cog(UserPanel(bot, db))
+    bot.add_cog(GameDetection(bot, db, sessions, publisher, prefs, dms))
+    bot.add_cog(Admin(bot, db, watchdog, backups, interactions))
+    bot.add_cog(ControlPanel(bot, db, registrations, interactions))
+    bot.add_cog(UserPanel(bot, db, registrations, interactions))
+    bot.add_cog(RoleSync(bot, db))
+    bot.add_cog(Events(bot, db))
+    bot.add_cog(Maintenance(bot, db, backups))
+    bot.add_cog(Preferences(bot, db, prefs))
+    if Config.RECORD_EVENTS_PATH:
+        bot.add_cog(EventRecorder(bot, Config.RECORD_EVENTS_PATH))
+    
+    # Cogs are added after login, so push their slash commands to Discord now
+    await bot.sync_all_application_commands()
     
     await bot.change_presence(
         activity=nextcord.Activity(
@@ -70,10 +154,14 @@ async def info(ctx):
 
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 if DISCORD_TOKEN:
+    if Config.BOT_PROCESSES == 'split':
+        # Second core: the notifier does artwork lookups and message sends. Forked before
+        # bot.run() so the child doesn't re-import (and re-run) this module.
+        notifier_process = multiprocessing.get_context('fork').Process(target=notifier.main, args=(DISCORD_TOKEN,), name="notifier", daemon=True)
+        notifier_process.start()
     bot.run(DISCORD_TOKEN)
 else:
-    print("❌ Error: DISCORD_TOKEN not found in environment variables!")
-    print("Please set your Discord token in the .env file.")
+    log.error("DISCORD_TOKEN not found in environment variables. Please set your Discord token in the .env file.")
     # In bot.py, add this helper function
 
 def find_user(guild, user_identifier):
@@ -1,32 +1,58 @@
+import asyncio
+import contextlib
+import io
+import os
+import time
+from typing import Optional
 import nextcord
+from nextcord import SlashOption
 from nextcord.ext import commands
-from database import Database
+from storage import Storage
+from cogs.games import game_choices, unknown_game_message
+from cogs.controlpanel import ConfirmView
+from pagination import registrations_view
+from analytics import top_games_embed, format_duration, DAY
+from profiling import TimingStats, profile_event_loop
+from loop_watchdog import LoopWatchdog
+from backup import BackupManager, ChecksumError
+from interactions import InteractionDispatcher
+from steam_import import SteamImporter, resolve_dump
+from config import Config
+from logs import get_logger, set_level, logger_levels, dropped
+
+log = get_logger(__name__, cog="Admin")
 
 class Admin(commands.Cog):
-    def __init__(self, bot, db: Database):
+    def __init__(self, bot, db: Storage, watchdog: LoopWatchdog = None, backups: BackupManager = None,
+                 interactions: InteractionDispatcher = None):
         self.bot = bot
         self.db = db
+        self.watchdog = watchdog
+        self.backups = backups
+        self.interactions = interactions
+        self.import_task = None
+        self.timing = TimingStats()
+
+    def cog_unload(self):
+        # A reloaded cog starts its own imports; progress is checkpointed, so the next run resumes
+        if self.import_task:
+            self.import_task.cancel()
 
     # This check ensures only users with Administrator permissions can use these commands
     @commands.has_permissions(administrator=True)
     @commands.group(name="admin", invoke_without_command=True)
     async def admin(self, ctx):
         """Bot administration commands"""
-        await ctx.send("Admin commands: `listregistrations`, `removeuser`, `addgame`, `deletegame`, `setchannel`")
+        await ctx.send("Admin commands: `listregistrations`, `removeuser`, `addgame`, `deletegame`, `setchannel`, `rolemode`, `syncroles`, `playstats`, `topgames`, `profile`, `timing`, `lagreport`, `interactions`, `loglevel`, `backup`, `importsteam`")
 
     @admin.command(name="listregistrations")
     async def list_registrations(self, ctx, *, game_name: str):
         """List all users registered for a specific game"""
-        registered_users = await self.db.get_users_registered_for_game(game_name)
+        game_id = await self.db.get_game_id_from_name_or_alias(game_name)
+        view = await registrations_view(self.db, game_id, game_name, author_id=ctx.author.id) if game_id else None
         
-        if registered_users:
-            user_mentions = [f"<@{user_id}>" for user_id in registered_users]
-            embed = nextcord.Embed(
-                title=f"🎮 Registrations for {game_name}",
-                description="\n".join(user_mentions),
-                color=nextcord.Color.blue()
-            )
-            await ctx.send(embed=embed)
+        if view:
+            await ctx.send(embed=view.first_embed, view=view)
         else:
             await ctx.send(f"❌ No one is registered for **{game_name}**.")
 
@@ -81,5 +107,299 @@ class Admin(commands.Cog):
         await ctx.send(f"⚙️ To set the alert channel, please update your `.env` file:\n`ALERT_CHANNEL_ID={channel.id}`")
         await ctx.send(f"The channel ID for **#{channel.name}** is `{channel.id}`.")
 
+    @admin.command(name="rolemode")
+    async def role_mode(self, ctx, mode: str):
+        """Turn role fan-out notifications on or off (one role mention instead of N user mentions)"""
+        mode = mode.lower()
+        if mode not in ("on", "off"):
+            return await ctx.send("❌ Usage: `!admin rolemode on` or `!admin rolemode off`")
+
+        await self.db.set_config("ROLE_FANOUT", 1 if mode == "on" else 0)
+        if mode == "on":
+            role_sync = self.bot.get_cog('RoleSync')
+            if role_sync:
+                await role_sync.reconcile()
+            await ctx.send("✅ Role fan-out mode enabled. Game roles are being synced in the background.")
+        else:
+            await ctx.send("✅ Role fan-out mode disabled. Notifications will mention users directly.")
+
+    @admin.command(name="syncroles")
+    async def sync_roles(self, ctx):
+        """Repair drift between registrations and game role membership"""
+        role_sync = self.bot.get_cog('RoleSync')
+        if not role_sync or not await role_sync.is_enabled():
+            return await ctx.send("❌ Role fan-out mode is not enabled. Use `!admin rolemode on` first.")
+        await role_sync.reconcile()
+        await ctx.send("✅ Role reconcile finished. Changes are being applied in the background.")
+
+    @admin.command(name="playstats")
+    async def play_stats(self, ctx, days: Optional[int] = 7, *, game_name: str):
+        """Show play statistics for a game over the last N days (default 7)"""
+        if days is not None and days <= 0:
+            return await ctx.send("❌ Days must be at least 1.")
+        # Sessions are recorded under the primary name, whatever spelling was asked for
+        game_name = self.db.name_index.canonical_name(game_name)
+        days = days or 7
+        since_day = int(time.time()) // DAY * DAY - (days - 1) * DAY
+        sessions, play_seconds, peak, players = await self.db.get_game_play_stats(game_name, since_day)
+        if not sessions and not play_seconds:
+            return await ctx.send(f"❌ Nobody has played **{game_name}** in the last {days} days.")
+
+        embed = nextcord.Embed(title=f"📊 {game_name} — last {days} days", color=nextcord.Color.blue())
+        embed.add_field(name="👥 Players", value=str(players), inline=True)
+        embed.add_field(name="🎮 Sessions", value=str(sessions), inline=True)
+        embed.add_field(name="⏱️ Play Time", value=format_duration(play_seconds), inline=True)
+        embed.add_field(name="📈 Peak Concurrent", value=str(peak), inline=True)
+        await ctx.send(embed=embed)
+
+    @admin.command(name="topgames")
+    async def top_games(self, ctx, days: int = 7):
+        """Show the most played games over the last N days (default 7)"""
+        if days <= 0:
+            return await ctx.send("❌ Days must be at least 1.")
+        await ctx.send(embed=await top_games_embed(self.db, days))
+
+    @admin.command(name="profile")
+    async def profile(self, ctx, seconds: int = 10, mode: str = "sample"):
+        """Profile the running bot for N seconds (mode: sample or cprofile) and upload the results"""
+        mode = mode.lower()
+        if mode not in ("sample", "cprofile"):
+            return await ctx.send("❌ Mode must be `sample` (cheap, safe under load) or `cprofile` (exact, slower).")
+        seconds = max(1, min(seconds, 120))
+
+        await ctx.send(f"⏱️ Profiling the event loop for {seconds}s ({mode})...")
+        results = await profile_event_loop(seconds, mode)
+        files = [nextcord.File(io.BytesIO(data), filename=name) for name, data in results.items()]
+        await ctx.send("✅ Profile finished. `.folded` stacks load straight into speedscope or flamegraph.pl.", files=files)
+
+    @admin.command(name="timing")
+    async def timing_command(self, ctx, action: str = "show"):
+        """Per-Database-method and per-command timing: on, off, show or reset"""
+        action = action.lower()
+        if action == "on":
+            self.timing.enable(self.bot, self.db)
+            await ctx.send("✅ Timing enabled for Database methods and commands.")
+        elif action == "off":
+            self.timing.disable(self.bot)
+            await ctx.send("✅ Timing disabled. Collected numbers are kept until `!admin timing reset`.")
+        elif action == "reset":
+            self.timing.stats.clear()
+            await ctx.send("✅ Timing stats cleared.")
+        elif action == "show":
+            report = self.timing.report()
+            if len(report) > 1900:
+                await ctx.send(file=nextcord.File(io.BytesIO(report.encode()), filename="timing.txt"))
+            else:
+                await ctx.send(f"```\n{report}\n```")
+        else:
+            await ctx.send("❌ Usage: `!admin timing on|off|show|reset`")
+
+    @admin.command(name="lagreport")
+    async def lag_report(self, ctx, option: str = None):
+        """Show call sites that blocked the event loop (options: stacks, reset)"""
+        if not self.watchdog:
+            return await ctx.send("❌ The event loop watchdog isn't running.")
+        if option == "reset":
+            self.watchdog.reset()
+            return await ctx.send("✅ Lag report cleared.")
+
+        report = self.watchdog.report(with_stacks=option == "stacks")
+        if len(report) > 1900:
+            await ctx.send(file=nextcord.File(io.BytesIO(report.encode()), filename="lag_report.txt"))
+        else:
+            await ctx.send(f"```\n{report}\n```")
+
+    @admin.command(name="interactions")
+    async def interactions_report(self, ctx, option: str = None):
+        """Show panel interaction acknowledge/complete latency histograms (option: reset)"""
+        if not self.interactions:
+            return await ctx.send("❌ The interaction dispatcher isn't running.")
+        if option == "reset":
+            self.interactions.reset()
+            return await ctx.send("✅ Interaction latency stats cleared.")
+
+        report = self.interactions.report()
+        if len(report) > 1900:
+            await ctx.send(file=nextcord.File(io.BytesIO(report.encode()), filename="interactions.txt"))
+        else:
+            await ctx.send(f"```\n{report}\n```")
+
+    @admin.command(name="loglevel")
+    async def log_level(self, ctx, logger: str = None, level: str = None):
+        """Show log levels, or set one module's level at runtime, e.g. `!admin loglevel database DEBUG` (or `reset`)"""
+        if logger and level:
+            try:
+                set_level(logger, level)
+            except ValueError as e:
+                return await ctx.send(f"❌ {e}")
+            return await ctx.send(f"✅ `{logger}` now logs at **{level.upper()}**." if level.lower() != "reset"
+                                  else f"✅ `{logger}` is back to its default level.")
+        if logger:
+            return await ctx.send("❌ Usage: `!admin loglevel [<logger> <DEBUG|INFO|WARNING|ERROR|CRITICAL|reset>]`")
+
+        lines = [f"{'own':>8} {'effective':>9}  logger"]
+        lines += [f"{own:>8} {effective:>9}  {name}" for name, own, effective in logger_levels()]
+        lines.append(f"\n{dropped()} records dropped because the log queue was full")
+        report = "\n".join(lines)
+        if len(report) > 1900:
+            await ctx.send(file=nextcord.File(io.BytesIO(report.encode()), filename="log_levels.txt"))
+        else:
+            await ctx.send(f"```\n{report}\n```")
+
+    @admin.command(name="backup")
+    async def backup(self, ctx, action: str = "now", *, name: str = None):
+        """Database snapshots: now, list, export, or restore <name>"""
+        if not self.backups:
+            return await ctx.send("❌ Backups are only available with the SQLite storage backend.")
+        action = action.lower()
+        if action == "now":
+            await ctx.send("💾 Taking a snapshot...")
+            path = await self.backups.snapshot()
+            await ctx.send(f"✅ Snapshot saved as `{os.path.basename(path)}` ({os.path.getsize(path) / 1024:.0f} KiB).")
+        elif action == "list":
+            snapshots = self.backups.snapshots()
+            if not snapshots:
+                return await ctx.send("No snapshots yet. Take one with `!admin backup now`.")
+            lines = [f"`{os.path.basename(path)}` ({os.path.getsize(path) / 1024:.0f} KiB)" for path in snapshots]
+            await ctx.send("💾 **Snapshots**, newest first:\n" + "\n".join(lines))
+        elif action == "export":
+            await ctx.send("📦 Exporting a fresh snapshot as compressed JSON lines...")
+            path = await self.backups.export()
+            size = os.path.getsize(path)
+            if ctx.guild and size <= ctx.guild.filesize_limit:
+                await ctx.send("✅ Export finished.", file=nextcord.File(path))
+            else:
+                await ctx.send(f"✅ Export saved on the host as `{path}` ({size / 1024 / 1024:.1f} MiB, too large to upload).")
+        elif action == "restore":
+            path = self.backups.resolve(name) if name else None
+            if not path:
+                return await ctx.send("❌ No such snapshot. See `!admin backup list`.")
+            await ctx.send(f"⚠️ This replaces the whole database with `{os.path.basename(path)}`. Type `confirm` to proceed.")
+
+            def check(m):
+                return m.author == ctx.author and m.channel == ctx.channel and m.content.lower() == 'confirm'
+
+            try:
+                await self.bot.wait_for("message", check=check, timeout=30.0)
+            except asyncio.TimeoutError:
+                return await ctx.send("❌ Restore cancelled.")
+
+            # Queued writes go into the pre-restore snapshot, then the write-behind buffers hold off
+            # until the copy is done instead of failing against the locked database
+            user_panel = self.bot.get_cog('UserPanel')
+            detection = self.bot.get_cog('GameDetection')
+            writers = []
+            if user_panel:
+                writers.append(user_panel.registrations)
+            if detection:
+                # Play time so far belongs to the old database; sessions reopen against the restored one
+                detection.sessions.close_all()
+                writers.append(detection.sessions)
+            try:
+                async with contextlib.AsyncExitStack() as fence:
+                    for writer in writers:
+                        await fence.enter_async_context(writer.paused())
+                    safety = await self.backups.restore(path)
+            except ChecksumError as e:
+                if detection:
+                    detection.reopen_sessions()
+                return await ctx.send(f"❌ {e}. Nothing was changed.")
+            # Everything cached from the old database is reloaded from the restored one
+            await self.db.load_name_index()
+            if user_panel:
+                await user_panel.registrations.reload()
+            preferences = self.bot.get_cog('Preferences')
+            if preferences:
+                await preferences.prefs.load()
+            if detection:
+                detection.seed_now_playing()
+                detection.reopen_sessions()
+            role_sync = self.bot.get_cog('RoleSync')
+            if role_sync:
+                await role_sync.reload()
+            await ctx.send(f"✅ Restored `{os.path.basename(path)}`. The previous database was saved as `{os.path.basename(safety)}`.")
+        else:
+            await ctx.send("❌ Usage: `!admin backup now|list|export|restore <name>`")
+
+    @admin.command(name="importsteam")
+    async def import_steam(self, ctx, name: str = None, *options: str):
+        """Import games from a Steam app-list dump in the import folder (options: restart, all)"""
+        if self.import_task and not self.import_task.done():
+            return await ctx.send("⏳ An import is already running.")
+        path = resolve_dump(name) if name else None
+        if not path:
+            return await ctx.send(f"❌ Put the dump in `{Config.IMPORT_DIR}/` on the host and pass its file name, e.g. `!admin importsteam applist.json`.")
+
+        options = {option.lower() for option in options}
+        importer = SteamImporter(self.db, path, include_all="all" in options)
+        restart = "restart" in options
+        saved = None if restart else importer.load_progress()
+        resuming = f", resuming at {saved.percent:.0f}%" if saved and saved.offset else ""
+        message = await ctx.send(f"📥 Importing `{os.path.basename(path)}`{resuming}...")
+        # Runs in the background; the command returns straight away
+        self.import_task = asyncio.create_task(self._run_import(importer, message, restart))
+
+    async def _run_import(self, importer: SteamImporter, message, restart: bool):
+        last_edit = time.monotonic()
+
+        async def report(progress):
+            nonlocal last_edit
+            if time.monotonic() - last_edit < 5:
+                return
+            last_edit = time.monotonic()
+            try:
+                await message.edit(content=f"📥 Importing... {progress.summary()}")
+            except nextcord.HTTPException:
+                pass  # Progress is cosmetic; keep importing
+
+        try:
+            progress = await importer.run(restart=restart, progress_callback=report)
+        except asyncio.CancelledError:
+            try:
+                await message.edit(content="⏸️ Import interrupted by a reload. Run the same command to resume.")
+            except nextcord.HTTPException:
+                pass
+            raise
+        except Exception as e:
+            log.exception("Error importing Steam dump", extra={"path": importer.path})
+            return await message.edit(content=f"❌ Import stopped: {e}. Run the same command to resume.")
+        await message.edit(content=f"✅ Import finished: {progress.summary()}")
+        control_panel = self.bot.get_cog('ControlPanel')
+        if control_panel:
+            await control_panel.refresh_panel()
+
+    # --- Slash versions of the game-name commands, with autocomplete ---
+    @nextcord.slash_command(name="admin", description="Bot administration commands", default_member_permissions=nextcord.Permissions(administrator=True))
+    async def admin_slash(self, interaction: nextcord.Interaction):
+        pass
+
+    @admin_slash.subcommand(name="listregistrations", description="List all users registered for a game")
+    async def list_registrations_slash(self, interaction: nextcord.Interaction, game: str = SlashOption(description="The game to list", autocomplete=True)):
+        game_id = await self.db.get_game_id_from_name_or_alias(game)
+        if not game_id:
+            return await interaction.response.send_message(unknown_game_message(self.db, game), ephemeral=True)
+
+        game_name = self.db.name_index.name_for(game_id) or game
+        view = await registrations_view(self.db, game_id, game_name, author_id=interaction.user.id)
+        if view:
+            await interaction.response.send_message(embed=view.first_embed, view=view, ephemeral=True)
+        else:
+            await interaction.response.send_message(f"❌ No one is registered for **{game_name}**.", ephemeral=True)
+
+    @admin_slash.subcommand(name="deletegame", description="Delete a game and all its registrations")
+    async def delete_game_slash(self, interaction: nextcord.Interaction, game: str = SlashOption(description="The game to delete", autocomplete=True)):
+        game_id = await self.db.get_game_id_from_name_or_alias(game)
+        if not game_id:
+            return await interaction.response.send_message(unknown_game_message(self.db, game), ephemeral=True)
+
+        game_name = self.db.name_index.name_for(game_id) or game
+        confirm_view = ConfirmView(self.bot.get_cog('ControlPanel'), "delete_game", game_id, game_name)
+        await interaction.response.send_message(f"⚠️ Are you sure you want to delete **{game_name}** and all its registrations?", view=confirm_view, ephemeral=True)
+
+    @list_registrations_slash.on_autocomplete("game")
+    @delete_game_slash.on_autocomplete("game")
+    async def game_autocomplete(self, interaction: nextcord.Interaction, game: str):
+        await interaction.response.send_autocomplete(game_choices(self.db, game))
+
 def setup(bot):
     bot.add_cog(Admin(bot))
\ No newline at end of file
@@ -1,7 +1,13 @@
 import nextcord
 from nextcord.ext import commands
 from nextcord.ui import Button, View, Select, Modal, TextInput
-from database import Database
+from storage import Storage
+from pagination import registrations_view
+from analytics import top_games_embed
+from presence_index import now_playing_embed
+from interactions import InteractionDispatcher
+from registration_buffer import RegistrationBuffer
+from cogs.games import panel_games
 
 # --- Helper function to find a user ---
 def find_user(guild, user_identifier):
@@ -67,12 +73,13 @@ class UserActionView(View):
     def _add_components(self):
         self.clear_items()
         
-        games = self.cog.db.get_all_games_for_panel_sync()
+        # The user's own games first, then the most registered ones
+        games = panel_games(self.cog.db, self.cog.registrations, user_id=self.target_user.id)
         if not games:
             self.add_item(Button(label="No games found in bot", style=nextcord.ButtonStyle.grey, disabled=True, row=0))
             return
 
-        game_options = [nextcord.SelectOption(label=game['name'], value=str(game['id'])) for game in games]
+        game_options = [nextcord.SelectOption(label=name, value=str(game_id)) for game_id, name in games]
         self.add_item(Select(placeholder="Select a game for this user...", options=game_options, row=0))
         
         self.add_item(Button(label="✅ Register User", style=nextcord.ButtonStyle.success, row=1))
@@ -81,29 +88,37 @@ class UserActionView(View):
         self.add_item(Button(label="❌ Unregister User", style=nextcord.ButtonStyle.danger, row=1))
         self.children[-1].callback = self.unregister_button_callback
 
+    def _selected_game_id(self):
+        values = self.children[0].values
+        return int(values[0]) if values else None
+
     async def register_button_callback(self, interaction: nextcord.Interaction):
-        game_id = int(self.children[0].values[0])
-        game_name = await self.cog.db.get_game_name_by_id(game_id)
-        success = await self.cog.db.register_user_for_game(self.target_user.id, game_name)
-        
-        if success:
-            await interaction.response.send_message(f"✅ Registered {self.target_user.mention} for **{game_name}**.", ephemeral=True)
-        else:
-            await interaction.response.send_message(f"❌ {self.target_user.mention} is already registered for **{game_name}**.", ephemeral=True)
-        
-        await self.cog.refresh_panel()
+        game_id = self._selected_game_id()
+        if game_id is None:
+            return await interaction.response.send_message("❌ Pick a game first.", ephemeral=True)
+        await self.cog.interactions.dispatch(interaction, lambda i: self.register_user(game_id), after=self.cog.refresh_panel)
 
     async def unregister_button_callback(self, interaction: nextcord.Interaction):
-        game_id = int(self.children[0].values[0])
-        game_name = await self.cog.db.get_game_name_by_id(game_id)
-        success = await self.cog.db.unregister_user_from_game(self.target_user.id, game_name)
+        game_id = self._selected_game_id()
+        if game_id is None:
+            return await interaction.response.send_message("❌ Pick a game first.", ephemeral=True)
+        await self.cog.interactions.dispatch(interaction, lambda i: self.unregister_user(game_id), after=self.cog.refresh_panel)
 
-        if success:
-            await interaction.response.send_message(f"✅ Unregistered {self.target_user.mention} from **{game_name}**.", ephemeral=True)
-        else:
-            await interaction.response.send_message(f"❌ {self.target_user.mention} was not registered for **{game_name}**.", ephemeral=True)
+    async def register_user(self, game_id: int):
+        game_name = await self.cog.db.get_game_name_by_id(game_id)
+        if not game_name:
+            return "❌ That game no longer exists."
+        if await self.cog.db.register_user_for_game(self.target_user.id, game_name, create_missing=False):
+            return f"✅ Registered {self.target_user.mention} for **{game_name}**."
+        return f"❌ {self.target_user.mention} is already registered for **{game_name}**."
 
-        await self.cog.refresh_panel()
+    async def unregister_user(self, game_id: int):
+        game_name = await self.cog.db.get_game_name_by_id(game_id)
+        if not game_name:
+            return "❌ That game no longer exists."
+        if await self.cog.db.unregister_user_from_game(self.target_user.id, game_name):
+            return f"✅ Unregistered {self.target_user.mention} from **{game_name}**."
+        return f"❌ {self.target_user.mention} was not registered for **{game_name}**."
 
 
 # --- (Keep all the other classes from before: AddGameModal, ConfirmView, etc.) ---
@@ -184,10 +199,9 @@ class ControlPanelView(View):
         self.children[1].callback = self.manage_user_button_callback
 
         # Row 1: Game Dropdowns
-        games = self.cog.db.get_all_games_for_panel_sync()
-        game_options = [nextcord.SelectOption(label=game['name'], value=str(game['id'])) for game in games]
+        games = panel_games(self.cog.db, self.cog.registrations)
+        game_options = [nextcord.SelectOption(label=name, value=str(game_id)) for game_id, name in games]
         if game_options:
-            if len(game_options) > 25: game_options = game_options[:25]
             self.add_item(Select(placeholder="🗑️ Delete a Game...", options=game_options, row=1, custom_id="delete_game_select"))
             self.children[-1].callback = self.delete_game_select_callback
             self.add_item(Select(placeholder="👥 View Registrations...", options=game_options, row=2, custom_id="view_registrations_select"))
@@ -201,39 +215,71 @@ class ControlPanelView(View):
             self.add_item(Select(placeholder="📢 Set Alert Channel...", options=channel_options, row=3, custom_id="set_channel_select"))
             self.children[-1].callback = self.set_channel_select_callback
 
+        # Row 4: Stats
+        self.add_item(Button(label="📊 Play Stats", style=nextcord.ButtonStyle.secondary, row=4, custom_id="play_stats_button"))
+        self.children[-1].callback = self.play_stats_button_callback
+        self.add_item(Button(label="🟢 Now Playing", style=nextcord.ButtonStyle.secondary, row=4, custom_id="now_playing_button"))
+        self.children[-1].callback = self.now_playing_button_callback
+
     async def add_game_button_callback(self, interaction: nextcord.Interaction):
         await interaction.response.send_modal(AddGameModal(self.cog))
 
     async def manage_user_button_callback(self, interaction: nextcord.Interaction):
         await interaction.response.send_modal(ManageUserModal(self.cog))
 
+    # Everything past the modals goes through the dispatcher: deferred at once, handled
+    # on the worker pool, answered with a followup
     async def delete_game_select_callback(self, interaction: nextcord.Interaction):
+        await self.cog.interactions.dispatch(interaction, self.confirm_delete_game)
+
+    async def view_registrations_select_callback(self, interaction: nextcord.Interaction):
+        await self.cog.interactions.dispatch(interaction, self.view_registrations)
+
+    async def play_stats_button_callback(self, interaction: nextcord.Interaction):
+        await self.cog.interactions.dispatch(interaction, self.play_stats)
+
+    async def now_playing_button_callback(self, interaction: nextcord.Interaction):
+        await self.cog.interactions.dispatch(interaction, self.now_playing)
+
+    async def set_channel_select_callback(self, interaction: nextcord.Interaction):
+        await self.cog.interactions.dispatch(interaction, self.confirm_set_channel)
+
+    async def confirm_delete_game(self, interaction: nextcord.Interaction):
         game_id = int(interaction.data['values'][0])
         game_name = await self.cog.db.get_game_name_by_id(game_id)
         confirm_view = ConfirmView(self.cog, "delete_game", game_id, game_name)
-        await interaction.response.send_message(f"Are you sure you want to delete **{game_name}**?", view=confirm_view, ephemeral=True)
+        return {"content": f"Are you sure you want to delete **{game_name}**?", "view": confirm_view}
 
-    async def view_registrations_select_callback(self, interaction: nextcord.Interaction):
+    async def view_registrations(self, interaction: nextcord.Interaction):
         game_id = int(interaction.data['values'][0])
         game_name = await self.cog.db.get_game_name_by_id(game_id)
-        registrations = await self.cog.db.get_registrations_for_game_id(game_id)
-        if not registrations:
-            return await interaction.response.send_message(f"No users are registered for **{game_name}**.", ephemeral=True)
-        user_mentions = [f"<@{user_id}>" for user_id in registrations]
-        embed = nextcord.Embed(title=f"Registrations for {game_name}", description="\n".join(user_mentions), color=nextcord.Color.blue())
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        view = await registrations_view(self.cog.db, game_id, game_name)
+        if not view:
+            return f"No users are registered for **{game_name}**."
+        return {"embed": view.first_embed, "view": view}
 
-    async def set_channel_select_callback(self, interaction: nextcord.Interaction):
+    async def play_stats(self, interaction: nextcord.Interaction):
+        return {"embed": await top_games_embed(self.cog.db, days=7)}
+
+    async def now_playing(self, interaction: nextcord.Interaction):
+        detection = self.cog.bot.get_cog('GameDetection')
+        if not detection:
+            return "❌ Game detection isn't running."
+        return {"embed": now_playing_embed(detection.now_playing, detection.trending)}
+
+    async def confirm_set_channel(self, interaction: nextcord.Interaction):
         channel_id = int(interaction.data['values'][0])
         channel = self.cog.bot.get_channel(channel_id)
         confirm_view = ConfirmView(self.cog, "set_channel", channel_id, channel.name)
-        await interaction.response.send_message(f"Set **{channel.mention}** as the new alert channel?", view=confirm_view, ephemeral=True)
+        return {"content": f"Set **{channel.mention}** as the new alert channel?", "view": confirm_view}
 
 # --- The Main Cog ---
 class ControlPanel(commands.Cog):
-    def __init__(self, bot: commands.Bot, db: Database):
+    def __init__(self, bot: commands.Bot, db: Storage, registrations: RegistrationBuffer, interactions: InteractionDispatcher):
         self.bot = bot
         self.db = db
+        self.registrations = registrations  # In-memory registrations, used to pick the games the panels list
+        self.interactions = interactions
         self.message = None
         self.bot.add_view(ControlPanelView(self))
 
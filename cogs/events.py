@@ -2,12 +2,12 @@ import nextcord
 from nextcord.ext import commands
 import datetime
 import os
-from database import Database
+from storage import Storage
 
 class Events(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, db: Storage):
         self.bot = bot
-        self.db = Database()
+        self.db = db
     
     @commands.group(name="event", invoke_without_command=True)
     async def event(self, ctx):
@@ -18,7 +18,7 @@ class Events(commands.Cog):
     async def create(self, ctx, title: str, *, description: str = "No description provided"):
         """Create a new game event"""
         # Create event in database
-        event_id = self.db.create_event(title, description, ctx.author.id)
+        event_id = await self.db.create_event(title, description, ctx.author.id)
         
         if event_id:
             embed = nextcord.Embed(
@@ -45,7 +45,7 @@ class Events(commands.Cog):
     @event.command(name="list")
     async def list(self, ctx):
         """List all upcoming events"""
-        events = self.db.get_upcoming_events()
+        events = await self.db.get_upcoming_events()
         
         if events:
             embed = nextcord.Embed(
@@ -81,7 +81,7 @@ class Events(commands.Cog):
             await ctx.send(f"❌ Invalid status. Use: {', '.join(valid_statuses)}")
             return
         
-        success = self.db.update_event_rsvp(event_id, ctx.author.id, status.lower())
+        success = await self.db.update_event_rsvp(event_id, ctx.author.id, status.lower())
         
         if success:
             embed = nextcord.Embed(
@@ -1,42 +1,116 @@
 import nextcord
 from nextcord.ext import commands, tasks
+import asyncio
 import datetime
 import os
+import time
 import requests
-from database import Database
+from config import Config
+from storage import Storage
+from analytics import PlaySessionRecorder
+from presence_index import NowPlayingIndex, TrendingCounter, playing_game
+from ipc import IPCPublisher
+from delivery import DeliveryPreferences, DMWorkerPool
+from logs import get_logger
+
+log = get_logger(__name__, cog="GameDetection")
+
+def get_steam_game_image(game_name):
+    """Blocking Steam store search for a game's artwork; run it in a thread."""
+    try:
+        response = requests.get("https://store.steampowered.com/api/storesearch/",
+                                params={"term": game_name, "l": "english", "cc": "us"}, timeout=Config.STEAM_LOOKUP_TIMEOUT)
+        data = response.json()
+        if data.get('items'):
+            item = data['items'][0]
+            if item.get('header_image'): return item['header_image']
+            elif item.get('large_image'): return item['large_image']
+            elif item.get('small_image'): return item['small_image']
+            elif item.get('tiny_image'): return item['tiny_image']
+    except (requests.RequestException, ValueError):
+        pass
+    return None
+
+def shard_is_live(bot, guild):
+    """False while the shard serving this guild is disconnected, since its member cache may be stale."""
+    get_shard = getattr(bot, 'get_shard', None)
+    if not get_shard:
+        return True # Not sharded
+    shard = get_shard(guild.shard_id)
+    return shard is not None and not shard.is_closed()
 
 class GameDetection(commands.Cog):
-    def __init__(self, bot, db: Database):
+    def __init__(self, bot, db: Storage, sessions: PlaySessionRecorder, publisher: IPCPublisher = None,
+                 prefs: DeliveryPreferences = None, dms: DMWorkerPool = None):
         self.bot = bot
         self.db = db
+        self.sessions = sessions
+        # Set in the split deployment: notifications are handed to the notifier process
+        self.publisher = publisher
+        # Per-user delivery preferences and the DM sender; without them everyone is mentioned in the channel
+        self.prefs = prefs
+        self.dms = dms
         self.last_games = {}
+        # Live "who's playing now" view, fed by presence updates instead of member scans
+        self.now_playing = NowPlayingIndex()
+        self.trending = TrendingCounter()
+        self.seed_now_playing()
         self.game_check.start()
     
     def cog_unload(self):
         self.game_check.cancel()
+
+    def current_game(self, member):
+        """The game a member is playing under its catalogue name, so every spelling counts as one game."""
+        game_name = playing_game(member)
+        return self.db.name_index.canonical_name(game_name) if game_name else None
+
+    def seed_now_playing(self):
+        """Fills the now-playing index once from the member cache; presence updates keep it current."""
+        for guild in self.bot.guilds:
+            for member in guild.members:
+                if not member.bot:
+                    self.now_playing.update(member.id, self.current_game(member))
+
+    def reopen_sessions(self):
+        """Opens a play session for every member seen playing who has none, e.g. after a restore closed them all."""
+        for user_id, game_name in self.last_games.items():
+            if user_id not in self.sessions.open_sessions:
+                self.sessions.session_started(user_id, game_name)
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        if after.bot:
+            return
+        game_name = self.current_game(after)
+        previous = self.now_playing.update(after.id, game_name)
+        if game_name and game_name != previous:
+            self.trending.record(game_name)
+            log.debug("Presence changed", extra={"event": "presence.changed", "guild": after.guild.id, "user_id": after.id, "game": game_name})
     
-    def get_steam_game_image(self, game_name):
-        try:
-            url = f"https://store.steampowered.com/api/storesearch/?term={game_name}&l=english&cc=us"
-            response = requests.get(url)
-            data = response.json()
-            if data.get('items'):
-                item = data['items'][0]
-                if item.get('header_image'): return item['header_image']
-                elif item.get('large_image'): return item['large_image']
-                elif item.get('small_image'): return item['small_image']
-                elif item.get('tiny_image'): return item['tiny_image']
-        except:
-            pass
-        return None
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        # Presence updates stop once a member leaves, so drop them from the live views here
+        if member.bot or any(guild.get_member(member.id) for guild in self.bot.guilds):
+            return
+        self.now_playing.update(member.id, None)
+        if self.last_games.pop(member.id, None) is not None:
+            self.sessions.session_ended(member.id)
+
+    async def get_steam_game_image(self, game_name):
+        # The lookup is a blocking HTTP call; keep it off the event loop
+        return await asyncio.to_thread(get_steam_game_image, game_name)
     
     @tasks.loop(seconds=30)
     async def game_check(self):
         try:
             if not self.bot.is_ready(): return
-            guild = self.bot.guilds[0]
-            for member in guild.members:
-                if member.bot: continue
+            started = time.perf_counter()
+            # Walk every guild this process's shards serve; a member seen in several guilds is handled once
+            seen = set()
+            for member in (m for guild in self.bot.guilds if shard_is_live(self.bot, guild) for m in guild.members):
+                if member.bot or member.id in seen: continue
+                seen.add(member.id)
                 
                 user_id = member.id
                 current_activity = member.activity
@@ -45,38 +119,77 @@ class GameDetection(commands.Cog):
                     game_name = current_activity.name
                     if user_id not in self.last_games or self.last_games[user_id] != game_name:
                         self.last_games[user_id] = game_name
+                        self.sessions.session_started(user_id, game_name)
                         await self.send_game_notification(member, game_name)
                 else:
                     if user_id in self.last_games:
                         del self.last_games[user_id]
-        except Exception as e:
-            print(f"Error in game_check: {e}")
+                        self.sessions.session_ended(user_id)
+            log.debug("Game check pass", extra={"members": len(seen), "playing": len(self.last_games),
+                                                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)})
+        except Exception:
+            log.exception("Error in game_check")
     
     async def send_game_notification(self, member, game_name):
-        registered_users = await self.db.get_users_registered_for_game(game_name)
+        started = time.perf_counter()
+        game_id = await self.db.get_game_id_from_name_or_alias(game_name)
+        if not game_id: return
+        registered_users = await self.db.get_registrations_for_game_id(game_id)
         if not registered_users: return
         
         alert_channel_id_str = os.getenv('ALERT_CHANNEL_ID')
         if not alert_channel_id_str:
-            print("❌ ALERT_CHANNEL_ID not configured in .env")
+            log.error("ALERT_CHANNEL_ID not configured in .env")
             return
         
         alert_channel_id = int(alert_channel_id_str)
         channel = self.bot.get_channel(alert_channel_id)
         if not channel:
-            print(f"❌ Could not find alert channel with ID {alert_channel_id}")
+            log.error("Could not find alert channel", extra={"channel_id": alert_channel_id, "game_id": game_id})
             return
         
         embed = nextcord.Embed(title=f"🎮 {game_name}", description=f"**{member.display_name}** is now playing!", color=0x3498db)
-        game_image = self.get_steam_game_image(game_name)
-        if game_image: embed.set_image(url=game_image)
         embed.set_thumbnail(url=member.display_avatar.url)
         embed.add_field(name="👤 Player", value=member.display_name, inline=True)
         embed.add_field(name="📅 Started", value=datetime.datetime.now().strftime("%B %d, %Y at %H:%M"), inline=True)
         
-        ping_list = [f"<@{user_id}>" for user_id in registered_users if user_id != member.id]
-        if ping_list:
-            embed.add_field(name="🔔 Notifying", value=f"{len(ping_list)} players", inline=True)
+        subscribers = [user_id for user_id in registered_users if user_id != member.id]
+        dm_ids = set()
+        if self.prefs:
+            # Mutes, quiet hours and cooldowns drop users; DM-mode users move out of the channel mention
+            channel_ids, dm_ids = self.prefs.route(game_id, subscribers)
+            subscribers = [user_id for user_id in subscribers if user_id in channel_ids]
+        if subscribers or dm_ids:
+            embed.add_field(name="🔔 Notifying", value=f"{len(subscribers) + len(dm_ids)} players", inline=True)
         
-        await channel.send(content=" ".join(ping_list), embed=embed)
-        print(f"🎮 Sent notification for {member.display_name} playing {game_name}")
\ No newline at end of file
+        # Role fan-out mode: a single role mention instead of one mention per subscriber. The role reaches
+        # every registered user, so it's only used when routing kept all of them in the channel mention
+        # (the player among them would be pinged too, so they must not be registered).
+        role_sync = self.bot.get_cog('RoleSync')
+        everyone = bool(subscribers) and set(subscribers) == set(registered_users)
+        role = await role_sync.get_mention_role(channel.guild, game_id) if role_sync and everyone else None
+        if role:
+            content, role_ids = role.mention, [role.id]
+        else:
+            content, role_ids = " ".join(f"<@{user_id}>" for user_id in subscribers), []
+
+        # Artwork stored with the game (e.g. from a Steam import) saves a live store lookup
+        image_url = await self.db.get_game_image_url(game_id)
+        if self.publisher:
+            # Split deployment: the notifier process looks up the artwork and sends the message
+            self.publisher.publish({"channel_id": channel.id, "content": content, "embed": embed.to_dict(), "role_ids": role_ids,
+                                    "image_url": image_url, "image_for": None if image_url else game_name,
+                                    "dm_user_ids": sorted(dm_ids)})
+        else:
+            game_image = image_url or await self.get_steam_game_image(game_name)
+            if game_image: embed.set_image(url=game_image)
+            if role_ids:
+                await channel.send(content=content, embed=embed, allowed_mentions=nextcord.AllowedMentions(roles=[role]))
+            else:
+                await channel.send(content=content, embed=embed)
+            if dm_ids and self.dms:
+                self.dms.submit(dm_ids, embed=embed)
+        log.info("Sent notification", extra={
+            "guild": channel.guild.id, "game_id": game_id, "game": game_name, "user_id": member.id,
+            "mentions": len(subscribers), "dms": len(dm_ids), "role_mode": bool(role_ids),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)})
\ No newline at end of file
@@ -1,22 +1,35 @@
+import heapq
 import nextcord
+from nextcord import SlashOption
 from nextcord.ext import commands
-from database import Database
+from storage import Storage
+from registration_buffer import RegistrationBuffer
+from pagination import PaginatedView
+from presence_index import now_playing_embed
+
+# Embeds allow at most 25 fields
+GAMES_PER_PAGE = 24
 
 class Games(commands.Cog):
-    def __init__(self, bot, db: Database):
+    def __init__(self, bot, db: Storage):
         self.bot = bot
         self.db = db
     
     @commands.group(name="game", invoke_without_command=True)
     async def game(self, ctx):
         """Game registration commands"""
-        await ctx.send("Use `!game register <game>` to register for a game or `!game list` to see registered games.")
+        await ctx.send("Use `!game register <game>` to register for a game, `!game list` to see registered games or `!game nowplaying` to see what people are playing.")
     
     @game.command(name="register")
     async def register(self, ctx, *, game_name: str):
         """Register for notifications when someone plays a game"""
         user_id = ctx.author.id
-        success = await self.db.register_user_for_game(user_id, game_name)
+        game_id = await self.db.get_game_id_from_name_or_alias(game_name)
+        if not game_id:
+            return await ctx.send(unknown_game_message(self.db, game_name))
+
+        game_name = self.db.name_index.name_for(game_id) or game_name
+        success = await self.db.register_user_for_game(user_id, game_name, create_missing=False)
         
         if success:
             embed = nextcord.Embed(title="✅ Game Registration Successful", description=f"You've been registered for notifications when someone plays **{game_name}**!", color=nextcord.Color.green())
@@ -46,15 +59,115 @@ class Games(commands.Cog):
     async def list(self, ctx):
         """List all games you're registered for"""
         user_id = ctx.author.id
-        games = await self.db.get_user_registered_games(user_id)
-        
-        if games:
+
+        def fetch_page(after=None, before=None, limit=GAMES_PER_PAGE):
+            return self.db.get_user_registered_games_page(user_id, after=after, before=before, limit=limit)
+
+        def build_embed(games, page_number):
             embed = nextcord.Embed(title="🎮 Your Registered Games", description="You'll receive notifications when someone starts playing these games:", color=nextcord.Color.blue())
             for game in games:
                 embed.add_field(name=game, value="✅ Registered", inline=True)
-            embed.set_footer(text=f"Requested by {ctx.author.name}")
-            await ctx.send(embed=embed)
+            embed.set_footer(text=f"Requested by {ctx.author.name} • Page {page_number}")
+            return embed
+
+        view = PaginatedView(fetch_page, build_embed, per_page=GAMES_PER_PAGE, author_id=user_id,
+                             empty_text="You're not registered for any games any more.")
+        embed = await view.start()
+        
+        if embed:
+            await ctx.send(embed=embed, view=view)
         else:
             embed = nextcord.Embed(title="🎮 No Registered Games", description="You haven't registered for any game notifications yet. Use `!game register <game>` to get started!", color=nextcord.Color.orange())
             embed.set_footer(text=f"Requested by {ctx.author.name}")
-            await ctx.send(embed=embed)
\ No newline at end of file
+            await ctx.send(embed=embed)
+
+    @game.command(name="nowplaying")
+    async def nowplaying(self, ctx, *, game_name: str = None):
+        """Show what people are playing right now (or who is playing a specific game)"""
+        detection = self.bot.get_cog('GameDetection')
+        if not detection:
+            return await ctx.send("❌ Game detection isn't running.")
+
+        if not game_name:
+            return await ctx.send(embed=now_playing_embed(detection.now_playing, detection.trending))
+
+        # The index is keyed by catalogue name, so an alias or any capitalisation finds the game
+        game_name = self.db.name_index.canonical_name(game_name)
+        players = detection.now_playing.players_of(game_name)
+        if not players:
+            return await ctx.send(f"Nobody is playing **{game_name}** right now.")
+        shown = sorted(players)[:50]
+        description = " ".join(f"<@{user_id}>" for user_id in shown)
+        if len(players) > len(shown):
+            description += f"\n…and {len(players) - len(shown)} more"
+        embed = nextcord.Embed(title=f"🟢 Playing {game_name} ({len(players)})", description=description, color=nextcord.Color.green())
+        await ctx.send(embed=embed, allowed_mentions=nextcord.AllowedMentions.none())
+
+    # --- Slash commands (game names are picked from autocomplete, so typos can't create new games) ---
+    @nextcord.slash_command(name="register", description="Get notified when someone starts playing a game")
+    async def register_slash(self, interaction: nextcord.Interaction, game: str = SlashOption(description="The game to register for", autocomplete=True)):
+        game_id = await self.db.get_game_id_from_name_or_alias(game)
+        if not game_id:
+            return await interaction.response.send_message(unknown_game_message(self.db, game), ephemeral=True)
+
+        game_name = self.db.name_index.name_for(game_id) or game
+        success = await self.db.register_user_for_game(interaction.user.id, game_name, create_missing=False)
+        if success:
+            await interaction.response.send_message(f"✅ You've been registered for notifications when someone plays **{game_name}**!", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"❌ You're already registered for **{game_name}** notifications.", ephemeral=True)
+
+    @nextcord.slash_command(name="unregister", description="Stop getting notifications for a game")
+    async def unregister_slash(self, interaction: nextcord.Interaction, game: str = SlashOption(description="The game to unregister from", autocomplete=True)):
+        game_id = await self.db.get_game_id_from_name_or_alias(game)
+        if not game_id:
+            return await interaction.response.send_message(unknown_game_message(self.db, game), ephemeral=True)
+
+        game_name = self.db.name_index.name_for(game_id) or game
+        success = await self.db.unregister_user_from_game(interaction.user.id, game_name)
+        if success:
+            await interaction.response.send_message(f"✅ You've been unregistered from **{game_name}** notifications.", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"❌ You weren't registered for **{game_name}** notifications.", ephemeral=True)
+
+    @register_slash.on_autocomplete("game")
+    @unregister_slash.on_autocomplete("game")
+    async def game_autocomplete(self, interaction: nextcord.Interaction, game: str):
+        await interaction.response.send_autocomplete(game_choices(self.db, game))
+
+
+# Discord rejects the whole autocomplete response if any choice is longer than this
+MAX_CHOICE_LENGTH = 100
+
+def game_choices(db: Storage, typed: str, limit: int = 25):
+    """Autocomplete choices for a typed game name. Names too long to be a choice are left out
+    rather than cut short, since a shortened name wouldn't resolve back to the game."""
+    names = db.name_index.search(typed or "", limit=limit * 2)
+    return [name for name in names if len(name) <= MAX_CHOICE_LENGTH][:limit]
+
+# Discord allows at most this many options in one dropdown
+MAX_SELECT_OPTIONS = 25
+
+def panel_games(db: Storage, registrations: RegistrationBuffer, user_id: int = None, limit: int = MAX_SELECT_OPTIONS):
+    """Up to `limit` (game_id, name) pairs for a panel dropdown, built from memory without touching the database.
+
+    A dropdown can't hold a whole imported catalogue, so it offers `user_id`'s own games (if given),
+    then the most registered ones, topped up alphabetically. Other games are found with /register.
+    """
+    names = db.name_index.names
+    counts = {game_id: len(users) for game_id, users in registrations.subscribers.items() if users and game_id in names}
+    picked = []
+    if user_id is not None:
+        picked += sorted((game_id for game_id in counts if user_id in registrations.subscribers[game_id]), key=names.get)
+    picked += heapq.nsmallest(limit, counts, key=lambda game_id: (-counts[game_id], names[game_id]))
+    picked += db.name_index.search_ids("", limit)
+    # Option labels are capped like choices; the value is the ID, so a shortened label is fine here
+    return [(game_id, names[game_id][:MAX_CHOICE_LENGTH]) for game_id in list(dict.fromkeys(picked))[:limit]]
+
+def unknown_game_message(db: Storage, game_name: str):
+    """Error text for a game name that isn't in the catalogue, with close matches if there are any."""
+    suggestions = db.name_index.search(game_name, limit=5)
+    message = f"❌ **{game_name}** isn't a known game. Pick one from the autocomplete list."
+    if suggestions:
+        message += "\nDid you mean: " + ", ".join(f"**{name}**" for name in suggestions)
+    return message
@@ -0,0 +1,75 @@
+import time
+from nextcord.ext import commands, tasks
+from config import Config
+from storage import Storage
+from backup import BackupManager
+from logs import get_logger
+
+log = get_logger(__name__, cog="Maintenance")
+
+class Maintenance(commands.Cog):
+    """Keeps the registrations table down to current members, compacts and backs up the database in the background."""
+    def __init__(self, bot, db: Storage, backups: BackupManager = None):
+        self.bot = bot
+        self.db = db
+        self.backups = backups
+        self.reconcile_roster.start()
+        self.compact.start()
+        if self.backups:
+            self.scheduled_backup.start()
+
+    def cog_unload(self):
+        self.reconcile_roster.cancel()
+        self.compact.cancel()
+        self.scheduled_backup.cancel()
+
+    def is_member_anywhere(self, user_id: int):
+        return any(guild.get_member(user_id) for guild in self.bot.guilds)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        """Drops a departed member's registrations unless they are still in another guild."""
+        if member.bot or self.is_member_anywhere(member.id):
+            return
+        removed = await self.db.delete_user_registrations(member.id)
+        if removed:
+            log.info("Removed registrations of departed member", extra={"guild": member.guild.id, "user_id": member.id, "removed": removed})
+
+    @tasks.loop(hours=Config.ROSTER_RECONCILE_INTERVAL)
+    async def reconcile_roster(self):
+        """Catches departures missed while the bot was offline by diffing registrations against the roster."""
+        try:
+            if not self.bot.is_ready() or not self.bot.guilds:
+                return
+            # A partial member cache would look like mass departures, so only prune with full rosters
+            if not all(guild.chunked for guild in self.bot.guilds):
+                log.info("Skipping roster reconcile: member lists are still loading")
+                return
+            started = time.perf_counter()
+            roster = {member.id for guild in self.bot.guilds for member in guild.members}
+            removed = await self.db.prune_registrations(roster)
+            log.info("Roster reconciled", extra={"roster": len(roster), "removed": removed,
+                                                 "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)})
+        except Exception:
+            log.exception("Error in reconcile_roster")
+
+    @tasks.loop(hours=Config.DB_COMPACT_INTERVAL)
+    async def compact(self):
+        """Incremental VACUUM and ANALYZE, run in small steps so the bot keeps serving."""
+        if self.compact.current_loop == 0:
+            return  # Not while the bot is starting up; first pass after one interval
+        try:
+            started = time.perf_counter()
+            freed = await self.db.compact()
+            log.info("Database compacted", extra={"pages_freed": freed, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)})
+        except Exception:
+            log.exception("Error compacting database")
+
+    @tasks.loop(hours=Config.BACKUP_INTERVAL)
+    async def scheduled_backup(self):
+        """Snapshots the database with the online backup API and rotates old snapshots."""
+        try:
+            path = await self.backups.snapshot()
+            log.info("Database snapshot saved", extra={"path": path})
+        except Exception:
+            log.exception("Error taking database snapshot")
@@ -0,0 +1,87 @@
+import nextcord
+from nextcord.ext import commands
+from storage import Storage
+from delivery import DeliveryPreferences
+from cogs.games import unknown_game_message
+
+class Preferences(commands.Cog):
+    """Lets users choose how and when they get game notifications."""
+    def __init__(self, bot, db: Storage, prefs: DeliveryPreferences):
+        self.bot = bot
+        self.db = db
+        self.prefs = prefs
+
+    @commands.group(name="notify", invoke_without_command=True)
+    async def notify(self, ctx):
+        """Show your notification settings"""
+        delivery, quiet_start, quiet_end = self.prefs.get_user(ctx.author.id)
+        embed = nextcord.Embed(title="🔔 Your Notification Settings", color=nextcord.Color.blue())
+        embed.add_field(name="📬 Delivery", value="Direct messages" if delivery == "dm" else "Mentions in the alert channel", inline=True)
+        quiet = f"{quiet_start:02d}:00–{quiet_end:02d}:00 UTC" if quiet_start is not None else "Off"
+        embed.add_field(name="🌙 Quiet hours", value=quiet, inline=True)
+
+        overrides = []
+        for game_id, (muted, cooldown) in self.prefs.get_games(ctx.author.id).items():
+            game_name = self.db.name_index.name_for(game_id) or f"#{game_id}"
+            overrides.append(f"**{game_name}**: " + ("muted" if muted else f"at most every {cooldown} min"))
+        if overrides:
+            embed.add_field(name="🎮 Per-game", value="\n".join(sorted(overrides))[:1024], inline=False)
+
+        embed.set_footer(text="!notify dm|channel · !notify quiet <start> <end>|off · !notify mute|unmute <game> · !notify cooldown <minutes> <game>")
+        await ctx.send(embed=embed)
+
+    @notify.command(name="dm")
+    async def dm(self, ctx):
+        """Get notifications as direct messages"""
+        await self.prefs.set_delivery(ctx.author.id, "dm")
+        await ctx.send("✅ You'll get game notifications as direct messages.")
+
+    @notify.command(name="channel")
+    async def channel(self, ctx):
+        """Get notifications as mentions in the alert channel"""
+        await self.prefs.set_delivery(ctx.author.id, "channel")
+        await ctx.send("✅ You'll be mentioned in the alert channel.")
+
+    @notify.command(name="quiet")
+    async def quiet(self, ctx, start: str, end: int = None):
+        """Set quiet hours in UTC, e.g. `!notify quiet 22 7`, or `!notify quiet off`"""
+        if start.lower() == "off":
+            await self.prefs.set_quiet_hours(ctx.author.id, None, None)
+            return await ctx.send("✅ Quiet hours turned off.")
+        if not start.isdigit() or end is None or not 0 <= int(start) <= 23 or not 0 <= end <= 23 or int(start) == end:
+            return await ctx.send("❌ Usage: `!notify quiet <start hour> <end hour>` with different hours from 0 to 23 (UTC), or `!notify quiet off`.")
+        await self.prefs.set_quiet_hours(ctx.author.id, int(start), end)
+        await ctx.send(f"✅ No notifications from {int(start):02d}:00 to {end:02d}:00 UTC.")
+
+    async def _resolve(self, ctx, game_name: str):
+        game_id = await self.db.get_game_id_from_name_or_alias(game_name)
+        if not game_id:
+            await ctx.send(unknown_game_message(self.db, game_name))
+        return game_id
+
+    @notify.command(name="mute")
+    async def mute(self, ctx, *, game_name: str):
+        """Stop notifications for one game without unregistering"""
+        game_id = await self._resolve(ctx, game_name)
+        if game_id:
+            await self.prefs.set_muted(ctx.author.id, game_id, True)
+            await ctx.send(f"🔕 Muted **{self.db.name_index.name_for(game_id) or game_name}**.")
+
+    @notify.command(name="unmute")
+    async def unmute(self, ctx, *, game_name: str):
+        """Resume notifications for a muted game"""
+        game_id = await self._resolve(ctx, game_name)
+        if game_id:
+            await self.prefs.set_muted(ctx.author.id, game_id, False)
+            await ctx.send(f"🔔 Unmuted **{self.db.name_index.name_for(game_id) or game_name}**.")
+
+    @notify.command(name="cooldown")
+    async def cooldown(self, ctx, minutes: int, *, game_name: str):
+        """Get at most one notification per N minutes for a game (0 turns it off)"""
+        if minutes < 0:
+            return await ctx.send("❌ Minutes can't be negative.")
+        game_id = await self._resolve(ctx, game_name)
+        if game_id:
+            await self.prefs.set_cooldown(ctx.author.id, game_id, minutes)
+            name = self.db.name_index.name_for(game_id) or game_name
+            await ctx.send(f"✅ At most one **{name}** notification every {minutes} minutes." if minutes else f"✅ Cooldown for **{name}** removed.")
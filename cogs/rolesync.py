@@ -0,0 +1,189 @@
+import asyncio
+import nextcord
+from nextcord.ext import commands, tasks
+from config import Config
+from storage import Storage
+from logs import get_logger
+
+log = get_logger(__name__, cog="RoleSync")
+
+# Discord refuses to create more roles than this in one guild
+GUILD_ROLE_LIMIT = 250
+
+class RoleSync(commands.Cog):
+    """Keeps one managed Discord role per game in sync with the registrations table.
+
+    When role fan-out mode is on (config key ROLE_FANOUT), notifications mention the
+    game's role instead of every registered user. At most ROLE_FANOUT_MAX_ROLES games
+    get a role, the most subscribed first; the rest keep per-user mentions.
+    """
+    def __init__(self, bot, db: Storage):
+        self.bot = bot
+        self.db = db
+        # Pending changes, collapsed so only the latest state per (user, game) is applied
+        self.pending = {}
+        # Roles of deleted games, removed from the guild on the next batch
+        self.stale_roles = set()
+        self.db.add_registration_listener(self.queue_change)
+        self.db.add_game_delete_listener(self.forget_game)
+        self.sync_worker.start()
+        self.reconcile.start()
+
+    def cog_unload(self):
+        self.sync_worker.cancel()
+        self.reconcile.cancel()
+
+    def queue_change(self, user_id, game_id, registered):
+        """Registration listener: queue a role add/remove for the next batch."""
+        self.pending[(user_id, game_id)] = registered
+
+    def forget_game(self, game_id, role_id):
+        """Game delete listener: drop the game's queued changes and queue its role for deletion."""
+        self.pending = {key: registered for key, registered in self.pending.items() if key[1] != game_id}
+        if role_id:
+            self.stale_roles.add(role_id)
+
+    async def reload(self):
+        """Drops queued role changes and reconciles against the registrations table, e.g. after a restore replaced it."""
+        self.pending = {}
+        self.stale_roles = set()
+        await self.reconcile()
+
+    async def is_enabled(self):
+        return bool(await self.db.get_config("ROLE_FANOUT"))
+
+    def get_guild(self):
+        """The guild whose roles are managed: GUILD_ID if set, otherwise the only guild the bot is in."""
+        if Config.GUILD_ID:
+            return self.bot.get_guild(Config.GUILD_ID)
+        return self.bot.guilds[0] if len(self.bot.guilds) == 1 else None
+
+    async def ensure_role(self, guild, game_id, create: bool = True):
+        """Gets the managed role for a game, creating it if needed and there is room for another."""
+        role_id = await self.db.get_game_role(game_id)
+        role = guild.get_role(role_id) if role_id else None
+        if role or not create:
+            return role
+
+        game_name = await self.db.get_game_name_by_id(game_id)
+        if not game_name:
+            return None
+        managed = await self.db.get_all_game_roles()
+        if len(managed) - (game_id in managed) >= Config.ROLE_FANOUT_MAX_ROLES or len(guild.roles) >= GUILD_ROLE_LIMIT:
+            return None
+        role = await guild.create_role(name=f"🎮 {game_name}", mentionable=True, reason="Game notification role")
+        await self.db.set_game_role(game_id, role.id)
+        return role
+
+    async def delete_stale_roles(self, guild):
+        stale, self.stale_roles = self.stale_roles, set()
+        for role_id in stale:
+            role = guild.get_role(role_id)
+            if not role:
+                continue
+            try:
+                await role.delete(reason="Game deleted")
+            except nextcord.HTTPException:
+                log.exception("Error deleting game role", extra={"guild": guild.id, "role_id": role_id})
+            await asyncio.sleep(Config.ROLE_SYNC_DELAY)
+
+    @tasks.loop(seconds=Config.ROLE_SYNC_INTERVAL)
+    async def sync_worker(self):
+        """Applies queued role changes in batches, one API call per member."""
+        if not (self.pending or self.stale_roles) or not self.bot.is_ready():
+            return
+        guild = self.get_guild()
+        if not guild:
+            return
+        # Roles of deleted games go whether or not fan-out is still on
+        await self.delete_stale_roles(guild)
+        batch, self.pending = self.pending, {}
+        try:
+            if not batch or not await self.is_enabled():
+                return
+        except Exception:
+            log.exception("Error in role sync", extra={"guild": guild.id})
+            self.requeue(batch)
+            return
+
+        # Group the batch per member so each member gets a single add and a single remove call
+        per_member = {}
+        for (user_id, game_id), registered in batch.items():
+            adds, removes = per_member.setdefault(user_id, ([], []))
+            (adds if registered else removes).append(game_id)
+
+        roles = {}
+        for user_id, (add_ids, remove_ids) in per_member.items():
+            member = guild.get_member(user_id)
+            if not member:
+                continue
+            try:
+                for game_id in add_ids + remove_ids:
+                    if game_id not in roles:
+                        roles[game_id] = await self.ensure_role(guild, game_id, create=game_id in add_ids)
+
+                to_add = [roles[g] for g in add_ids if roles[g] and roles[g] not in member.roles]
+                to_remove = [roles[g] for g in remove_ids if roles[g] and roles[g] in member.roles]
+                if to_add:
+                    await member.add_roles(*to_add, reason="Game registration")
+                    await asyncio.sleep(Config.ROLE_SYNC_DELAY)
+                if to_remove:
+                    await member.remove_roles(*to_remove, reason="Game unregistration")
+                    await asyncio.sleep(Config.ROLE_SYNC_DELAY)
+            except Exception:
+                # Only this member's changes are retried; the rest of the batch carries on
+                log.exception("Error in role sync", extra={"guild": guild.id, "user_id": user_id})
+                self.requeue({(user_id, game_id): batch[(user_id, game_id)] for game_id in add_ids + remove_ids})
+
+    def requeue(self, changes):
+        """Puts changes that failed to apply back in the queue, unless a newer change for the same (user, game) came in."""
+        for key, registered in changes.items():
+            self.pending.setdefault(key, registered)
+
+    @tasks.loop(minutes=Config.ROLE_RECONCILE_INTERVAL)
+    async def reconcile(self):
+        """Repairs drift between the registrations table and role membership."""
+        if not self.bot.is_ready():
+            return
+        guild = self.get_guild()
+        if not guild:
+            return
+        try:
+            if not await self.is_enabled():
+                return
+            registrations = await self.db.get_all_registrations()
+            game_roles = await self.db.get_all_game_roles()
+        except Exception:
+            log.exception("Error in role reconcile", extra={"guild": guild.id})
+            return
+
+        # Games that already have a role first, then the most subscribed, so the cap keeps the busiest games
+        game_ids = sorted(set(registrations) | set(game_roles),
+                          key=lambda game_id: (game_id not in game_roles, -len(registrations.get(game_id, ()))))
+        queued = failed = 0
+        for game_id in game_ids:
+            try:
+                role = await self.ensure_role(guild, game_id, create=bool(registrations.get(game_id)))
+            except Exception:
+                failed += 1
+                log.exception("Error creating game role", extra={"guild": guild.id, "game_id": game_id})
+                continue
+            if not role:
+                continue
+            registered = {user_id for user_id in registrations.get(game_id, ()) if guild.get_member(user_id)}
+            holders = {member.id for member in role.members}
+            for user_id in registered - holders:
+                self.queue_change(user_id, game_id, True)
+            for user_id in holders - registered:
+                self.queue_change(user_id, game_id, False)
+            queued += len(registered ^ holders)
+
+        if queued or failed:
+            log.info("Role reconcile queued role changes", extra={"guild": guild.id, "queued": queued, "failed": failed})
+
+    async def get_mention_role(self, guild, game_id):
+        """Returns the role to mention for a game, or None when role mode is off."""
+        if not await self.is_enabled():
+            return None
+        role_id = await self.db.get_game_role(game_id)
+        return guild.get_role(role_id) if role_id else None
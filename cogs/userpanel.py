@@ -1,7 +1,10 @@
 import nextcord
 from nextcord.ext import commands
 from nextcord.ui import Button, View, Select
-from database import Database
+from storage import Storage
+from registration_buffer import RegistrationBuffer
+from interactions import InteractionDispatcher
+from cogs.games import panel_games
 
 # --- The main view for the shared user panel ---
 class SharedUserPanelView(View):
@@ -13,72 +16,68 @@ class SharedUserPanelView(View):
     def _add_components(self):
         self.clear_items()
         
-        # Get all games for the dropdowns
-        games = self.cog.db.get_all_games_for_panel_sync()
-        game_options = [nextcord.SelectOption(label=game['name'], value=str(game['id'])) for game in games]
+        # The most registered games, read from memory; the rest of the catalogue is reached with /register
+        games = panel_games(self.cog.db, self.cog.registrations)
+        game_options = [nextcord.SelectOption(label=name, value=str(game_id)) for game_id, name in games]
 
         # Handle the case where there are no games
         if not game_options:
             self.add_item(Button(label="No games available", style=nextcord.ButtonStyle.grey, disabled=True, row=0, custom_id="no_games_button"))
             return
 
-        # Handle Discord's 25 option limit
-        if len(game_options) > 25:
-            game_options = game_options[:25]
-
-        # Dropdown for registering
+        # Picking a game in a dropdown is the action itself. The chosen game_id arrives in
+        # interaction.data, so callbacks never read selection state from this shared view
+        # (which every user clicks on at once, and which is rebuilt empty after a restart).
         self.add_item(Select(placeholder="➕ Select a game to register for...", options=game_options, row=0, custom_id="shared_register_select"))
-        
-        # Button for registering
-        self.add_item(Button(label="✅ Confirm Registration", style=nextcord.ButtonStyle.success, row=1, custom_id="shared_register_button"))
-        self.children[-1].callback = self.register_button_callback
-
-        # Dropdown for unregistering
-        self.add_item(Select(placeholder="❌ Select a game to unregister from...", options=game_options, row=2, custom_id="shared_unregister_select"))
+        self.children[-1].callback = self.register_select_callback
 
-        # Button for unregistering
-        self.add_item(Button(label="❌ Confirm Unregistration", style=nextcord.ButtonStyle.danger, row=3, custom_id="shared_unregister_button"))
-        self.children[-1].callback = self.unregister_button_callback
+        self.add_item(Select(placeholder="❌ Select a game to unregister from...", options=game_options, row=1, custom_id="shared_unregister_select"))
+        self.children[-1].callback = self.unregister_select_callback
 
         # Button for checking registrations
-        self.add_item(Button(label="📋 Check My Registrations", style=nextcord.ButtonStyle.secondary, row=4, custom_id="user_check_registrations_button"))
+        self.add_item(Button(label="📋 Check My Registrations", style=nextcord.ButtonStyle.secondary, row=2, custom_id="user_check_registrations_button"))
         self.children[-1].callback = self.check_registrations_button_callback
 
-    async def register_button_callback(self, interaction: nextcord.Interaction):
-        # Find the dropdown for registration (it's the first Select component)
-        register_select = self.children[0]
-        if not register_select.values:
-            return await interaction.response.send_message("❌ Please select a game from the dropdown first.", ephemeral=True)
-        
-        game_id = int(register_select.values[0])
-        game_name = await self.cog.db.get_game_name_by_id(game_id)
-        
-        success = await self.cog.db.register_user_for_game(interaction.user.id, game_name)
-        
-        if success:
-            await interaction.response.send_message(f"✅ You have been registered for **{game_name}**!", ephemeral=True)
-        else:
-            await interaction.response.send_message(f"❌ You are already registered for **{game_name}**.", ephemeral=True)
-
-    async def unregister_button_callback(self, interaction: nextcord.Interaction):
-        # Find the dropdown for unregistration (it's the second Select component)
-        unregister_select = self.children[2]
-        if not unregister_select.values:
-            return await interaction.response.send_message("❌ Please select a game from the dropdown first.", ephemeral=True)
+    def _selected_game(self, interaction: nextcord.Interaction):
+        """Reads the picked game straight from the interaction payload."""
+        values = (interaction.data or {}).get('values') or []
+        if not values:
+            return None, None
+        game_id = int(values[0])
+        return game_id, self.cog.db.name_index.name_for(game_id)
 
-        game_id = int(unregister_select.values[0])
-        game_name = await self.cog.db.get_game_name_by_id(game_id)
-        
-        success = await self.cog.db.unregister_user_from_game(interaction.user.id, game_name)
+    # Callbacks only hand off to the dispatcher, which defers at once and sends the
+    # handler's reply as a followup once a worker gets to it
+    async def register_select_callback(self, interaction: nextcord.Interaction):
+        await self.cog.interactions.dispatch(interaction, self.register_selected)
 
-        if success:
-            await interaction.response.send_message(f"✅ You have been unregistered from **{game_name}**.", ephemeral=True)
-        else:
-            await interaction.response.send_message(f"❌ You were not registered for **{game_name}**.", ephemeral=True)
+    async def unregister_select_callback(self, interaction: nextcord.Interaction):
+        await self.cog.interactions.dispatch(interaction, self.unregister_selected)
 
     async def check_registrations_button_callback(self, interaction: nextcord.Interaction):
-        user_id = interaction.user.id
-        registered_games = await self.cog.db.get_user_registered_games(user_id)
+        await self.cog.interactions.dispatch(interaction, self.check_registrations)
+
+    async def register_selected(self, interaction: nextcord.Interaction):
+        game_id, game_name = self._selected_game(interaction)
+        if not game_name:
+            return "❌ That game no longer exists."
+        
+        # Answered from memory; the write is batched by the registration buffer
+        if await self.cog.registrations.register(interaction.user.id, game_id):
+            return f"✅ You have been registered for **{game_name}**!"
+        return f"❌ You are already registered for **{game_name}**."
+
+    async def unregister_selected(self, interaction: nextcord.Interaction):
+        game_id, game_name = self._selected_game(interaction)
+        if not game_name:
+            return "❌ That game no longer exists."
+        
+        if await self.cog.registrations.unregister(interaction.user.id, game_id):
+            return f"✅ You have been unregistered from **{game_name}**."
+        return f"❌ You were not registered for **{game_name}**."
+
+    async def check_registrations(self, interaction: nextcord.Interaction):
+        registered_games = await self.cog.db.get_user_registered_games(interaction.user.id)
 
         if registered_games:
             game_list = "\n".join(f"🔹 {game}" for game in registered_games)
@@ -87,24 +86,50 @@ class SharedUserPanelView(View):
                 description=game_list,
                 color=nextcord.Color.green()
             )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
         else:
             embed = nextcord.Embed(
                 title="🎮 Your Game Registrations",
-                description="You are not registered for any games yet. Use the buttons above to get started!",
+                description="You are not registered for any games yet. Use the dropdowns above to get started!",
                 color=nextcord.Color.orange()
             )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+        return {"embed": embed}
+
+
+# --- Buttons from panels posted before picking a game became the action itself ---
+class LegacyPanelButtonsView(View):
+    """Answers the old Confirm buttons still on panels posted by earlier versions.
+
+    Those panels' dropdowns already work as they are; the buttons would otherwise fail
+    silently. Clicking one explains the change and swaps the message's components
+    for the current panel, so the old buttons disappear after the first click.
+    """
+    def __init__(self, cog: 'UserPanel'):
+        super().__init__(timeout=None)
+        self.cog = cog
+        for custom_id in ("shared_register_button", "shared_unregister_button"):
+            self.add_item(Button(label="Confirm", custom_id=custom_id))
+            self.children[-1].callback = self.legacy_button_callback
+
+    async def legacy_button_callback(self, interaction: nextcord.Interaction):
+        await interaction.response.send_message(
+            "ℹ️ This panel has been updated: picking a game in a dropdown now registers or unregisters you straight away, "
+            "no confirm button needed. Please pick your game again.", ephemeral=True)
+        await interaction.message.edit(view=SharedUserPanelView(self.cog))
+        if not self.cog.shared_panel_message:
+            self.cog.shared_panel_message = interaction.message
 
 
 # --- The User Panel Cog ---
 class UserPanel(commands.Cog):
-    def __init__(self, bot: commands.Bot, db: Database):
+    def __init__(self, bot: commands.Bot, db: Storage, registrations: RegistrationBuffer, interactions: InteractionDispatcher):
         self.bot = bot
         self.db = db
+        self.registrations = registrations
+        self.interactions = interactions
         self.shared_panel_message = None
         # Register the persistent view so buttons work after a restart
         self.bot.add_view(SharedUserPanelView(self))
+        self.bot.add_view(LegacyPanelButtonsView(self))
 
     @commands.command(name="createuserpanel")
     @commands.has_permissions(administrator=True)
@@ -116,7 +141,7 @@ class UserPanel(commands.Cog):
         view = SharedUserPanelView(self)
         embed = nextcord.Embed(
             title="🎮 Game Notification Center",
-            description="Select a game from the dropdown and click the corresponding button to manage your subscriptions.",
+            description="Pick a game from the top dropdown to register for it, or from the second dropdown to unregister. Game not listed? Use `/register`.",
             color=nextcord.Color.blue()
         )
         embed.set_footer(text="All actions are private and only you can see the confirmation.")
@@ -131,7 +156,7 @@ class UserPanel(commands.Cog):
             new_view = SharedUserPanelView(self)
             embed = nextcord.Embed(
                 title="🎮 Game Notification Center",
-                description="Select a game from the dropdown and click the corresponding button to manage your subscriptions.",
+                description="Pick a game from the top dropdown to register for it, or from the second dropdown to unregister. Game not listed? Use `/register`.",
                 color=nextcord.Color.blue()
             )
             embed.set_footer(text="All actions are private and only you can see the confirmation.")
@@ -16,10 +16,78 @@ class Config:
     
     # Database Configuration
     DATABASE_PATH = 'bot.db'
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sqlite')  # "sqlite" or "memory" (nothing persisted, for testing)
     
     # Web UI Configuration
     WEB_HOST = '0.0.0.0'
     WEB_PORT = 5000
     
     # Game Detection Configuration
-    GAME_CHECK_INTERVAL = 30  # seconds
\ No newline at end of file
+    GAME_CHECK_INTERVAL = 30  # seconds
+    
+    # Notification Delivery Configuration
+    DM_WORKERS = 4  # concurrent DM senders
+    DM_RATE = 2.0  # DMs per second across all workers
+    DM_QUEUE_SIZE = 1000  # DMs waiting to go out before new ones are dropped
+    DM_CHANNEL_CACHE_SIZE = 5000  # DM channels kept for reuse, least recently used dropped first
+    
+    # Interaction Dispatch Configuration
+    INTERACTION_WORKERS = 8  # panel handlers running at once
+    INTERACTION_QUEUE_SIZE = 500  # handlers waiting for a worker before new clicks are turned away
+    INTERACTION_USER_QUEUE = 3  # handlers one user can have waiting
+    INTERACTION_DRAIN_TIMEOUT = 10  # seconds queued handlers get to finish at shutdown
+    
+    # Role Fan-out Configuration
+    ROLE_SYNC_INTERVAL = 5  # seconds between role-sync batches
+    ROLE_SYNC_DELAY = 0.5  # seconds between role edits inside a batch (rate limiting)
+    ROLE_RECONCILE_INTERVAL = 60  # minutes between DB/role reconcile passes
+    ROLE_FANOUT_MAX_ROLES = 200  # managed roles at most (Discord allows 250 per guild); other games fall back to mentions
+    
+    # Registration Write-behind Configuration
+    REGISTRATION_FLUSH_INTERVAL = float(os.getenv('REGISTRATION_FLUSH_INTERVAL', 0.25))  # seconds between batch flushes
+    # "buffered": answer right away, lose at most one flush interval on a crash
+    # "commit": answer once the batch containing the change has committed (group commit)
+    REGISTRATION_DURABILITY = os.getenv('REGISTRATION_DURABILITY', 'buffered')
+    
+    # Database Maintenance Configuration
+    ROSTER_RECONCILE_INTERVAL = 24  # hours between pruning registrations of users no longer in any guild
+    DB_COMPACT_INTERVAL = 24  # hours between incremental VACUUM + ANALYZE passes
+    
+    # Backup Configuration
+    BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')  # keep this on a different volume than bot.db if possible
+    BACKUP_INTERVAL = 6  # hours between scheduled snapshots
+    BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', 8))  # newest snapshots kept, older ones are deleted
+    
+    # Catalogue Import Configuration
+    IMPORT_DIR = os.getenv('IMPORT_DIR', 'imports')  # Steam dumps for !admin importsteam are read from here
+    STEAM_IMPORT_BATCH = 1000  # games per import transaction
+    STEAM_LOOKUP_TIMEOUT = 5  # seconds before a live store search for notification artwork is given up
+    
+    # Play Session Analytics Configuration
+    PLAY_SESSION_FLUSH_INTERVAL = 30  # seconds between play session batch writes
+    
+    # Now Playing / Trending Configuration
+    TRENDING_WINDOW_MINUTES = 60  # sliding window for trending games
+    TRENDING_SLOTS = 12  # window is counted in this many slots
+    
+    # Load Testing Configuration
+    RECORD_EVENTS_PATH = os.getenv('RECORD_EVENTS_PATH')  # record gateway events to this file when set
+    
+    # Logging Configuration
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # "json" (one object per line) or "text"
+    LOG_LEVELS = os.getenv('LOG_LEVELS', 'nextcord=WARNING')  # per-module overrides, e.g. "database=DEBUG,cogs.gamedetection=WARNING"
+    LOG_QUEUE_SIZE = 10000  # records waiting for the writer thread before new ones are dropped
+    LOG_SAMPLE_RATES = {"presence.changed": 0.01, "interaction.done": 0.1, "dm.sent": 0.1}  # fraction kept of each high-frequency event
+    
+    # Event Loop Watchdog Configuration
+    LOOP_LAG_THRESHOLD_MS = int(os.getenv('LOOP_LAG_THRESHOLD_MS', 250))  # report callbacks blocking the loop longer than this
+    LOOP_LAG_CHECK_INTERVAL = 0.5  # seconds between heartbeats
+    
+    # Deployment Configuration
+    AUTOSHARD = os.getenv('AUTOSHARD', '0') == '1'  # use AutoShardedBot
+    SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0)) or None  # None lets Discord pick
+    # "single": everything in one process; "split": gateway process + separate notifier process
+    BOT_PROCESSES = os.getenv('BOT_PROCESSES', 'single')
+    IPC_SOCKET_PATH = os.getenv('IPC_SOCKET_PATH', '/tmp/minas-bot.sock')
+    IPC_CONCURRENCY = 8  # notifications the notifier sends at once; reading pauses while all are busy
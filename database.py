@@ -2,15 +2,34 @@ import aiosqlite
 import asyncio
 import os
 from datetime import datetime
+from storage import Storage, KeyedLock
+from logs import get_logger
 
-class Database:
+log = get_logger(__name__)
+
+# Scalar subquery resolving (name, alias) parameters to a game ID, primary names first
+GAME_ID_FROM_NAME_OR_ALIAS = """
+    SELECT id FROM games WHERE name = ?
+    UNION ALL SELECT game_id FROM game_aliases WHERE alias = ?
+    LIMIT 1
+"""
+
+class Database(Storage):
     def __init__(self, db_path="bot.db"):
+        super().__init__()
         self.db_path = db_path
+        # Per-game-name locks for the few write paths that span statements
+        self.game_locks = KeyedLock()
 
     async def init_db(self):
         """Initialize database with required tables (async)"""
         async with aiosqlite.connect(self.db_path) as conn:
             await conn.executescript('''
+                -- Only takes effect on a new database file; older ones are converted offline with `python -m backup vacuum`
+                PRAGMA auto_vacuum = INCREMENTAL;
+                -- Persistent: readers (backups included) no longer block the bot's writes, or the other way round
+                PRAGMA journal_mode = WAL;
+
                 CREATE TABLE IF NOT EXISTS games (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     name TEXT NOT NULL UNIQUE,
@@ -34,57 +53,148 @@ class Database:
                     alias TEXT NOT NULL UNIQUE,
                     FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE
                 );
+
+                -- Keyset pagination over a game's subscribers walks this index
+                CREATE INDEX IF NOT EXISTS idx_registrations_game_user
+                    ON user_game_registrations (game_id, user_id);
+
+                -- Append-only log of finished play sessions (unix seconds)
+                CREATE TABLE IF NOT EXISTS play_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    game_name TEXT NOT NULL,
+                    started_at INTEGER NOT NULL,
+                    ended_at INTEGER NOT NULL
+                );
+
+                -- Rollups maintained incrementally as sessions close; bucket = unix hour/day start
+                CREATE TABLE IF NOT EXISTS game_stats_hourly (
+                    game_name TEXT NOT NULL,
+                    hour INTEGER NOT NULL,
+                    sessions INTEGER NOT NULL DEFAULT 0,
+                    play_seconds INTEGER NOT NULL DEFAULT 0,
+                    peak_players INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (game_name, hour)
+                );
+
+                CREATE TABLE IF NOT EXISTS game_stats_daily (
+                    game_name TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    sessions INTEGER NOT NULL DEFAULT 0,
+                    play_seconds INTEGER NOT NULL DEFAULT 0,
+                    peak_players INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (game_name, day)
+                );
+                CREATE INDEX IF NOT EXISTS idx_game_stats_daily_day ON game_stats_daily (day);
+
+                CREATE TABLE IF NOT EXISTS game_daily_players (
+                    game_name TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    PRIMARY KEY (game_name, day, user_id)
+                ) WITHOUT ROWID;
+
+                -- Managed Discord roles used by the role fan-out notification mode
+                CREATE TABLE IF NOT EXISTS game_roles (
+                    game_id INTEGER PRIMARY KEY,
+                    role_id INTEGER NOT NULL UNIQUE,
+                    FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE
+                );
+
+                -- Delivery preferences; users without a row get channel mentions at any hour
+                CREATE TABLE IF NOT EXISTS user_preferences (
+                    user_id INTEGER PRIMARY KEY,
+                    delivery TEXT NOT NULL DEFAULT 'channel',
+                    quiet_start INTEGER,
+                    quiet_end INTEGER
+                );
+
+                CREATE TABLE IF NOT EXISTS user_game_preferences (
+                    user_id INTEGER NOT NULL,
+                    game_id INTEGER NOT NULL,
+                    muted INTEGER NOT NULL DEFAULT 0,
+                    cooldown_minutes INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, game_id),
+                    FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE
+                );
+
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    event_time TIMESTAMP,
+                    creator_id INTEGER NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+
+                CREATE TABLE IF NOT EXISTS event_rsvps (
+                    event_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    PRIMARY KEY (event_id, user_id),
+                    FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+                );
             ''')
             await conn.commit()
-            print("✅ Database initialized successfully.")
+            log.info("Database initialized", extra={"path": self.db_path})
+        await self.load_name_index()
+
+    async def load_name_index(self):
+        """(Re)build the in-memory game name index from the games and aliases tables."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute("SELECT id, name FROM games")
+            games = await cursor.fetchall()
+            cursor = await conn.execute("SELECT game_id, alias FROM game_aliases")
+            aliases = await cursor.fetchall()
+        self.name_index.rebuild(games, aliases)
 
     # --- CORE FUNCTION FOR ALIAS SYSTEM ---
     async def get_game_id_from_name_or_alias(self, name_or_alias):
         """Get a game's ID from its primary name or any of its aliases."""
         async with aiosqlite.connect(self.db_path) as conn:
-            cursor = await conn.execute("SELECT id FROM games WHERE name = ?", (name_or_alias,))
-            result = await cursor.fetchone()
-            if result:
-                return result[0]
+            return await self._resolve_game_id(conn, name_or_alias)
 
-            cursor = await conn.execute('''
-                SELECT game_id FROM game_aliases WHERE alias = ?
-            ''', (name_or_alias,))
-            result = await cursor.fetchone()
-            if result:
-                return result[0]
-            
-            return None # Not found
+    async def _resolve_game_id(self, conn, name_or_alias):
+        # Primary names win over aliases, in a single statement
+        cursor = await conn.execute(f"SELECT ({GAME_ID_FROM_NAME_OR_ALIAS})", (name_or_alias, name_or_alias))
+        result = await cursor.fetchone()
+        return result[0] if result else None
 
-    # --- CORRECTED FUNCTION ---
     async def add_game(self, name, image_url=None, aliases=None):
         """Add a new game to the database with optional aliases."""
-        # Check if the main game name already exists
-        game_id = await self.get_game_id_from_name_or_alias(name)
+        # The name check and inserts span statements, so concurrent adds of one name take turns
+        async with self.game_locks(name):
+            async with aiosqlite.connect(self.db_path) as conn:
+                game_id, added_aliases = await self._insert_game(conn, name, image_url, aliases)
+                await conn.commit()
         if game_id:
-            return None
+            self.name_index.add(game_id, name, added_aliases)
+        return game_id
 
-        async with aiosqlite.connect(self.db_path) as conn:
-            try:
-                # Insert the main game first
-                cursor = await conn.execute("INSERT INTO games (name, image_url) VALUES (?, ?)", (name, image_url))
-                await conn.commit()
-                game_id = cursor.lastrowid
-
-                # If aliases are provided, add them
-                if aliases:
-                    alias_list = [a.strip() for a in aliases.split(',') if a.strip()]
-                    for alias in alias_list:
-                        try:
-                            await conn.execute("INSERT INTO game_aliases (game_id, alias) VALUES (?, ?)", (game_id, alias))
-                        except aiosqlite.IntegrityError:
-                            # Alias already exists, skip it
-                            pass
-                    await conn.commit()
-                
-                return game_id
-            except aiosqlite.IntegrityError:
-                return None # Game name already exists
+    async def _insert_game(self, conn, name, image_url=None, aliases=None):
+        """Inserts a game and its aliases on `conn` without committing. Returns (game_id or None, aliases added)."""
+        if await self._resolve_game_id(conn, name):
+            return None, []
+        cursor = await conn.execute('''
+            INSERT INTO games (name, image_url) VALUES (?, ?)
+            ON CONFLICT(name) DO NOTHING RETURNING id
+        ''', (name, image_url))
+        result = await cursor.fetchone()
+        if not result:
+            return None, []
+        game_id = result[0]
+
+        added_aliases = []
+        if aliases:
+            for alias in (a.strip() for a in aliases.split(',') if a.strip()):
+                # Aliases already taken by any game are skipped
+                cursor = await conn.execute('''
+                    INSERT INTO game_aliases (game_id, alias) VALUES (?, ?)
+                    ON CONFLICT(alias) DO NOTHING RETURNING alias
+                ''', (game_id, alias))
+                if await cursor.fetchone():
+                    added_aliases.append(alias)
+        return game_id, added_aliases
 
     async def get_all_games(self):
         """Get all games and their IDs from database"""
@@ -93,33 +203,66 @@ class Database:
             rows = await cursor.fetchall()
             return rows
 
-    # --- ALL OTHER FUNCTIONS updated to use the new core function ---
-    async def register_user_for_game(self, user_id, game_name):
-        game_id = await self.get_game_id_from_name_or_alias(game_name)
-        if not game_id:
-            game_id = await self.add_game(game_name) # Add it if it doesn't exist
-            if not game_id:
-                return False
-
+    # --- Registration paths: one transaction each, no check-then-act across connections ---
+    async def register_user_for_game(self, user_id, game_name, create_missing=True):
         async with aiosqlite.connect(self.db_path) as conn:
-            try:
-                await conn.execute("INSERT INTO user_game_registrations (user_id, game_id) VALUES (?, ?)",
-                                   (user_id, game_id))
-                await conn.commit()
+            # Common case, one round trip: the game exists and the insert resolves it inline
+            cursor = await conn.execute(f'''
+                INSERT INTO user_game_registrations (user_id, game_id)
+                SELECT ?, game_id FROM (SELECT ({GAME_ID_FROM_NAME_OR_ALIAS}) AS game_id) WHERE game_id IS NOT NULL
+                ON CONFLICT(user_id, game_id) DO NOTHING RETURNING game_id
+            ''', (user_id, game_name, game_name))
+            result = await cursor.fetchone()
+            await conn.commit()
+            if result:
+                self._notify_registration_change(user_id, result[0], True)
                 return True
-            except aiosqlite.IntegrityError:
+            # Nothing inserted: either the row exists, or the game didn't when the insert ran.
+            # Only the first means "already registered"; the game may have been created since.
+            cursor = await conn.execute(f'''
+                SELECT game_id, EXISTS(SELECT 1 FROM user_game_registrations WHERE user_id = ? AND game_id = resolved.game_id)
+                FROM (SELECT ({GAME_ID_FROM_NAME_OR_ALIAS}) AS game_id) AS resolved
+            ''', (user_id, game_name, game_name))
+            game_id, registered = await cursor.fetchone()
+            if registered or (not game_id and not create_missing):
                 return False
 
-    async def unregister_user_from_game(self, user_id, game_name):
-        game_id = await self.get_game_id_from_name_or_alias(game_name)
-        if not game_id:
-            return False
+        # A brand-new game (or one created since the insert above): create it if needed and register
+        # in one transaction. Concurrent first registrations for the same name queue on its lock;
+        # later ones find the game created.
+        async with self.game_locks(game_name):
+            async with aiosqlite.connect(self.db_path) as conn:
+                game_id = await self._resolve_game_id(conn, game_name)
+                added_aliases = None
+                if not game_id:
+                    game_id, added_aliases = await self._insert_game(conn, game_name)
+                    if not game_id:
+                        return False
+                cursor = await conn.execute('''
+                    INSERT INTO user_game_registrations (user_id, game_id) VALUES (?, ?)
+                    ON CONFLICT(user_id, game_id) DO NOTHING RETURNING game_id
+                ''', (user_id, game_id))
+                registered = await cursor.fetchone() is not None
+                await conn.commit()
+        if added_aliases is not None:
+            self.name_index.add(game_id, game_name, added_aliases)
+        if registered:
+            self._notify_registration_change(user_id, game_id, True)
+        return registered
 
+    async def unregister_user_from_game(self, user_id, game_name):
         async with aiosqlite.connect(self.db_path) as conn:
-            cursor = await conn.execute("DELETE FROM user_game_registrations WHERE user_id = ? AND game_id = ?",
-                                        (user_id, game_id))
+            cursor = await conn.execute(f'''
+                DELETE FROM user_game_registrations
+                WHERE user_id = ? AND game_id = ({GAME_ID_FROM_NAME_OR_ALIAS})
+                RETURNING game_id
+            ''', (user_id, game_name, game_name))
+            result = await cursor.fetchone()
             await conn.commit()
-            return cursor.rowcount > 0
+        if result:
+            self._notify_registration_change(user_id, result[0], False)
+            return True
+        return False
 
     async def get_user_registered_games(self, user_id):
         async with aiosqlite.connect(self.db_path) as conn:
@@ -145,14 +288,22 @@ class Database:
         """Delete a game from the database"""
         async with aiosqlite.connect(self.db_path) as conn:
             try:
-                await conn.execute("DELETE FROM user_game_registrations WHERE game_id = ?", (game_id,))
+                cursor = await conn.execute("DELETE FROM user_game_registrations WHERE game_id = ? RETURNING user_id", (game_id,))
+                user_ids = [row[0] for row in await cursor.fetchall()]
                 await conn.execute("DELETE FROM games WHERE id = ?", (game_id,))
                 await conn.execute("DELETE FROM game_aliases WHERE game_id = ?", (game_id,)) # Also delete aliases
+                cursor = await conn.execute("DELETE FROM game_roles WHERE game_id = ? RETURNING role_id", (game_id,))
+                role = await cursor.fetchone()
+                await conn.execute("DELETE FROM user_game_preferences WHERE game_id = ?", (game_id,))
                 await conn.commit()
-                return True
-            except Exception as e:
-                print(f"Error deleting game: {e}")
+            except Exception:
+                log.exception("Error deleting game", extra={"game_id": game_id})
                 return False
+        self.name_index.remove(game_id)
+        for user_id in user_ids:
+            self._notify_registration_change(user_id, game_id, False)
+        self._notify_game_deleted(game_id, role[0] if role else None)
+        return True
 
     async def delete_game_by_name(self, name):
         """Delete a game from the database by its name or alias"""
@@ -163,25 +314,13 @@ class Database:
     # --- Add these new functions inside the Database class in database.py ---
 
     async def get_all_games_for_panel(self):
-        """Get all games with their IDs for the control panel dropdowns."""
+        """Get all games with their IDs, ordered by name."""
         async with aiosqlite.connect(self.db_path) as conn:
             conn.row_factory = aiosqlite.Row # Return dictionary-like rows
             cursor = await conn.execute("SELECT id, name FROM games ORDER BY name ASC")
             rows = await cursor.fetchall()
             return rows
 
-    # Synchronous version for fast UI loading
-    def get_all_games_for_panel_sync(self):
-        """Synchronous version of get_all_games_for_panel for UI setup."""
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name FROM games ORDER BY name ASC")
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
-
     async def get_game_name_by_id(self, game_id: int):
         """Fetches a game's name by its ID."""
         async with aiosqlite.connect(self.db_path) as conn:
@@ -189,6 +328,64 @@ class Database:
             result = await cursor.fetchone()
             return result[0] if result else None
 
+    async def get_game_image_url(self, game_id: int):
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute("SELECT image_url FROM games WHERE id = ?", (game_id,))
+            result = await cursor.fetchone()
+            return result[0] if result else None
+
+    async def import_games(self, games):
+        """Upserts a batch of (name, image_url, aliases) rows, diffed in bulk inside SQLite."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            # Take the write lock up front so no game can appear between the lookups and the inserts
+            await conn.execute("BEGIN IMMEDIATE")
+            await conn.execute("CREATE TEMP TABLE import_games (name TEXT PRIMARY KEY, image_url TEXT, game_id INTEGER)")
+            await conn.execute("CREATE TEMP TABLE import_aliases (name TEXT NOT NULL, alias TEXT PRIMARY KEY)")
+            # First occurrence wins for names and aliases repeated within the batch
+            await conn.executemany("INSERT OR IGNORE INTO import_games (name, image_url) VALUES (?, ?)",
+                                   [(name, image_url) for name, image_url, _ in games])
+            await conn.executemany("INSERT OR IGNORE INTO import_aliases (name, alias) VALUES (?, ?)",
+                                   [(name, alias) for name, _, aliases in games for alias in aliases if alias != name])
+
+            # Games we already know, by primary name first and then by alias
+            await conn.execute('''
+                UPDATE import_games SET game_id = COALESCE(
+                    (SELECT id FROM games WHERE name = import_games.name),
+                    (SELECT game_id FROM game_aliases WHERE alias = import_games.name))
+            ''')
+            cursor = await conn.execute('''
+                UPDATE games SET image_url = (SELECT image_url FROM import_games WHERE game_id = games.id AND image_url IS NOT NULL)
+                WHERE image_url IS NULL AND id IN (SELECT game_id FROM import_games WHERE image_url IS NOT NULL)
+                RETURNING id
+            ''')
+            updated = {game_id for (game_id,) in await cursor.fetchall()}
+
+            cursor = await conn.execute('''
+                INSERT INTO games (name, image_url)
+                SELECT name, image_url FROM import_games WHERE game_id IS NULL ORDER BY rowid
+                ON CONFLICT(name) DO NOTHING RETURNING id, name
+            ''')
+            added = {game_id: name for game_id, name in await cursor.fetchall()}
+            await conn.execute("UPDATE import_games SET game_id = (SELECT id FROM games WHERE name = import_games.name) WHERE game_id IS NULL")
+
+            # Aliases already taken, or shadowed by a game's primary name, are skipped
+            cursor = await conn.execute('''
+                INSERT INTO game_aliases (game_id, alias)
+                SELECT g.game_id, a.alias FROM import_aliases a JOIN import_games g ON g.name = a.name
+                WHERE g.game_id IS NOT NULL AND a.alias NOT IN (SELECT name FROM games) ORDER BY a.rowid
+                ON CONFLICT(alias) DO NOTHING RETURNING game_id, alias
+            ''')
+            new_aliases = {}
+            for game_id, alias in await cursor.fetchall():
+                new_aliases.setdefault(game_id, []).append(alias)
+            await conn.commit()
+
+        indexed = [(game_id, name, new_aliases.pop(game_id, [])) for game_id, name in added.items()]
+        indexed += [(game_id, self.name_index.name_for(game_id), aliases) for game_id, aliases in new_aliases.items()
+                    if self.name_index.name_for(game_id)]
+        self.name_index.add_many(indexed)
+        return len(added), len(updated | new_aliases.keys())
+
     async def get_registrations_for_game_id(self, game_id: int):
         """Gets a list of user_ids registered for a specific game ID."""
         async with aiosqlite.connect(self.db_path) as conn:
@@ -196,6 +393,289 @@ class Database:
             rows = await cursor.fetchall()
             return [row[0] for row in rows]
 
+    async def apply_registration_batch(self, adds, removes):
+        """Applies many (user_id, game_id) registrations and unregistrations in a single transaction."""
+        added, removed = [], []
+        async with aiosqlite.connect(self.db_path) as conn:
+            for user_id, game_id in adds:
+                # Skip games that were deleted while the change was queued
+                cursor = await conn.execute('''
+                    INSERT OR IGNORE INTO user_game_registrations (user_id, game_id)
+                    SELECT ?, ? WHERE EXISTS (SELECT 1 FROM games WHERE id = ?)
+                ''', (user_id, game_id, game_id))
+                if cursor.rowcount > 0:
+                    added.append((user_id, game_id))
+            for user_id, game_id in removes:
+                cursor = await conn.execute("DELETE FROM user_game_registrations WHERE user_id = ? AND game_id = ?",
+                                            (user_id, game_id))
+                if cursor.rowcount > 0:
+                    removed.append((user_id, game_id))
+            await conn.commit()
+
+        for user_id, game_id in added:
+            self._notify_registration_change(user_id, game_id, True)
+        for user_id, game_id in removed:
+            self._notify_registration_change(user_id, game_id, False)
+        return len(added), len(removed)
+
+    # --- Keyset-paginated listings (each page only reads its own rows) ---
+    async def get_registrations_page(self, game_id: int, after=None, before=None, limit: int = 20):
+        """Gets up to `limit` user_ids for a game in ascending order, starting after or ending before a cursor."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            if before is not None:
+                cursor = await conn.execute('''
+                    SELECT user_id FROM user_game_registrations
+                    WHERE game_id = ? AND user_id < ? ORDER BY user_id DESC LIMIT ?
+                ''', (game_id, before, limit))
+                rows = await cursor.fetchall()
+                return [row[0] for row in reversed(rows)]
+
+            cursor = await conn.execute('''
+                SELECT user_id FROM user_game_registrations
+                WHERE game_id = ? AND user_id > ? ORDER BY user_id ASC LIMIT ?
+            ''', (game_id, after if after is not None else -1, limit))
+            rows = await cursor.fetchall()
+            return [row[0] for row in rows]
+
+    async def get_user_registered_games_page(self, user_id: int, after=None, before=None, limit: int = 20):
+        """Gets up to `limit` game names a user is registered for, ordered by name, around a cursor."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            if before is not None:
+                cursor = await conn.execute('''
+                    SELECT g.name FROM games g
+                    JOIN user_game_registrations ugr ON g.id = ugr.game_id
+                    WHERE ugr.user_id = ? AND g.name < ? ORDER BY g.name DESC LIMIT ?
+                ''', (user_id, before, limit))
+                rows = await cursor.fetchall()
+                return [row[0] for row in reversed(rows)]
+
+            cursor = await conn.execute('''
+                SELECT g.name FROM games g
+                JOIN user_game_registrations ugr ON g.id = ugr.game_id
+                WHERE ugr.user_id = ? AND g.name > ? ORDER BY g.name ASC LIMIT ?
+            ''', (user_id, after if after is not None else "", limit))
+            rows = await cursor.fetchall()
+            return [row[0] for row in rows]
+
+    async def count_registrations_for_game_id(self, game_id: int):
+        """Counts a game's subscribers using the (game_id, user_id) index."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM user_game_registrations WHERE game_id = ?", (game_id,))
+            result = await cursor.fetchone()
+            return result[0]
+
+    async def get_all_registrations(self):
+        """Gets every registration in one query, grouped as {game_id: set(user_ids)}."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute("SELECT game_id, user_id FROM user_game_registrations")
+            rows = await cursor.fetchall()
+        registrations = {}
+        for game_id, user_id in rows:
+            registrations.setdefault(game_id, set()).add(user_id)
+        return registrations
+
+    async def delete_user_registrations(self, user_id: int):
+        """Drops every registration of one user, e.g. when they leave the server."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute(
+                "DELETE FROM user_game_registrations WHERE user_id = ? RETURNING game_id", (user_id,))
+            rows = await cursor.fetchall()
+            await conn.commit()
+        for (game_id,) in rows:
+            self._notify_registration_change(user_id, game_id, False)
+        return len(rows)
+
+    async def prune_registrations(self, keep_user_ids):
+        """Drops registrations of every user not in `keep_user_ids`, diffed in bulk inside SQLite."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            # TEMP tables live only as long as this connection
+            await conn.execute("CREATE TEMP TABLE roster (user_id INTEGER PRIMARY KEY)")
+            await conn.executemany("INSERT OR IGNORE INTO roster (user_id) VALUES (?)", [(u,) for u in keep_user_ids])
+            cursor = await conn.execute('''
+                DELETE FROM user_game_registrations
+                WHERE user_id NOT IN (SELECT user_id FROM roster)
+                RETURNING user_id, game_id
+            ''')
+            rows = await cursor.fetchall()
+            await conn.commit()
+        for user_id, game_id in rows:
+            self._notify_registration_change(user_id, game_id, False)
+        return len(rows)
+
+    # --- Delivery Preference Functions ---
+    async def get_all_delivery_preferences(self):
+        """Loads every delivery preference at once, for compiling into sets in memory."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute("SELECT user_id, delivery, quiet_start, quiet_end FROM user_preferences")
+            users = {user_id: (delivery, start, end) for user_id, delivery, start, end in await cursor.fetchall()}
+            cursor = await conn.execute("SELECT user_id, game_id, muted, cooldown_minutes FROM user_game_preferences")
+            games = {(user_id, game_id): (bool(muted), cooldown) for user_id, game_id, muted, cooldown in await cursor.fetchall()}
+        return users, games
+
+    async def set_user_delivery_preferences(self, user_id: int, delivery: str, quiet_start=None, quiet_end=None):
+        """Stores how (channel or dm) and when (quiet hours, UTC) a user is notified."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.execute('''
+                INSERT INTO user_preferences (user_id, delivery, quiet_start, quiet_end) VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    delivery = excluded.delivery, quiet_start = excluded.quiet_start, quiet_end = excluded.quiet_end
+            ''', (user_id, delivery, quiet_start, quiet_end))
+            await conn.commit()
+
+    async def set_game_delivery_preference(self, user_id: int, game_id: int, muted: bool, cooldown_minutes: int):
+        """Stores a per-game mute or cooldown; clearing both removes the row."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            if not muted and not cooldown_minutes:
+                await conn.execute("DELETE FROM user_game_preferences WHERE user_id = ? AND game_id = ?", (user_id, game_id))
+            else:
+                await conn.execute('''
+                    INSERT INTO user_game_preferences (user_id, game_id, muted, cooldown_minutes) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id, game_id) DO UPDATE SET
+                        muted = excluded.muted, cooldown_minutes = excluded.cooldown_minutes
+                ''', (user_id, game_id, int(muted), cooldown_minutes))
+            await conn.commit()
+
+    # --- Maintenance ---
+    async def compact(self, pages_per_step: int = 200, pause: float = 0.1):
+        """Frees pages with incremental VACUUM in small steps, then runs a bounded ANALYZE.
+
+        Each step is a short write transaction, so other connections get their turn
+        between steps instead of waiting on one long VACUUM. A database created before
+        incremental mode only gets the ANALYZE: switching it over takes a full VACUUM,
+        which would block every writer, so that is left to `python -m backup vacuum`
+        with the bot stopped.
+        """
+        freed = 0
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute("PRAGMA auto_vacuum")
+            incremental = (await cursor.fetchone())[0] == 2
+            if not incremental:
+                log.warning("Database isn't in incremental auto-vacuum mode, so no space is freed; "
+                            "stop the bot and run `python -m backup vacuum` once to convert it", extra={"path": self.db_path})
+
+            while incremental:
+                cursor = await conn.execute("PRAGMA freelist_count")
+                free_pages = (await cursor.fetchone())[0]
+                if not free_pages:
+                    break
+                # executescript steps the pragma to completion; execute() would free a single page
+                await conn.executescript(f"PRAGMA incremental_vacuum({int(pages_per_step)})")
+                freed += min(free_pages, pages_per_step)
+                await asyncio.sleep(pause)
+
+            # Sample at most ~1000 rows per index so ANALYZE stays fast on large tables
+            await conn.executescript("PRAGMA analysis_limit = 1000; ANALYZE;")
+        return freed
+
+    # --- Play Session Analytics ---
+    async def apply_play_session_batch(self, sessions, hourly, daily, players):
+        """Appends finished sessions and folds their precomputed deltas into the rollups, in one transaction.
+
+        sessions: [(user_id, game_name, started_at, ended_at)]
+        hourly/daily: {(game_name, bucket): [sessions, play_seconds, peak_players]}
+        players: {(game_name, day, user_id)}
+        """
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.executemany(
+                "INSERT INTO play_sessions (user_id, game_name, started_at, ended_at) VALUES (?, ?, ?, ?)",
+                sessions)
+            for table, column, deltas in (("game_stats_hourly", "hour", hourly), ("game_stats_daily", "day", daily)):
+                await conn.executemany(f'''
+                    INSERT INTO {table} (game_name, {column}, sessions, play_seconds, peak_players) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(game_name, {column}) DO UPDATE SET
+                        sessions = sessions + excluded.sessions,
+                        play_seconds = play_seconds + excluded.play_seconds,
+                        peak_players = MAX(peak_players, excluded.peak_players)
+                ''', [(game, bucket, *values) for (game, bucket), values in deltas.items()])
+            await conn.executemany(
+                "INSERT OR IGNORE INTO game_daily_players (game_name, day, user_id) VALUES (?, ?, ?)",
+                list(players))
+            await conn.commit()
+
+    async def get_game_play_stats(self, game_name: str, since_day: int):
+        """Totals for one game from the daily rollup: (sessions, play_seconds, peak_players, unique_players)."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute('''
+                SELECT COALESCE(SUM(sessions), 0), COALESCE(SUM(play_seconds), 0), COALESCE(MAX(peak_players), 0)
+                FROM game_stats_daily WHERE game_name = ? AND day >= ?
+            ''', (game_name, since_day))
+            sessions, play_seconds, peak = await cursor.fetchone()
+            cursor = await conn.execute('''
+                SELECT COUNT(DISTINCT user_id) FROM game_daily_players WHERE game_name = ? AND day >= ?
+            ''', (game_name, since_day))
+            unique_players = (await cursor.fetchone())[0]
+            return sessions, play_seconds, peak, unique_players
+
+    async def get_top_played_games(self, since_day: int, limit: int = 10):
+        """Most played games since a day from the daily rollup: [(game_name, play_seconds, sessions, peak_players)]."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute('''
+                SELECT game_name, SUM(play_seconds) AS total, SUM(sessions), MAX(peak_players)
+                FROM game_stats_daily WHERE day >= ?
+                GROUP BY game_name ORDER BY total DESC LIMIT ?
+            ''', (since_day, limit))
+            return await cursor.fetchall()
+
+    # --- Managed Role Functions for Role Fan-out Mode ---
+    async def get_game_role(self, game_id: int):
+        """Gets the managed role ID for a game, if one has been created."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute("SELECT role_id FROM game_roles WHERE game_id = ?", (game_id,))
+            result = await cursor.fetchone()
+            return result[0] if result else None
+
+    async def get_all_game_roles(self):
+        """Gets all managed roles as {game_id: role_id}."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute("SELECT game_id, role_id FROM game_roles")
+            rows = await cursor.fetchall()
+            return {game_id: role_id for game_id, role_id in rows}
+
+    async def set_game_role(self, game_id: int, role_id: int):
+        """Stores the managed role ID for a game."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.execute('''
+                INSERT INTO game_roles (game_id, role_id) VALUES (?, ?)
+                ON CONFLICT(game_id) DO UPDATE SET role_id = excluded.role_id
+            ''', (game_id, role_id))
+            await conn.commit()
+
+    async def delete_game_role(self, game_id: int):
+        """Forgets the managed role for a game."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.execute("DELETE FROM game_roles WHERE game_id = ?", (game_id,))
+            await conn.commit()
+
+    # --- Event Functions ---
+    async def create_event(self, title: str, description: str, creator_id: int, event_time=None):
+        """Creates an event and returns its ID."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute(
+                "INSERT INTO events (title, description, event_time, creator_id) VALUES (?, ?, ?, ?)",
+                (title, description, event_time, creator_id))
+            await conn.commit()
+            return cursor.lastrowid
+
+    async def get_upcoming_events(self):
+        """Gets events with no time set or a time still ahead, oldest first."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute('''
+                SELECT id, title, description, event_time, creator_id FROM events
+                WHERE event_time IS NULL OR event_time >= ? ORDER BY id ASC
+            ''', (datetime.now().isoformat(sep=" "),))
+            return await cursor.fetchall()
+
+    async def update_event_rsvp(self, event_id: int, user_id: int, status: str):
+        """Sets a user's RSVP status for an event. Returns False if the event doesn't exist."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute('''
+                INSERT INTO event_rsvps (event_id, user_id, status)
+                SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM events WHERE id = ?)
+                ON CONFLICT(event_id, user_id) DO UPDATE SET status = excluded.status
+            ''', (event_id, user_id, status, event_id))
+            await conn.commit()
+            return cursor.rowcount > 0
+
     # --- Config Table Functions for Settings like Alert Channel ---
     async def init_config_table(self):
         """Creates a config table for storing key-value settings."""
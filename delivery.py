@@ -0,0 +1,219 @@
+import asyncio
+import time
+from collections import OrderedDict
+import nextcord
+from config import Config
+from storage import Storage
+from logs import get_logger
+
+log = get_logger(__name__)
+
+DELIVERY_MODES = ("channel", "dm")
+
+def quiet_hours(start, end):
+    """UTC hours from `start` up to (not including) `end`, wrapping past midnight."""
+    if start is None or end is None:
+        return range(0)
+    return [(start + offset) % 24 for offset in range((end - start) % 24)]
+
+class DeliveryPreferences:
+    """Per-user delivery settings, compiled into sets so routing a notification is a few set operations.
+
+    The database stays the source of truth; every change goes through here so the
+    sets are updated for just the user that changed instead of being rebuilt.
+    """
+    def __init__(self, db: Storage):
+        self.db = db
+        self._clear()
+
+    def _clear(self):
+        self.users = {}     # user_id -> (delivery, quiet_start, quiet_end)
+        self.games = {}     # user_id -> {game_id: (muted, cooldown_minutes)}
+        self.dm_users = set()
+        self.quiet = [set() for _ in range(24)]  # UTC hour -> users in quiet hours then
+        self.muted = {}     # game_id -> set(user_ids)
+        self.cooldowns = {} # game_id -> {user_id: cooldown seconds}
+        self.cooling = {}   # game_id -> {user_id: time their cooldown ends}
+
+    async def load(self):
+        users, games = await self.db.get_all_delivery_preferences()
+        self._clear()
+        for user_id, settings in users.items():
+            self._apply_user(user_id, *settings)
+        for (user_id, game_id), settings in games.items():
+            self._apply_game(user_id, game_id, *settings)
+
+    def get_user(self, user_id: int):
+        return self.users.get(user_id, ("channel", None, None))
+
+    def get_game(self, user_id: int, game_id: int):
+        return self.games.get(user_id, {}).get(game_id, (False, 0))
+
+    def get_games(self, user_id: int):
+        """A user's per-game overrides as {game_id: (muted, cooldown_minutes)}."""
+        return self.games.get(user_id, {})
+
+    def _apply_user(self, user_id, delivery, quiet_start, quiet_end):
+        _, old_start, old_end = self.get_user(user_id)
+        for hour in quiet_hours(old_start, old_end):
+            self.quiet[hour].discard(user_id)
+        self.users[user_id] = (delivery, quiet_start, quiet_end)
+        if delivery == "dm":
+            self.dm_users.add(user_id)
+        else:
+            self.dm_users.discard(user_id)
+        for hour in quiet_hours(quiet_start, quiet_end):
+            self.quiet[hour].add(user_id)
+
+    def _apply_game(self, user_id, game_id, muted, cooldown_minutes):
+        if muted:
+            self.muted.setdefault(game_id, set()).add(user_id)
+        else:
+            self.muted.get(game_id, set()).discard(user_id)
+        if cooldown_minutes:
+            self.cooldowns.setdefault(game_id, {})[user_id] = cooldown_minutes * 60
+        else:
+            self.cooldowns.get(game_id, {}).pop(user_id, None)
+            self.cooling.get(game_id, {}).pop(user_id, None)
+        if muted or cooldown_minutes:
+            self.games.setdefault(user_id, {})[game_id] = (bool(muted), cooldown_minutes)
+        elif game_id in self.games.get(user_id, {}):
+            del self.games[user_id][game_id]
+            if not self.games[user_id]:
+                del self.games[user_id]
+
+    async def set_delivery(self, user_id: int, delivery: str):
+        if delivery not in DELIVERY_MODES:
+            raise ValueError(f"Unknown delivery mode: {delivery}")
+        _, start, end = self.get_user(user_id)
+        await self.db.set_user_delivery_preferences(user_id, delivery, start, end)
+        self._apply_user(user_id, delivery, start, end)
+
+    async def set_quiet_hours(self, user_id: int, start=None, end=None):
+        """Sets quiet hours in UTC; None clears them."""
+        delivery, _, _ = self.get_user(user_id)
+        await self.db.set_user_delivery_preferences(user_id, delivery, start, end)
+        self._apply_user(user_id, delivery, start, end)
+
+    async def set_muted(self, user_id: int, game_id: int, muted: bool):
+        _, cooldown = self.get_game(user_id, game_id)
+        await self.db.set_game_delivery_preference(user_id, game_id, muted, cooldown)
+        self._apply_game(user_id, game_id, muted, cooldown)
+
+    async def set_cooldown(self, user_id: int, game_id: int, minutes: int):
+        muted, _ = self.get_game(user_id, game_id)
+        await self.db.set_game_delivery_preference(user_id, game_id, muted, minutes)
+        self._apply_game(user_id, game_id, muted, minutes)
+
+    def route(self, game_id: int, subscribers, now: float = None):
+        """Splits a game's subscribers into (channel mentions, DMs).
+
+        Muted users, users in quiet hours and users still cooling down for this game
+        are dropped; everyone delivered to with a cooldown set starts a new one.
+        """
+        now = time.time() if now is None else now
+        eligible = set(subscribers) - self.muted.get(game_id, set()) - self.quiet[int(now // 3600) % 24]
+
+        cooling = self.cooling.get(game_id)
+        if cooling:
+            for user_id in [user_id for user_id, until in cooling.items() if until <= now]:
+                del cooling[user_id]
+            eligible -= cooling.keys()
+        cooldowns = self.cooldowns.get(game_id)
+        if cooldowns:
+            cooling = self.cooling.setdefault(game_id, {})
+            for user_id in eligible & cooldowns.keys():
+                cooling[user_id] = now + cooldowns[user_id]
+
+        direct = eligible & self.dm_users
+        return eligible - direct, direct
+
+class RateLimiter:
+    """Token bucket: `rate` acquisitions per second, with bursts of up to `burst`."""
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class DMWorkerPool:
+    """A few workers sending DMs from a bounded queue, paced by one shared rate limit.
+
+    When the queue is full new DMs are dropped and counted rather than piling up
+    behind a slow or rate-limited API.
+    """
+    def __init__(self, client, workers: int = Config.DM_WORKERS, rate: float = Config.DM_RATE, max_queue: int = Config.DM_QUEUE_SIZE,
+                 max_channels: int = Config.DM_CHANNEL_CACHE_SIZE):
+        self.client = client
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.limiter = RateLimiter(rate, burst=workers)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_channels = max_channels
+        self._channels = OrderedDict()  # user_id -> DM channel, least recently used first
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, user_ids, content=None, embed=None):
+        """Queues one DM per user. Returns how many were queued."""
+        queued = 0
+        for user_id in user_ids:
+            try:
+                self.queue.put_nowait((user_id, content, embed))
+                queued += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+        return queued
+
+    async def _send(self, user_id, content, embed):
+        channel = self._channels.get(user_id)
+        if channel:
+            self._channels.move_to_end(user_id)
+        else:
+            user = self.client.get_user(user_id) or await self.client.fetch_user(user_id)
+            channel = self._channels[user_id] = await user.create_dm()
+            if len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        await channel.send(content=content, embed=embed)
+
+    async def _worker(self):
+        while True:
+            user_id, content, embed = await self.queue.get()
+            try:
+                await self.limiter.acquire()
+                await self._send(user_id, content, embed)
+                self.sent += 1
+                log.info("Sent DM", extra={"event": "dm.sent", "user_id": user_id, "queued": self.queue.qsize()})
+            except nextcord.Forbidden:
+                self.failed += 1  # DMs closed or no shared server
+            except Exception:
+                self.failed += 1
+                log.exception("Error sending DM", extra={"user_id": user_id})
+            finally:
+                self.queue.task_done()
+
+    async def drain(self, timeout: float = 10.0):
+        """Gives queued DMs a moment to go out, then stops the workers."""
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                log.warning("DMs still queued at shutdown were dropped", extra={"dropped": self.queue.qsize()})
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
@@ -0,0 +1,139 @@
+import bisect
+
+def normalize_name(name: str) -> str:
+    """Case- and whitespace-insensitive form of a game name used for lookups."""
+    return " ".join(name.casefold().split())
+
+class GameNameIndex:
+    """Sorted in-memory index over game names and aliases for prefix autocomplete.
+
+    Every name and alias is stored under its normalized form and under each of its
+    word suffixes ("call of duty" is also found by "duty"), so a lookup is a binary
+    search plus a scan of the neighbouring keys. Each rank has its own sorted list, so
+    a search can take every match on a primary name before looking at any alias.
+    """
+    # Rank of a key: matches on the start of a primary name sort first
+    NAME, ALIAS, WORD = 0, 1, 2
+
+    def __init__(self):
+        self._keys = ([], [], [])  # per rank, a sorted list of (key, rank, game_id)
+        self._keys_by_game = {}    # game_id -> list of keys it owns
+        self.names = {}            # game_id -> primary name
+
+    def __len__(self):
+        return len(self.names)
+
+    def _entries_for(self, game_id, name, aliases):
+        entries = set()
+        for text, rank in [(name, self.NAME)] + [(alias, self.ALIAS) for alias in aliases]:
+            words = normalize_name(text).split(" ")
+            entries.add((" ".join(words), rank, game_id))
+            for i in range(1, len(words)):
+                entries.add((" ".join(words[i:]), self.WORD, game_id))
+        return entries
+
+    def rebuild(self, games, aliases):
+        """Rebuilds the whole index from (game_id, name) and (game_id, alias) rows."""
+        aliases_by_game = {}
+        for game_id, alias in aliases:
+            aliases_by_game.setdefault(game_id, []).append(alias)
+
+        keys = ([], [], [])
+        self._keys_by_game = {}
+        self.names = {}
+        for game_id, name in games:
+            entries = self._entries_for(game_id, name, aliases_by_game.get(game_id, []))
+            for entry in entries:
+                keys[entry[1]].append(entry)
+            self._keys_by_game[game_id] = list(entries)
+            self.names[game_id] = name
+        for rank_keys in keys:
+            rank_keys.sort()
+        self._keys = keys
+
+    def add(self, game_id, name, aliases=()):
+        """Adds (or extends) a game's entries without rebuilding the index."""
+        self.names[game_id] = name
+        owned = self._keys_by_game.setdefault(game_id, [])
+        for entry in self._entries_for(game_id, name, aliases):
+            keys = self._keys[entry[1]]
+            i = bisect.bisect_left(keys, entry)
+            if i == len(keys) or keys[i] != entry:
+                keys.insert(i, entry)
+                owned.append(entry)
+
+    def add_many(self, games):
+        """Adds (game_id, name, aliases) rows with one merge, for bulk imports where
+        inserting keys one at a time would shift the whole list for every key."""
+        new = set()
+        for game_id, name, aliases in games:
+            self.names[game_id] = name
+            owned = self._keys_by_game.setdefault(game_id, [])
+            for entry in self._entries_for(game_id, name, aliases):
+                keys = self._keys[entry[1]]
+                i = bisect.bisect_left(keys, entry)
+                if entry not in new and (i == len(keys) or keys[i] != entry):
+                    new.add(entry)
+                    owned.append(entry)
+        for rank, keys in enumerate(self._keys):
+            # Splice the new keys in between slices of the old list: one linear copy, no re-sort
+            merged, previous = [], 0
+            for entry in sorted(entry for entry in new if entry[1] == rank):
+                i = bisect.bisect_left(keys, entry, previous)
+                merged.extend(keys[previous:i])
+                merged.append(entry)
+                previous = i
+            if merged:
+                merged.extend(keys[previous:])
+                keys[:] = merged
+
+    def remove(self, game_id):
+        """Drops every entry belonging to a game."""
+        self.names.pop(game_id, None)
+        for entry in self._keys_by_game.pop(game_id, []):
+            keys = self._keys[entry[1]]
+            i = bisect.bisect_left(keys, entry)
+            if i < len(keys) and keys[i] == entry:
+                del keys[i]
+
+    def name_for(self, game_id):
+        return self.names.get(game_id)
+
+    def lookup(self, text: str):
+        """Game ID whose primary name or an alias equals `text`, ignoring case and spacing; primary names win."""
+        key = normalize_name(text)
+        for keys in self._keys[:self.WORD]:
+            i = bisect.bisect_left(keys, (key,))
+            if i < len(keys) and keys[i][0] == key:
+                return keys[i][2]
+        return None
+
+    def canonical_name(self, text: str) -> str:
+        """The primary name of the game `text` names, or `text` itself for a game not in the catalogue."""
+        game_id = self.lookup(text)
+        return self.names[game_id] if game_id is not None else text
+
+    def search(self, prefix: str, limit: int = 25):
+        """Returns up to `limit` primary game names matching a typed prefix, best matches first.
+
+        Matches on a primary name come first, then aliases, then later words of either,
+        each group in alphabetical order of the matched key.
+        """
+        return [self.names[game_id] for game_id in self.search_ids(prefix, limit)]
+
+    def search_ids(self, prefix: str, limit: int = 25):
+        """Like search, but returns game IDs."""
+        prefix = normalize_name(prefix)
+        matches = []
+        seen = set()
+        for keys in self._keys:
+            i = bisect.bisect_left(keys, (prefix,))
+            while i < len(keys) and len(matches) < limit:
+                key, rank, game_id = keys[i]
+                if not key.startswith(prefix):
+                    break
+                if game_id not in seen:
+                    seen.add(game_id)
+                    matches.append(game_id)
+                i += 1
+        return matches
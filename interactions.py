@@ -0,0 +1,214 @@
+import asyncio
+import bisect
+from collections import deque
+import nextcord
+from nextcord.utils import utcnow
+from config import Config
+from logs import get_logger
+
+log = get_logger(__name__)
+
+# Discord fails an interaction that isn't acknowledged within 3 seconds of being created
+ACK_DEADLINE = 3.0
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 3000, 5000, 10000, 30000)
+
+class LatencyHistogram:
+    """Counts latencies into fixed buckets; percentiles are read back as bucket upper bounds."""
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot: slower than the largest bucket
+        self.total = 0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.total += 1
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction: float):
+        if not self.total:
+            return 0.0
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= fraction * self.total:
+                return min(float(bound), self.max_ms)
+        return self.max_ms
+
+    def over(self, seconds: float):
+        """How many recorded latencies were above `seconds` (rounded to the bucket bound)."""
+        return sum(self.counts[bisect.bisect_right(self.buckets, seconds * 1000):])
+
+    def report(self, name: str) -> str:
+        lines = [f"{name}: {self.total} recorded, p50 ≤ {self.percentile(0.5):.0f} ms, p90 ≤ {self.percentile(0.9):.0f} ms, "
+                 f"p99 ≤ {self.percentile(0.99):.0f} ms, max {self.max_ms:.0f} ms"]
+        for label, count in zip([f"≤{b} ms" for b in self.buckets] + [f">{self.buckets[-1]} ms"], self.counts):
+            if count:
+                lines.append(f"  {label:>10} {count:>7} {'#' * max(1, round(40 * count / self.total))}")
+        return "\n".join(lines)
+
+class InteractionDispatcher:
+    """Acknowledges component interactions at once and runs their work on a small worker pool.
+
+    Every interaction is deferred before anything else happens, so the 3 second
+    deadline only covers the defer call. The handler then waits its turn: users take
+    turns round-robin and each user has at most one handler running, so one person
+    spamming a dropdown can't starve everyone else. The handler's result is sent as
+    a followup.
+    """
+    def __init__(self, workers: int = Config.INTERACTION_WORKERS, max_pending: int = Config.INTERACTION_QUEUE_SIZE,
+                 max_per_user: int = Config.INTERACTION_USER_QUEUE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_per_user = max_per_user
+        self.ack_latency = LatencyHistogram()       # interaction created -> deferred
+        self.complete_latency = LatencyHistogram()  # interaction created -> followup sent
+        self.expired = 0   # already past the deadline when we got to defer it
+        self.rejected = 0  # turned away because the user's or the global queue was full
+        self.failed = 0    # handler raised
+        self._pending = {}     # user_id -> deque of jobs
+        self._ready = deque()  # users with pending jobs and nothing running, in turn order
+        self._running = {}     # user_id -> interaction whose handler is running right now
+        self._queued = 0
+        self._wakeup = asyncio.Condition()
+        self._idle = asyncio.Event()  # set while nothing is queued or running
+        self._idle.set()
+        self._stopping = False
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = Config.INTERACTION_DRAIN_TIMEOUT):
+        """Turns new clicks away, gives queued and running handlers `timeout` seconds to finish, then
+        stops the workers. Whoever is still waiting gets a followup instead of "thinking…" forever."""
+        self._stopping = True
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        unfinished = list(self._running.values())  # Taken first: cancelled workers clear their entries
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        unfinished += [job[0] for jobs in self._pending.values() for job in jobs]
+        self._running, self._pending, self._ready, self._queued = {}, {}, deque(), 0
+        if unfinished:
+            log.warning("Interactions still pending at shutdown were cancelled", extra={"cancelled": len(unfinished)})
+        for interaction in unfinished:
+            try:
+                await interaction.followup.send("❌ The bot restarted before that finished, please try again in a moment.", ephemeral=True)
+            except nextcord.HTTPException:
+                pass
+
+    @staticmethod
+    def _age(interaction: nextcord.Interaction) -> float:
+        return (utcnow() - interaction.created_at).total_seconds()
+
+    async def dispatch(self, interaction: nextcord.Interaction, handler, after=None):
+        """Defers `interaction`, then queues `handler(interaction)` for a worker.
+
+        The handler returns a string or a dict of `followup.send` arguments (None sends
+        nothing). `after`, if given, runs once the followup is out, e.g. to refresh panels.
+        """
+        if not interaction.response.is_done():
+            try:
+                await interaction.response.defer(ephemeral=True, with_message=True)
+            except nextcord.NotFound:
+                self.expired += 1  # Too late, Discord already told the user it failed
+                return
+            self.ack_latency.record(self._age(interaction))
+
+        if self._stopping:
+            self.rejected += 1
+            return await interaction.followup.send("🔄 The bot is restarting, please try again in a moment.", ephemeral=True)
+
+        user_id = interaction.user.id
+        jobs = self._pending.setdefault(user_id, deque())
+        if self._queued >= self.max_pending or len(jobs) >= self.max_per_user:
+            self.rejected += 1
+            if not jobs:
+                del self._pending[user_id]
+            return await interaction.followup.send("⏳ Too many actions in flight right now, please try again in a moment.", ephemeral=True)
+
+        jobs.append((interaction, handler, after))
+        self._queued += 1
+        self._idle.clear()
+        if len(jobs) == 1 and user_id not in self._running:
+            self._ready.append(user_id)
+            async with self._wakeup:
+                self._wakeup.notify()
+
+    async def _next_job(self):
+        async with self._wakeup:
+            await self._wakeup.wait_for(lambda: self._ready)
+            user_id = self._ready.popleft()
+        jobs = self._pending[user_id]
+        job = jobs.popleft()
+        self._queued -= 1
+        self._running[user_id] = job[0]
+        return user_id, job
+
+    def _finished(self, user_id):
+        self._running.pop(user_id, None)
+        if self._pending.get(user_id):
+            self._ready.append(user_id)  # Back of the line for this user's next job
+            return True
+        self._pending.pop(user_id, None)
+        if not self._queued and not self._running:
+            self._idle.set()
+        return False
+
+    async def _run(self, interaction, handler, after):
+        fields = {"guild": interaction.guild_id, "user_id": interaction.user.id,
+                  "custom_id": (interaction.data or {}).get("custom_id")}
+        try:
+            result = await handler(interaction)
+        except Exception:
+            self.failed += 1
+            log.exception("Error handling interaction", extra=fields)
+            result = "❌ Something went wrong handling that, please try again."
+        if result is not None:
+            kwargs = {"content": result} if isinstance(result, str) else result
+            await interaction.followup.send(ephemeral=True, **kwargs)
+        elapsed = self._age(interaction)
+        self.complete_latency.record(elapsed)
+        log.info("Interaction handled", extra={"event": "interaction.done", **fields, "elapsed_ms": round(elapsed * 1000, 1)})
+        if after:
+            await after()
+
+    async def _worker(self):
+        while True:
+            user_id, (interaction, handler, after) = await self._next_job()
+            try:
+                await self._run(interaction, handler, after)
+            except Exception:
+                log.exception("Error sending interaction followup")
+            finally:
+                if self._finished(user_id):
+                    async with self._wakeup:
+                        self._wakeup.notify()
+
+    def reset(self):
+        self.ack_latency.reset()
+        self.complete_latency.reset()
+        self.expired = self.rejected = self.failed = 0
+
+    def report(self) -> str:
+        lines = [
+            f"Deadline {ACK_DEADLINE:.0f}s · {len(self._tasks)} workers · {self._queued} queued · "
+            f"{self.ack_latency.over(ACK_DEADLINE)} acked late · {self.expired} expired · {self.rejected} rejected · {self.failed} failed",
+            "",
+            self.ack_latency.report("Acknowledge"),
+            "",
+            self.complete_latency.report("Complete"),
+        ]
+        return "\n".join(lines)
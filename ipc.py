@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+from config import Config
+from logs import get_logger
+
+log = get_logger(__name__)
+
+class IPCPublisher:
+    """Sends JSON messages to another local process over a Unix socket.
+
+    Messages are queued and written by a background task that reconnects on
+    failure, so publishing never blocks the caller. When the queue is full the
+    oldest message is dropped.
+    """
+    def __init__(self, path: str, max_queue: int = 10000):
+        self.path = path
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._task = None
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._writer())
+
+    def publish(self, message: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def _writer(self):
+        writer = None
+        message = None
+        while True:
+            try:
+                if writer is None:
+                    _, writer = await asyncio.open_unix_connection(self.path)
+                if message is None:
+                    message = await self.queue.get()
+                writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+                message = None
+            except asyncio.CancelledError:
+                raise
+            except OSError as e:
+                # Keep the unsent message and retry once the other side is back
+                log.warning("IPC connection failed, retrying", extra={"path": self.path, "error": str(e)})
+                if writer:
+                    writer.close()
+                writer = None
+                await asyncio.sleep(1)
+
+    async def close(self):
+        """Waits briefly for queued messages to go out, then stops."""
+        for _ in range(50):
+            if self.queue.empty():
+                break
+            await asyncio.sleep(0.1)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+class IPCServer:
+    """Receives JSON messages from IPCPublisher and hands each one to `handler`.
+
+    Up to `concurrency` messages are handled at once, so one slow send doesn't hold up
+    everything queued behind it; once every slot is busy, reading pauses until one frees.
+    """
+    def __init__(self, path: str, handler, concurrency: int = Config.IPC_CONCURRENCY):
+        self.path = path
+        self.handler = handler
+        self.slots = asyncio.Semaphore(concurrency)
+        self.server = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)  # Stale socket from a previous run
+        self.server = await asyncio.start_unix_server(self._client, path=self.path)
+
+    async def _client(self, reader, writer):
+        running = set()
+        try:
+            while line := await reader.readline():
+                await self.slots.acquire()
+                task = asyncio.create_task(self._handle(line))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            writer.close()
+            # Messages already read still get sent when the connection drops
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+    async def _handle(self, line):
+        try:
+            await self.handler(json.loads(line))
+        except Exception:
+            log.exception("Error handling IPC message")
+        finally:
+            self.slots.release()
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
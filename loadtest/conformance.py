@@ -0,0 +1,297 @@
+"""Runs the same storage scenarios against every backend and reports any difference.
+
+    python -m loadtest.conformance            # all backends
+    python -m loadtest.conformance memory     # just one
+
+Each check gets a fresh, initialized backend and asserts on the values the cogs rely
+on, so a backend passing here can be swapped in for database.Database.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import traceback
+from datetime import datetime, timedelta
+from storage import Storage
+
+def make_sqlite(tmp):
+    from database import Database
+    return Database(os.path.join(tmp, f"conformance-{len(os.listdir(tmp))}.db"))
+
+def make_memory(tmp):
+    from memory_storage import MemoryDatabase
+    return MemoryDatabase()
+
+BACKENDS = {"sqlite": make_sqlite, "memory": make_memory}
+CHECKS = []
+
+def check(func):
+    CHECKS.append(func)
+    return func
+
+# --- Games and aliases ---
+@check
+async def games_and_aliases(db: Storage):
+    game_id = await db.add_game("Counter-Strike 2", aliases="cs2, cs ,,counter strike")
+    assert game_id
+    assert await db.add_game("Counter-Strike 2") is None, "duplicate name"
+    assert await db.add_game("cs2") is None, "name taken by an alias"
+    assert await db.get_game_id_from_name_or_alias("cs") == game_id
+    assert await db.get_game_id_from_name_or_alias("counter strike") == game_id
+    assert await db.get_game_id_from_name_or_alias("CS2") is None, "lookups are case sensitive"
+
+    other = await db.add_game("Apex Legends", aliases="apex, cs2")
+    assert await db.get_game_id_from_name_or_alias("cs2") == game_id, "alias already owned"
+    assert await db.get_all_games() == [("Apex Legends",), ("Counter-Strike 2",)]
+    panel = await db.get_all_games_for_panel()
+    assert [(row["id"], row["name"]) for row in panel] == [(other, "Apex Legends"), (game_id, "Counter-Strike 2")]
+    assert await db.get_game_name_by_id(other) == "Apex Legends"
+    assert await db.get_game_name_by_id(999) is None
+    assert db.name_index.search("ap") == ["Apex Legends"]
+
+@check
+async def delete_game_cascades(db: Storage):
+    game_id = await db.add_game("Dota 2", aliases="dota")
+    await db.register_user_for_game(1, "Dota 2")
+    await db.set_game_role(game_id, 500)
+    assert await db.delete_game_by_name("dota")
+    assert await db.get_game_id_from_name_or_alias("Dota 2") is None
+    assert await db.get_game_id_from_name_or_alias("dota") is None
+    assert await db.get_user_registered_games(1) == []
+    assert await db.get_game_role(game_id) is None
+    assert await db.delete_game_by_name("dota") is False
+    assert db.name_index.search("dota") == []
+    new_id = await db.add_game("Dota 2")
+    assert new_id != game_id, "IDs are never reused"
+
+@check
+async def name_index_reload(db: Storage):
+    game_id = await db.add_game("Rocket League", aliases="rl")
+    db.name_index.rebuild([], [])
+    await db.load_name_index()
+    assert db.name_index.name_for(game_id) == "Rocket League"
+    assert db.name_index.search("rl") == ["Rocket League"]
+
+# --- Registrations ---
+@check
+async def bulk_import(db: Storage):
+    existing = await db.add_game("Dota 2", aliases="dota")
+    art = await db.add_game("Portal", image_url="https://example.com/portal.jpg")
+    added, updated = await db.import_games([
+        ("Dota 2", "https://cdn/570.jpg", ["Dota 2", "DOTA 2"]),
+        ("dota", "https://cdn/alias.jpg", []),  # Resolves through the alias, artwork already filled
+        ("Portal", "https://cdn/400.jpg", []),  # Has artwork already: left alone
+        ("Half-Life", "https://cdn/70.jpg", ["Half Life", "DOTA 2"]),
+        ("Half-Life", "https://cdn/dup.jpg", ["HL"]),  # Repeated in the batch: first row wins
+        ("Team Fortress", None, ["Portal", "TF"]),  # An alias can't shadow a primary name
+    ])
+    assert (added, updated) == (2, 1), (added, updated)
+    half_life = await db.get_game_id_from_name_or_alias("Half-Life")
+    assert await db.get_game_image_url(existing) == "https://cdn/570.jpg"
+    assert await db.get_game_image_url(art) == "https://example.com/portal.jpg"
+    assert await db.get_game_image_url(half_life) == "https://cdn/70.jpg"
+    assert await db.get_game_image_url(999) is None
+    assert await db.get_game_id_from_name_or_alias("DOTA 2") == existing
+    assert await db.get_game_id_from_name_or_alias("HL") == half_life
+    assert await db.get_game_id_from_name_or_alias("Half Life") == half_life
+    assert await db.get_game_id_from_name_or_alias("Portal") == art
+    assert await db.get_game_id_from_name_or_alias("TF") == await db.get_game_id_from_name_or_alias("Team Fortress")
+    assert db.name_index.search("half") == ["Half-Life"]
+    assert db.name_index.search("DOTA 2") == ["Dota 2"]
+    assert await db.import_games([("Half-Life", None, ["HL"])]) == (0, 0), "re-import is a no-op"
+
+@check
+async def register_and_unregister(db: Storage):
+    changes = []
+    db.add_registration_listener(lambda *change: changes.append(change))
+    assert await db.register_user_for_game(1, "Valorant") is True, "creates missing games"
+    game_id = await db.get_game_id_from_name_or_alias("Valorant")
+    assert await db.register_user_for_game(1, "Valorant") is False, "already registered"
+    assert await db.register_user_for_game(2, "Unknown", create_missing=False) is False
+    assert await db.get_game_id_from_name_or_alias("Unknown") is None
+    await db.register_user_for_game(3, "Valorant")
+    assert sorted(await db.get_users_registered_for_game("Valorant")) == [1, 3]
+    assert sorted(await db.get_registrations_for_game_id(game_id)) == [1, 3]
+    assert await db.get_users_registered_for_game("Unknown") == []
+    assert await db.unregister_user_from_game(1, "Valorant") is True
+    assert await db.unregister_user_from_game(1, "Valorant") is False
+    assert await db.unregister_user_from_game(1, "Unknown") is False
+    assert changes == [(1, game_id, True), (3, game_id, True), (1, game_id, False)]
+
+@check
+async def concurrent_first_registrations(db: Storage):
+    changes = []
+    db.add_registration_listener(lambda *change: changes.append(change))
+    # Which of these runs first is up to the scheduler, so only order-independent outcomes are checked
+    results = await asyncio.gather(*(db.register_user_for_game(user_id, "Brand New") for user_id in range(1, 25)),
+                                   db.add_game("Brand New"), *(db.register_user_for_game(0, "Brand New") for _ in range(2)))
+    assert all(results[:24]), "no spurious failures"
+    game_id = await db.get_game_id_from_name_or_alias("Brand New")
+    assert results[24] in (None, game_id), "add_game either created the game or found it taken"
+    assert sorted(results[25:]) == [False, True], "exactly one of a user's duplicate registrations wins"
+    assert await db.register_user_for_game(0, "Brand New") is False, "already registered"
+    assert await db.get_all_games() == [("Brand New",)]
+    assert sorted(await db.get_registrations_for_game_id(game_id)) == list(range(25))
+    assert sorted(changes) == [(user_id, game_id, True) for user_id in range(25)]
+    assert db.name_index.search("brand") == ["Brand New"]
+
+@check
+async def registration_batch(db: Storage):
+    a = await db.add_game("A")
+    b = await db.add_game("B")
+    await db.register_user_for_game(1, "A")
+    changes = []
+    db.add_registration_listener(lambda *change: changes.append(change))
+    counts = await db.apply_registration_batch([(1, a), (2, a), (2, b), (3, 404)], [(1, a), (9, b)])
+    # (1, a) already existed so the add is ignored, then the remove applies
+    assert counts == (2, 1), counts
+    assert sorted(changes) == [(1, a, False), (2, a, True), (2, b, True)]
+    assert await db.get_all_registrations() == {a: {2}, b: {2}}
+    assert await db.count_registrations_for_game_id(a) == 1
+    assert await db.count_registrations_for_game_id(404) == 0
+    assert sorted(await db.get_user_registered_games(2)) == ["A", "B"]
+    assert db.get_user_registered_games_sync(2) == ["A", "B"]
+
+@check
+async def departed_members(db: Storage):
+    a = await db.add_game("A")
+    b = await db.add_game("B")
+    await db.apply_registration_batch([(1, a), (1, b), (2, a), (3, b), (4, a)], [])
+    changes = []
+    db.add_registration_listener(lambda *change: changes.append(change))
+    assert await db.delete_user_registrations(1) == 2
+    assert await db.delete_user_registrations(1) == 0
+    assert await db.prune_registrations([2, 99]) == 2
+    assert await db.get_all_registrations() == {a: {2}}
+    assert sorted(changes) == [(1, a, False), (1, b, False), (3, b, False), (4, a, False)]
+    assert await db.compact() >= 0
+    assert await db.get_all_registrations() == {a: {2}}
+
+@check
+async def registration_pages(db: Storage):
+    game_id = await db.add_game("Paged")
+    await db.apply_registration_batch([(user_id, game_id) for user_id in range(10, 60, 5)], [])
+    assert await db.get_registrations_page(game_id, limit=3) == [10, 15, 20]
+    assert await db.get_registrations_page(game_id, after=20, limit=3) == [25, 30, 35]
+    assert await db.get_registrations_page(game_id, before=25, limit=3) == [10, 15, 20]
+    assert await db.get_registrations_page(game_id, before=15, limit=3) == [10]
+    assert await db.get_registrations_page(game_id, after=55, limit=3) == []
+
+    for name in ("Delta", "alpha", "Bravo", "charlie"):
+        await db.register_user_for_game(7, name)
+    # Byte order, as SQLite's default BINARY collation sorts
+    assert await db.get_user_registered_games_page(7, limit=2) == ["Bravo", "Delta"]
+    assert await db.get_user_registered_games_page(7, after="Delta", limit=2) == ["alpha", "charlie"]
+    assert await db.get_user_registered_games_page(7, before="alpha", limit=5) == ["Bravo", "Delta"]
+
+# --- Analytics and roles ---
+@check
+async def play_session_rollups(db: Storage):
+    day = 86400 * 20000
+    await db.apply_play_session_batch(
+        [(1, "A", day, day + 60)],
+        {("A", day): [1, 60, 1]}, {("A", day): [1, 60, 1]}, {("A", day, 1)})
+    await db.apply_play_session_batch(
+        [(2, "A", day, day + 30), (1, "B", day, day + 500)],
+        {("A", day): [1, 30, 2], ("B", day): [1, 500, 1]},
+        {("A", day): [1, 30, 2], ("B", day): [1, 500, 1], ("A", day - 86400): [1, 10, 4]},
+        {("A", day, 2), ("A", day, 1), ("B", day, 1), ("A", day - 86400, 3)})
+    assert await db.get_game_play_stats("A", day) == (2, 90, 2, 2)
+    assert await db.get_game_play_stats("A", day - 86400) == (3, 100, 4, 3)
+    assert await db.get_game_play_stats("C", day) == (0, 0, 0, 0)
+    top = [tuple(row) for row in await db.get_top_played_games(day, limit=5)]
+    assert top == [("B", 500, 1, 1), ("A", 90, 2, 2)], top
+    assert len(await db.get_top_played_games(0, limit=1)) == 1
+
+@check
+async def game_roles(db: Storage):
+    a = await db.add_game("A")
+    b = await db.add_game("B")
+    await db.set_game_role(a, 100)
+    await db.set_game_role(b, 200)
+    await db.set_game_role(a, 101)
+    assert await db.get_game_role(a) == 101
+    assert await db.get_all_game_roles() == {a: 101, b: 200}
+    await db.delete_game_role(a)
+    assert await db.get_game_role(a) is None
+
+    deleted, changes = [], []
+    db.add_game_delete_listener(lambda *game: deleted.append(game))
+    db.add_registration_listener(lambda *change: changes.append(change))
+    await db.register_user_for_game(1, "B")
+    assert await db.delete_game(b)
+    assert deleted == [(b, 200)], deleted
+    assert changes == [(1, b, True), (1, b, False)], changes
+    assert await db.get_all_game_roles() == {}
+
+@check
+async def delivery_preferences(db: Storage):
+    a = await db.add_game("A")
+    b = await db.add_game("B")
+    await db.set_user_delivery_preferences(1, "dm")
+    await db.set_user_delivery_preferences(2, "channel", 22, 7)
+    await db.set_user_delivery_preferences(1, "dm", 0, 6)
+    await db.set_game_delivery_preference(1, a, True, 0)
+    await db.set_game_delivery_preference(2, a, False, 30)
+    await db.set_game_delivery_preference(2, b, True, 0)
+    await db.set_game_delivery_preference(2, b, False, 0)
+    users, games = await db.get_all_delivery_preferences()
+    assert users == {1: ("dm", 0, 6), 2: ("channel", 22, 7)}, users
+    assert games == {(1, a): (True, 0), (2, a): (False, 30)}, games
+    await db.delete_game(a)
+    assert (await db.get_all_delivery_preferences())[1] == {}
+
+# --- Config and events ---
+@check
+async def config_values(db: Storage):
+    assert await db.get_config("ALERT_CHANNEL_ID") is None
+    await db.set_config("ALERT_CHANNEL_ID", 1234)
+    assert await db.get_config("ALERT_CHANNEL_ID") == 1234
+    await db.set_config("ROLE_FANOUT", "on")
+    assert await db.get_config("ROLE_FANOUT") == "on"
+    await db.set_config("ROLE_FANOUT", "-1")
+    assert await db.get_config("ROLE_FANOUT") == "-1", "only digit strings become ints"
+
+@check
+async def events_and_rsvps(db: Storage):
+    past = (datetime.now() - timedelta(days=1)).isoformat(sep=" ")
+    future = (datetime.now() + timedelta(days=1)).isoformat(sep=" ")
+    first = await db.create_event("LAN", "Bring snacks", 1)
+    await db.create_event("Old", "Already happened", 2, event_time=past)
+    third = await db.create_event("Raid", "Tuesday", 3, event_time=future)
+    assert first and third and first != third
+    upcoming = [tuple(row) for row in await db.get_upcoming_events()]
+    assert upcoming == [(first, "LAN", "Bring snacks", None, 1), (third, "Raid", "Tuesday", future, 3)], upcoming
+    assert await db.update_event_rsvp(first, 5, "attending") is True
+    assert await db.update_event_rsvp(first, 5, "maybe") is True
+    assert await db.update_event_rsvp(999, 5, "attending") is False
+
+# --- Runner ---
+async def run(backends):
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            for func in CHECKS:
+                db = BACKENDS[backend](tmp)
+                await db.init_db()
+                await db.init_config_table()
+                try:
+                    await func(db)
+                    print(f"✅ {backend:<7} {func.__name__}")
+                except Exception:
+                    failures += 1
+                    print(f"❌ {backend:<7} {func.__name__}\n{traceback.format_exc()}")
+    print(f"{len(CHECKS) * len(backends) - failures} passed, {failures} failed")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that storage backends behave identically.")
+    parser.add_argument("backends", nargs="*", help=f"any of: {', '.join(BACKENDS)} (default: all)")
+    args = parser.parse_args()
+    unknown = set(args.backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"unknown backend: {', '.join(sorted(unknown))}")
+    raise SystemExit(1 if asyncio.run(run(args.backends or list(BACKENDS))) else 0)
+
+if __name__ == "__main__":
+    main()
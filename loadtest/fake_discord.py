@@ -0,0 +1,118 @@
+import json
+import time
+from collections import deque
+from aiohttp import web
+
+API_PREFIX = "/api/v10"
+BOT_USER = {"id": "1", "username": "replay-bot", "discriminator": "0000", "avatar": None, "bot": True}
+
+def json_response(body, status: int = 200, headers=None):
+    # Exactly "application/json" like Discord; nextcord treats anything else (even with a charset) as text
+    return web.Response(body=json.dumps(body).encode(), status=status,
+                        headers={"Content-Type": "application/json", **(headers or {})})
+
+class FakeDiscordAPI:
+    """Local stand-in for the parts of Discord's REST API the bot calls while sending.
+
+    Records every call and answers with 429s when a bucket goes over its limit, using
+    Discord's per-channel message limit (5 per 5 seconds) by default. Responses carry
+    the same X-RateLimit-* headers (and a 429's Via header) Discord sends, which is
+    what nextcord's HTTP client reads to pace itself.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, limit: int = 5, per: float = 5.0, global_limit: int = 50):
+        self.host = host
+        self.port = port
+        self.limit = limit
+        self.per = per
+        self.global_limit = global_limit
+        self.calls = []            # (timestamp, method, route, json body)
+        self.rate_limited = 0
+        self._buckets = {}         # bucket key -> deque of request timestamps
+        self._global = deque()
+        self._next_message_id = 1
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get(API_PREFIX + "/users/@me", self.current_user)
+        self.app.router.add_post(API_PREFIX + "/channels/{channel_id}/messages", self.create_message)
+        self.app.router.add_patch(API_PREFIX + "/channels/{channel_id}/messages/{message_id}", self.edit_message)
+        self.app.router.add_post(API_PREFIX + "/interactions/{interaction_id}/{token}/callback", self.interaction_callback)
+        self.app.router.add_post(API_PREFIX + "/webhooks/{application_id}/{token}", self.followup)
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def _check_rate_limit(self, bucket_key, now):
+        """Returns (seconds to wait, is global) if the request should be rejected, else None."""
+        for window, limit, per, is_global in ((self._global, self.global_limit, 1.0, True),
+                                              (self._buckets.setdefault(bucket_key, deque()), self.limit, self.per, False)):
+            while window and window[0] <= now - per:
+                window.popleft()
+            if len(window) >= limit:
+                return window[0] + per - now, is_global
+        self._global.append(now)
+        self._buckets[bucket_key].append(now)
+        return None
+
+    def _rate_limit_headers(self, bucket_key, now):
+        window = self._buckets[bucket_key]
+        reset_after = max(0.0, window[0] + self.per - now) if window else 0.0
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.limit - len(window))),
+            "X-RateLimit-Reset": str(time.time() + reset_after),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": bucket_key,
+        }
+
+    async def _handle(self, request, bucket_key, response_body):
+        now = time.monotonic()
+        limited = self._check_rate_limit(bucket_key, now)
+        if limited is not None:
+            retry_after, is_global = limited
+            self.rate_limited += 1
+            headers = {"Retry-After": str(retry_after), "Via": "1.1 google", **self._rate_limit_headers(bucket_key, now)}
+            if is_global:
+                headers["X-RateLimit-Global"] = "true"
+            return json_response(
+                {"message": "You are being rate limited.", "retry_after": round(retry_after, 3), "global": is_global},
+                status=429,
+                headers=headers,
+            )
+        body = await request.json() if request.can_read_body else None
+        self.calls.append((now, request.method, request.match_info.route.resource.canonical, body))
+        return json_response(response_body, headers=self._rate_limit_headers(bucket_key, now))
+
+    async def current_user(self, request):
+        # Called once by HTTPClient.static_login; not rate limited or recorded
+        return json_response(BOT_USER)
+
+    def _message(self, channel_id):
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        return {"id": str(message_id), "channel_id": str(channel_id)}
+
+    async def create_message(self, request):
+        channel_id = request.match_info["channel_id"]
+        return await self._handle(request, f"channel:{channel_id}", self._message(channel_id))
+
+    async def edit_message(self, request):
+        channel_id = request.match_info["channel_id"]
+        return await self._handle(request, f"channel:{channel_id}", {"id": request.match_info["message_id"], "channel_id": channel_id})
+
+    async def interaction_callback(self, request):
+        # Interaction responses are not rate limited per channel, only globally
+        return await self._handle(request, f"interaction:{request.match_info['interaction_id']}", {})
+
+    async def followup(self, request):
+        return await self._handle(request, f"webhook:{request.match_info['token']}", self._message(0))
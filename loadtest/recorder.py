@@ -0,0 +1,63 @@
+"""Records presence and component-interaction gateway events for later replay.
+
+One compact JSON object per line, with short keys:
+    {"t": 12.5, "k": "p", "g": guild_id, "u": user_id, "n": "display name", "a": "game or null"}
+    {"t": 13.1, "k": "i", "g": guild_id, "u": user_id, "n": "display name", "c": "custom_id", "v": ["values"]}
+`t` is seconds since recording started.
+"""
+import json
+import time
+import nextcord
+from nextcord.ext import commands, tasks
+from presence_index import playing_game
+
+class EventRecorder(commands.Cog):
+    def __init__(self, bot, path: str):
+        self.bot = bot
+        self.path = path
+        self.started = time.monotonic()
+        self.buffer = []
+        self.file = open(path, "a", encoding="utf-8")
+        self.flush_to_disk.start()
+
+    def cog_unload(self):
+        self.flush_to_disk.cancel()
+        self._write()
+        self.file.close()
+
+    def _record(self, **fields):
+        fields["t"] = round(time.monotonic() - self.started, 3)
+        self.buffer.append(json.dumps(fields, separators=(",", ":"), ensure_ascii=False))
+
+    def _write(self):
+        if self.buffer:
+            lines, self.buffer = self.buffer, []
+            self.file.write("\n".join(lines) + "\n")
+            self.file.flush()
+
+    @tasks.loop(seconds=5)
+    async def flush_to_disk(self):
+        self._write()
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        if after.bot:
+            return
+        game_name = playing_game(after)
+        if game_name == playing_game(before):
+            return  # Status/avatar changes don't matter for replay
+        self._record(k="p", g=after.guild.id, u=after.id, n=after.display_name, a=game_name)
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: nextcord.Interaction):
+        if interaction.type != nextcord.InteractionType.component:
+            return
+        data = interaction.data or {}
+        self._record(
+            k="i",
+            g=interaction.guild_id,
+            u=interaction.user.id,
+            n=interaction.user.display_name,
+            c=data.get("custom_id"),
+            v=data.get("values", []),
+        )
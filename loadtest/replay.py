@@ -0,0 +1,390 @@
+"""Replays recorded gateway events against the real cogs and a local fake Discord API.
+
+    python -m loadtest.replay events.jsonl --speed 10 --subscribers 200
+
+Presence events drive GameDetection (notifications go to the fake alert channel) and
+component interactions are dispatched to the user/control panel views. At the end it
+prints latency percentiles from event injection to the matching REST call completing
+(for interactions: to the first acknowledgement and to the final reply).
+
+REST calls go through nextcord's own HTTPClient pointed at the fake API, so the bucket
+locks, 429 sleeps and retries measured are nextcord's, not the harness's. Gateway
+objects (members, channels, interactions) are still minimal stand-ins.
+
+Pass --db with a production bot.db to replay interactions against real game IDs; the
+replay runs on a scratch copy and never writes to that file. --storage memory leaves
+disk I/O out of the numbers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+import nextcord
+from nextcord.http import HTTPClient, Route
+from config import Config
+from database import Database
+from memory_storage import MemoryDatabase
+from storage import Storage
+from registration_buffer import RegistrationBuffer
+from interactions import InteractionDispatcher
+from analytics import PlaySessionRecorder
+from cogs.gamedetection import GameDetection
+from cogs.userpanel import UserPanel, SharedUserPanelView
+from cogs.controlpanel import ControlPanel, ControlPanelView
+from loadtest.fake_discord import FakeDiscordAPI
+
+ALERT_CHANNEL_ID = 1000
+APPLICATION_ID = 1
+
+# --- Minimal stand-ins for the nextcord objects the cogs touch ---
+class RestClient:
+    """Sends the stand-ins' REST calls through nextcord's HTTPClient, aimed at the fake API."""
+    def __init__(self, base_url: str):
+        Route.BASE = base_url
+        self.http = HTTPClient()
+
+    async def start(self):
+        await self.http.static_login("replay-token")
+
+    async def close(self):
+        await self.http.close()
+
+    async def request(self, method, path, payload=None, **parameters):
+        # Route parameters are what nextcord buckets on (channel_id, webhook token, ...)
+        return await self.http.request(Route(method, path, **parameters), json=payload)
+
+def serialize(content=None, embed=None, view=None, **_):
+    payload = {}
+    if content:
+        payload["content"] = content
+    if embed:
+        payload["embeds"] = [embed.to_dict()]
+    if view:
+        payload["components"] = view.to_components()
+    return payload
+
+class FakeMessage:
+    def __init__(self, rest, channel_id, message_id):
+        self.rest = rest
+        self.channel_id = channel_id
+        self.id = message_id
+
+    async def edit(self, **kwargs):
+        await self.rest.request("PATCH", "/channels/{channel_id}/messages/{message_id}", serialize(**kwargs),
+                                channel_id=self.channel_id, message_id=self.id)
+
+class FakeChannel:
+    def __init__(self, rest, channel_id, guild, on_send=None):
+        self.rest = rest
+        self.id = channel_id
+        self.name = f"channel-{channel_id}"
+        self.mention = f"<#{channel_id}>"
+        self.guild = guild
+        self.on_send = on_send
+
+    async def send(self, **kwargs):
+        data = await self.rest.request("POST", "/channels/{channel_id}/messages", serialize(**kwargs), channel_id=self.id)
+        if self.on_send:
+            self.on_send(kwargs)
+        return FakeMessage(self.rest, self.id, data["id"])
+
+class FakeAvatar:
+    def __init__(self, url):
+        self.url = url
+
+class FakeMember:
+    def __init__(self, user_id, name, guild):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+        self.guild = guild
+        self.roles = []
+        self.activities = ()
+        self.display_avatar = FakeAvatar(f"https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png")
+
+    @property
+    def activity(self):
+        return self.activities[0] if self.activities else None
+
+    def snapshot(self):
+        copy = FakeMember(self.id, self.name, self.guild)
+        copy.activities = self.activities
+        return copy
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"replay-guild-{guild_id}"
+        self._members = {}
+        self.shard_id = 0
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+    def get_role(self, role_id):
+        return None
+
+    def member(self, user_id, name):
+        if user_id not in self._members:
+            self._members[user_id] = FakeMember(user_id, name, self)
+        return self._members[user_id]
+
+class FakeBot:
+    def __init__(self, guild, channels):
+        self.guilds = [guild]
+        self.channels = {channel.id: channel for channel in channels}
+        self.cogs = {}
+        self.latency = 0.0
+
+    def is_ready(self):
+        return True
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_all_channels(self):
+        return list(self.channels.values())
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def add_view(self, view, message_id=None):
+        pass
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _callback(self, callback_type, payload=None):
+        self._done = True
+        await self.interaction.rest.request(
+            "POST", "/interactions/{interaction_id}/{interaction_token}/callback", {"type": callback_type, "data": payload or {}},
+            interaction_id=self.interaction.id, interaction_token=self.interaction.token)
+        self.interaction.responded(done=callback_type not in (5, 6))
+
+    async def send_message(self, content=None, **kwargs):
+        await self._callback(4, serialize(content=content, **kwargs))
+
+    async def defer(self, ephemeral=False, with_message=False):
+        await self._callback(5 if with_message else 6)
+
+    async def edit_message(self, **kwargs):
+        await self._callback(7, serialize(**kwargs))
+
+    async def send_modal(self, modal):
+        await self._callback(9, {"title": modal.title})
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        await self.interaction.rest.request("POST", "/webhooks/{application_id}/{interaction_token}", serialize(content=content, **kwargs),
+                                            application_id=APPLICATION_ID, interaction_token=self.interaction.token)
+        self.interaction.responded(done=True)
+
+class FakeInteraction:
+    _next_id = 1
+
+    def __init__(self, rest, member, custom_id, values, on_response):
+        self.id = FakeInteraction._next_id
+        FakeInteraction._next_id += 1
+        self.token = f"token{self.id}"
+        self.created_at = nextcord.utils.utcnow()
+        self.rest = rest
+        self.user = member
+        self.guild = member.guild
+        self.guild_id = member.guild.id
+        self.type = nextcord.InteractionType.component
+        self.data = {"custom_id": custom_id, "values": values}
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+        self._on_response = on_response
+
+    def responded(self, done):
+        self._on_response(self, done)
+
+# --- Replay driver ---
+async def no_artwork(game_name):
+    return None
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def load_events(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class Replay:
+    def __init__(self, events, speed, rest, db, registrations, sessions, guild_id):
+        self.events = events
+        self.speed = speed
+        self.rest = rest
+        self.db = db
+        self.guild = FakeGuild(guild_id)
+        self.alert_channel = FakeChannel(rest, ALERT_CHANNEL_ID, self.guild, on_send=self.notification_sent)
+        self.bot = FakeBot(self.guild, [self.alert_channel])
+        self.registrations = registrations
+        self.sessions = sessions
+        self.pending_notifications = {}  # (display_name, game_name) -> injection time
+        self.interaction_started = {}    # interaction id -> injection time
+        self.interaction_acked = set()   # interaction ids deferred but not answered yet
+        self.latencies = {"notification": [], "acknowledge": [], "interaction": []}
+        self.interactions = InteractionDispatcher()
+
+    async def setup(self):
+        os.environ["ALERT_CHANNEL_ID"] = str(ALERT_CHANNEL_ID)
+        # Set on the class before the cog starts the loop; a running loop can't take a new interval before its first pass
+        GameDetection.game_check.change_interval(seconds=Config.GAME_CHECK_INTERVAL / self.speed)
+        self.detection = GameDetection(self.bot, self.db, self.sessions)
+        self.detection.get_steam_game_image = no_artwork  # Keep the replay off the internet
+        self.interactions.start()
+        self.user_panel = UserPanel(self.bot, self.db, self.registrations, self.interactions)
+        self.control_panel = ControlPanel(self.bot, self.db, self.registrations, self.interactions)
+        self.bot.cogs.update(GameDetection=self.detection, UserPanel=self.user_panel, ControlPanel=self.control_panel)
+        self.components = {}
+        for view in (SharedUserPanelView(self.user_panel), ControlPanelView(self.control_panel)):
+            for item in view.children:
+                if getattr(item, "custom_id", None):
+                    self.components[item.custom_id] = item
+
+    def notification_sent(self, kwargs):
+        embed = kwargs.get("embed")
+        if not embed:
+            return
+        game_name = embed.title.removeprefix("🎮 ")
+        player = next((field.value for field in embed.fields if field.name == "👤 Player"), None)
+        started = self.pending_notifications.pop((player, game_name), None)
+        if started is not None:
+            self.latencies["notification"].append(time.monotonic() - started)
+
+    def interaction_responded(self, interaction, done):
+        started = self.interaction_started.get(interaction.id)
+        if started is None:
+            return
+        elapsed = time.monotonic() - started
+        if interaction.id not in self.interaction_acked:
+            self.latencies["acknowledge"].append(elapsed)
+        if done:
+            del self.interaction_started[interaction.id]
+            self.interaction_acked.discard(interaction.id)
+            self.latencies["interaction"].append(elapsed)
+        else:
+            self.interaction_acked.add(interaction.id)
+
+    async def handle_presence(self, event):
+        member = self.guild.member(event["u"], event["n"])
+        before = member.snapshot()
+        member.activities = (nextcord.Game(name=event["a"]),) if event.get("a") else ()
+        if event.get("a"):
+            self.pending_notifications[(member.display_name, event["a"])] = time.monotonic()
+        await self.detection.on_presence_update(before, member)
+
+    async def handle_interaction(self, event):
+        item = self.components.get(event["c"])
+        if not item:
+            return
+        member = self.guild.member(event["u"], event["n"])
+        interaction = FakeInteraction(self.rest, member, event["c"], event.get("v", []), self.interaction_responded)
+        self.interaction_started[interaction.id] = time.monotonic()
+        await item.callback(interaction)
+
+    async def run(self, drain_seconds):
+        tasks = []
+        started = time.monotonic()
+        for event in self.events:
+            delay = event["t"] / self.speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            handler = self.handle_presence if event["k"] == "p" else self.handle_interaction
+            tasks.append(asyncio.create_task(handler(event)))
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(drain_seconds)
+        self.detection.game_check.cancel()
+        await self.interactions.stop()
+
+    def report(self, api: FakeDiscordAPI):
+        print(f"Replayed {len(self.events)} events at {self.speed}x")
+        print(f"{'kind':<14}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for kind, values in self.latencies.items():
+            if not values:
+                print(f"{kind:<14}{0:>7}")
+                continue
+            row = [percentile(values, p) * 1000 for p in (0.5, 0.9, 0.99)] + [max(values) * 1000]
+            print(f"{kind:<14}{len(values):>7}" + "".join(f"{value:>10.1f}" for value in row))
+        print(f"Undelivered notifications: {len(self.pending_notifications)}")
+        print(f"REST calls: {len(api.calls)}, 429 responses (each retried by nextcord): {api.rate_limited}")
+
+async def seed_subscribers(db: Storage, events, subscribers: int):
+    """Makes sure every replayed game exists and has `subscribers` synthetic registrations."""
+    games = {event["a"] for event in events if event["k"] == "p" and event.get("a")}
+    for game_name in games:
+        game_id = await db.get_game_id_from_name_or_alias(game_name) or await db.add_game(game_name)
+        await db.apply_registration_batch([(10**15 + i, game_id) for i in range(subscribers)], [])
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay recorded gateway events against a fake Discord API.")
+    parser.add_argument("events", help="JSON lines file written by loadtest.recorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    parser.add_argument("--db", help="database to start from; a scratch copy is used, the file itself is never written")
+    parser.add_argument("--storage", choices=["sqlite", "memory"], default="sqlite",
+                        help="storage backend; memory takes disk I/O out of the measurement")
+    parser.add_argument("--subscribers", type=int, default=50, help="synthetic subscribers per replayed game")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limit", type=int, default=5, help="messages per channel per 5 seconds before 429s")
+    args = parser.parse_args()
+
+    events = load_events(args.events)
+    if not events:
+        return print("No events to replay.")
+
+    if args.storage == "memory":
+        db = MemoryDatabase()
+    else:
+        # Synthetic subscribers and replayed clicks get written, so never point at the real file
+        db_path = os.path.join(tempfile.mkdtemp(), "replay.db")
+        if args.db:
+            with closing(sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)) as source, closing(sqlite3.connect(db_path)) as scratch:
+                source.backup(scratch)
+            print(f"Replaying against a scratch copy of {args.db}: {db_path}")
+        db = Database(db_path)
+    await db.init_db()
+    await db.init_config_table()
+    await seed_subscribers(db, events, args.subscribers)
+    registrations = RegistrationBuffer(db)
+    await registrations.start()
+    sessions = PlaySessionRecorder(db)
+    sessions.start()
+
+    api = FakeDiscordAPI(port=args.port, limit=args.rate_limit)
+    await api.start()
+    rest = RestClient(api.base_url)
+    try:
+        await rest.start()
+        replay = Replay(events, args.speed, rest, db, registrations, sessions, events[0].get("g") or 1)
+        await replay.setup()
+        await replay.run(drain_seconds=2 * Config.GAME_CHECK_INTERVAL / args.speed + 5)
+        replay.report(api)
+    finally:
+        await registrations.drain()
+        await sessions.drain()
+        await rest.close()
+        await api.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
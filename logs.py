@@ -0,0 +1,176 @@
+"""Structured logging that never makes the event loop wait on stdout.
+
+Records are put on a bounded in-memory queue; a background thread formats them (one
+JSON object per line by default) and writes them out. If the output backs up only
+that thread waits, and once the queue is full new records are dropped and counted.
+
+    log = get_logger(__name__, cog="GameDetection")
+    log.info("Sent notification", extra={"guild": guild.id, "game_id": game_id, "elapsed_ms": 12.5})
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from collections import Counter
+from config import Config
+
+# Attributes every LogRecord has; anything else came in through `extra=` and becomes a field
+STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+# Field values of these types are safe to hand to the writer thread as they are
+PLAIN_TYPES = (str, int, float, bool, type(None))
+
+def record_fields(record: logging.LogRecord):
+    return {key: value for key, value in vars(record).items() if key not in STANDARD_ATTRS}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name, "msg": record.getMessage()}
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for running locally: time, level, logger, message, then key=value fields."""
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            first, newline, rest = line.partition("\n")  # keep fields on the message line, before any traceback
+            line = first + " " + " ".join(f"{key}={value}" for key, value in fields.items()) + newline + rest
+        return line
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in N records of each high-frequency event, by the record's `event` field.
+
+    Kept records carry `sample_rate`, so counts can be scaled back up when aggregating.
+    Events not listed in `rates` are always kept.
+    """
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self.seen = Counter()
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None:
+            return True
+        if rate <= 0:
+            return False
+        count = self.seen[record.event]
+        self.seen[record.event] += 1
+        if count % max(1, round(1 / rate)):
+            return False
+        record.sample_rate = rate
+        return True
+
+class BufferedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting the output line to the writer thread and never blocks on a full queue."""
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The message and any object-valued fields are rendered here, on the caller's thread:
+        # arguments like nextcord models can change on the event loop before the writer gets
+        # to them. Building the JSON or text line still happens on the writer thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        for key, value in record_fields(record).items():
+            if not isinstance(value, PLAIN_TYPES):
+                setattr(record, key, str(value))
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class FieldsAdapter(logging.LoggerAdapter):
+    """Adds fixed fields (e.g. cog=...) to every record, merged with any per-call `extra`."""
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+def get_logger(name: str, **fields):
+    logger = logging.getLogger(name)
+    return FieldsAdapter(logger, fields) if fields else logger
+
+def parse_levels(spec: str):
+    """Parses a spec like `database=DEBUG,cogs.gamedetection=WARNING` into {logger name: level}."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, level = item.partition("=")
+        if level.strip().upper() in LEVELS:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+_handler = None
+_listener = None
+_listener_pid = None
+
+def setup_logging(level: str = Config.LOG_LEVEL, fmt: str = Config.LOG_FORMAT, levels: str = Config.LOG_LEVELS, stream=None):
+    """Routes all logging through the queue. Safe to call again, e.g. in a forked child whose writer thread didn't survive the fork."""
+    global _handler, _listener, _listener_pid
+    stop_logging()
+    records = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    _handler = BufferedQueueHandler(records)
+    _handler.addFilter(SamplingFilter(Config.LOG_SAMPLE_RATES))
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+def stop_logging():
+    """Writes out whatever is still queued and stops the writer thread."""
+    global _listener
+    # After a fork the writer thread belongs to the parent; leave its queue alone
+    if _listener and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+
+atexit.register(stop_logging)
+
+def dropped():
+    return _handler.dropped if _handler else 0
+
+def set_level(name: str, level: str):
+    """Sets one logger's level at runtime; `reset` makes it inherit from its parent again."""
+    level = level.upper()
+    if level != "RESET" and level not in LEVELS:
+        raise ValueError(f"Unknown level {level}; use one of {', '.join(LEVELS)} or reset")
+    root = logging.getLogger()
+    logger = root if name == "root" else logging.getLogger(name)
+    if level == "RESET":
+        level = Config.LOG_LEVEL.upper() if logger is root else logging.NOTSET
+    logger.setLevel(level)
+
+def logger_levels():
+    """(logger name, own level, effective level) for the root and every logger created so far."""
+    rows = [("root", logging.getLevelName(logging.getLogger().level), logging.getLevelName(logging.getLogger().getEffectiveLevel()))]
+    for name in sorted(logging.root.manager.loggerDict):
+        logger = logging.root.manager.loggerDict[name]
+        if isinstance(logger, logging.Logger):
+            own = logging.getLevelName(logger.level) if logger.level else "-"
+            rows.append((name, own, logging.getLevelName(logger.getEffectiveLevel())))
+    return rows
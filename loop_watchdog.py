@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from config import Config
+from logs import get_logger
+
+log = get_logger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+class LoopWatchdog:
+    """Background thread that notices when the event loop stops responding.
+
+    Every `interval` seconds it schedules a heartbeat on the loop. If the heartbeat
+    hasn't run after `threshold` seconds, the loop thread is stuck in some callback:
+    its stack is captured and the stall is charged to the innermost frame from this
+    project (the call site that blocked), falling back to the innermost frame overall.
+    """
+    def __init__(self, threshold: float = Config.LOOP_LAG_THRESHOLD_MS / 1000, interval: float = Config.LOOP_LAG_CHECK_INTERVAL):
+        self.loop = None
+        self.threshold = threshold
+        self.interval = interval
+        self.loop_thread_id = None
+        self.stalls = Counter()        # call site -> number of stalls
+        self.stall_seconds = Counter() # call site -> total seconds stalled
+        self.worst = {}                # call site -> (lag seconds, formatted stack)
+        self.max_lag = 0.0
+        # Stalls are recorded on the watchdog thread and read by report() on the loop thread
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts watching the running event loop (call from inside the loop)."""
+        if self._thread:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            beat = threading.Event()
+            sent = time.monotonic()
+            self.loop.call_soon_threadsafe(beat.set)
+            if beat.wait(self.threshold):
+                continue
+
+            # The loop is stalled right now: grab the stack while it is still stuck
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = traceback.extract_stack(frame) if frame else []
+            # Wait for the loop to recover to learn how long the stall was
+            while not beat.wait(1.0):
+                if self._stop.is_set():
+                    return
+            lag = time.monotonic() - sent
+            self._record(stack, lag)
+
+    def _record(self, stack, lag):
+        site = "<unknown>"
+        for entry in reversed(stack):
+            if entry.filename.startswith(PROJECT_ROOT) and entry.filename != __file__:
+                site = f"{os.path.relpath(entry.filename, PROJECT_ROOT)}:{entry.lineno} in {entry.name}"
+                break
+        else:
+            if stack:
+                site = f"{os.path.basename(stack[-1].filename)}:{stack[-1].lineno} in {stack[-1].name}"
+
+        with self._lock:
+            if lag > self.worst.get(site, (0, None))[0]:
+                self.worst[site] = (lag, "".join(traceback.format_list(stack[-12:])))
+            self.stalls[site] += 1
+            self.stall_seconds[site] += lag
+            self.max_lag = max(self.max_lag, lag)
+        log.warning("Event loop blocked", extra={"site": site, "elapsed_ms": round(lag * 1000, 1)})
+
+    def reset(self):
+        with self._lock:
+            self.stalls.clear()
+            self.stall_seconds.clear()
+            self.worst.clear()
+            self.max_lag = 0.0
+
+    def report(self, limit: int = 10, with_stacks: bool = False) -> str:
+        """Call sites ranked by total time they kept the loop blocked."""
+        # Copy under the lock and format outside it, so the watchdog thread is never kept waiting long
+        with self._lock:
+            stalls, worst, max_lag = dict(self.stalls), dict(self.worst), self.max_lag
+            top = self.stall_seconds.most_common(limit)
+        if not stalls:
+            return f"No stalls over {self.threshold * 1000:.0f} ms recorded."
+        lines = [f"Stalls over {self.threshold * 1000:.0f} ms (worst {max_lag * 1000:.0f} ms)", "",
+                 f"{'count':>6} {'total ms':>9} {'worst ms':>9}  call site"]
+        for site, seconds in top:
+            lines.append(f"{stalls[site]:>6} {seconds * 1000:>9.0f} {worst[site][0] * 1000:>9.0f}  {site}")
+        if with_stacks:
+            for site, _ in top:
+                lines += ["", f"--- {site} ---", worst[site][1]]
+        return "\n".join(lines)
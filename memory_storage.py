@@ -0,0 +1,326 @@
+from datetime import datetime
+from storage import Storage
+
+class MemoryDatabase(Storage):
+    """Storage backend kept entirely in dicts and sets, for tests and benchmarks.
+
+    Mirrors database.Database row for row: same return shapes, same orderings where
+    the SQL has an ORDER BY, same handling of duplicates and missing games.
+    Nothing survives a restart.
+    """
+    def __init__(self):
+        super().__init__()
+        self.games = {}             # game_id -> {"id", "name", "image_url", "created_at"}
+        self.game_ids = {}          # name -> game_id
+        self.aliases = {}           # alias -> game_id
+        self.registrations = {}     # game_id -> set(user_ids)
+        self.user_games = {}        # user_id -> set(game_ids)
+        self.play_sessions = []     # (user_id, game_name, started_at, ended_at)
+        self.stats_hourly = {}      # (game_name, hour) -> [sessions, play_seconds, peak_players]
+        self.stats_daily = {}       # (game_name, day) -> [sessions, play_seconds, peak_players]
+        self.daily_players = set()  # (game_name, day, user_id)
+        self.game_roles = {}        # game_id -> role_id
+        self.config = {}            # key -> value as text
+        self.user_preferences = {}  # user_id -> (delivery, quiet_start, quiet_end)
+        self.game_preferences = {}  # (user_id, game_id) -> (muted, cooldown_minutes)
+        self.events = {}            # event_id -> (id, title, description, event_time, creator_id)
+        self.event_rsvps = {}       # (event_id, user_id) -> status
+        self._next_game_id = 1
+        self._next_event_id = 1
+
+    async def init_db(self):
+        """Nothing to create; just builds the name index like the SQLite backend."""
+        await self.load_name_index()
+
+    async def init_config_table(self):
+        pass
+
+    async def load_name_index(self):
+        """(Re)build the in-memory game name index from the games and aliases."""
+        self.name_index.rebuild(
+            [(game_id, game["name"]) for game_id, game in self.games.items()],
+            [(game_id, alias) for alias, game_id in self.aliases.items()])
+
+    # --- Games and aliases ---
+    async def get_game_id_from_name_or_alias(self, name_or_alias):
+        """Get a game's ID from its primary name or any of its aliases."""
+        return self.game_ids.get(name_or_alias) or self.aliases.get(name_or_alias)
+
+    async def add_game(self, name, image_url=None, aliases=None):
+        """Add a new game with optional comma-separated aliases."""
+        if await self.get_game_id_from_name_or_alias(name):
+            return None
+
+        game_id = self._next_game_id
+        self._next_game_id += 1
+        self.games[game_id] = {"id": game_id, "name": name, "image_url": image_url,
+                               "created_at": datetime.utcnow().isoformat(sep=" ", timespec="seconds")}
+        self.game_ids[name] = game_id
+
+        added_aliases = []
+        if aliases:
+            for alias in (a.strip() for a in aliases.split(',') if a.strip()):
+                if alias not in self.aliases:  # UNIQUE across all games, like game_aliases.alias
+                    self.aliases[alias] = game_id
+                    added_aliases.append(alias)
+
+        self.name_index.add(game_id, name, added_aliases)
+        return game_id
+
+    async def get_all_games(self):
+        """Get all game names as 1-tuples, ordered by name."""
+        return [(name,) for name in sorted(self.game_ids)]
+
+    async def get_all_games_for_panel(self):
+        """Get all games with their IDs, ordered by name."""
+        return [{"id": self.game_ids[name], "name": name} for name in sorted(self.game_ids)]
+
+    async def get_game_name_by_id(self, game_id: int):
+        game = self.games.get(game_id)
+        return game["name"] if game else None
+
+    async def get_game_image_url(self, game_id: int):
+        game = self.games.get(game_id)
+        return game["image_url"] if game else None
+
+    async def import_games(self, games):
+        """Upserts a batch of (name, image_url, aliases) rows; first occurrence in the batch wins."""
+        batch, alias_rows = {}, {}  # name -> image_url, alias -> name
+        for name, image_url, aliases in games:
+            batch.setdefault(name, image_url)
+            for alias in aliases:
+                if alias != name:
+                    alias_rows.setdefault(alias, name)
+
+        game_ids, updated = {}, set()
+        for name, image_url in batch.items():
+            game_id = await self.get_game_id_from_name_or_alias(name)
+            if game_id and image_url and self.games[game_id]["image_url"] is None:
+                self.games[game_id]["image_url"] = image_url
+                updated.add(game_id)
+            game_ids[name] = game_id
+
+        added = []
+        for name, image_url in batch.items():
+            if not game_ids[name]:
+                game_id = game_ids[name] = self._next_game_id
+                self._next_game_id += 1
+                self.games[game_id] = {"id": game_id, "name": name, "image_url": image_url,
+                                       "created_at": datetime.utcnow().isoformat(sep=" ", timespec="seconds")}
+                self.game_ids[name] = game_id
+                added.append(game_id)
+
+        new_aliases = {}
+        for alias, name in alias_rows.items():
+            if alias not in self.aliases and alias not in self.game_ids:
+                self.aliases[alias] = game_ids[name]
+                new_aliases.setdefault(game_ids[name], []).append(alias)
+
+        indexed = [(game_id, self.games[game_id]["name"], new_aliases.pop(game_id, [])) for game_id in added]
+        indexed += [(game_id, self.games[game_id]["name"], aliases) for game_id, aliases in new_aliases.items()]
+        self.name_index.add_many(indexed)
+        return len(added), len(updated | new_aliases.keys())
+
+    async def delete_game(self, game_id):
+        """Delete a game with its registrations, aliases and managed role."""
+        user_ids = self.registrations.pop(game_id, set())
+        for user_id in user_ids:
+            self.user_games[user_id].discard(game_id)
+        game = self.games.pop(game_id, None)
+        if game:
+            del self.game_ids[game["name"]]
+        self.aliases = {alias: gid for alias, gid in self.aliases.items() if gid != game_id}
+        role_id = self.game_roles.pop(game_id, None)
+        self.game_preferences = {key: value for key, value in self.game_preferences.items() if key[1] != game_id}
+        self.name_index.remove(game_id)
+        for user_id in user_ids:
+            self._notify_registration_change(user_id, game_id, False)
+        self._notify_game_deleted(game_id, role_id)
+        return True
+
+    async def delete_game_by_name(self, name):
+        game_id = await self.get_game_id_from_name_or_alias(name)
+        if not game_id:
+            return False
+        return await self.delete_game(game_id)
+
+    # --- Registrations ---
+    def _add_registration(self, user_id, game_id):
+        users = self.registrations.setdefault(game_id, set())
+        if user_id in users:
+            return False
+        users.add(user_id)
+        self.user_games.setdefault(user_id, set()).add(game_id)
+        return True
+
+    def _remove_registration(self, user_id, game_id):
+        users = self.registrations.get(game_id)
+        if not users or user_id not in users:
+            return False
+        users.discard(user_id)
+        self.user_games[user_id].discard(game_id)
+        return True
+
+    async def register_user_for_game(self, user_id, game_name, create_missing=True):
+        game_id = await self.get_game_id_from_name_or_alias(game_name)
+        if not game_id:
+            if not create_missing:
+                return False
+            game_id = await self.add_game(game_name) or await self.get_game_id_from_name_or_alias(game_name)
+            if not game_id:
+                return False
+
+        if not self._add_registration(user_id, game_id):
+            return False
+        self._notify_registration_change(user_id, game_id, True)
+        return True
+
+    async def unregister_user_from_game(self, user_id, game_name):
+        game_id = await self.get_game_id_from_name_or_alias(game_name)
+        if not game_id or not self._remove_registration(user_id, game_id):
+            return False
+        self._notify_registration_change(user_id, game_id, False)
+        return True
+
+    async def get_user_registered_games(self, user_id):
+        return self.get_user_registered_games_sync(user_id)
+
+    def get_user_registered_games_sync(self, user_id: int):
+        return sorted(self.games[game_id]["name"] for game_id in self.user_games.get(user_id, ()))
+
+    async def get_users_registered_for_game(self, game_name):
+        game_id = await self.get_game_id_from_name_or_alias(game_name)
+        if not game_id:
+            return []
+        return await self.get_registrations_for_game_id(game_id)
+
+    async def get_registrations_for_game_id(self, game_id: int):
+        return sorted(self.registrations.get(game_id, ()))
+
+    async def apply_registration_batch(self, adds, removes):
+        """Applies many (user_id, game_id) registrations and unregistrations at once."""
+        added = [(u, g) for u, g in adds if g in self.games and self._add_registration(u, g)]
+        removed = [(u, g) for u, g in removes if self._remove_registration(u, g)]
+        for user_id, game_id in added:
+            self._notify_registration_change(user_id, game_id, True)
+        for user_id, game_id in removed:
+            self._notify_registration_change(user_id, game_id, False)
+        return len(added), len(removed)
+
+    async def get_registrations_page(self, game_id: int, after=None, before=None, limit: int = 20):
+        users = sorted(self.registrations.get(game_id, ()))
+        if before is not None:
+            return [u for u in users if u < before][-limit:] if limit > 0 else []
+        after = after if after is not None else -1
+        return [u for u in users if u > after][:limit]
+
+    async def get_user_registered_games_page(self, user_id: int, after=None, before=None, limit: int = 20):
+        names = self.get_user_registered_games_sync(user_id)
+        if before is not None:
+            return [n for n in names if n < before][-limit:] if limit > 0 else []
+        after = after if after is not None else ""
+        return [n for n in names if n > after][:limit]
+
+    async def count_registrations_for_game_id(self, game_id: int):
+        return len(self.registrations.get(game_id, ()))
+
+    async def get_all_registrations(self):
+        return {game_id: set(users) for game_id, users in self.registrations.items() if users}
+
+    async def delete_user_registrations(self, user_id: int):
+        game_ids = self.user_games.pop(user_id, set())
+        for game_id in game_ids:
+            self.registrations[game_id].discard(user_id)
+            self._notify_registration_change(user_id, game_id, False)
+        return len(game_ids)
+
+    async def prune_registrations(self, keep_user_ids):
+        keep = set(keep_user_ids)
+        removed = 0
+        for user_id in [u for u in self.user_games if u not in keep]:
+            removed += await self.delete_user_registrations(user_id)
+        return removed
+
+    # --- Delivery Preferences ---
+    async def get_all_delivery_preferences(self):
+        return dict(self.user_preferences), dict(self.game_preferences)
+
+    async def set_user_delivery_preferences(self, user_id: int, delivery: str, quiet_start=None, quiet_end=None):
+        self.user_preferences[user_id] = (delivery, quiet_start, quiet_end)
+
+    async def set_game_delivery_preference(self, user_id: int, game_id: int, muted: bool, cooldown_minutes: int):
+        if not muted and not cooldown_minutes:
+            self.game_preferences.pop((user_id, game_id), None)
+        else:
+            self.game_preferences[(user_id, game_id)] = (bool(muted), cooldown_minutes)
+
+    # --- Maintenance ---
+    async def compact(self):
+        return 0  # Nothing on disk to compact
+
+    # --- Play Session Analytics ---
+    async def apply_play_session_batch(self, sessions, hourly, daily, players):
+        """Appends finished sessions and folds their deltas into the rollups."""
+        self.play_sessions.extend(sessions)
+        for rollup, deltas in ((self.stats_hourly, hourly), (self.stats_daily, daily)):
+            for key, (count, seconds, peak) in deltas.items():
+                row = rollup.setdefault(key, [0, 0, 0])
+                row[0] += count
+                row[1] += seconds
+                row[2] = max(row[2], peak)
+        self.daily_players.update(players)
+
+    async def get_game_play_stats(self, game_name: str, since_day: int):
+        rows = [row for (game, day), row in self.stats_daily.items() if game == game_name and day >= since_day]
+        unique_players = {u for game, day, u in self.daily_players if game == game_name and day >= since_day}
+        return (sum(r[0] for r in rows), sum(r[1] for r in rows),
+                max((r[2] for r in rows), default=0), len(unique_players))
+
+    async def get_top_played_games(self, since_day: int, limit: int = 10):
+        totals = {}
+        for (game, day), (count, seconds, peak) in self.stats_daily.items():
+            if day >= since_day:
+                total = totals.setdefault(game, [game, 0, 0, 0])
+                total[1] += seconds
+                total[2] += count
+                total[3] = max(total[3], peak)
+        ranked = sorted(totals.values(), key=lambda row: row[1], reverse=True)
+        return [tuple(row) for row in ranked[:limit]]
+
+    # --- Managed Role Functions ---
+    async def get_game_role(self, game_id: int):
+        return self.game_roles.get(game_id)
+
+    async def get_all_game_roles(self):
+        return dict(self.game_roles)
+
+    async def set_game_role(self, game_id: int, role_id: int):
+        self.game_roles[game_id] = role_id
+
+    async def delete_game_role(self, game_id: int):
+        self.game_roles.pop(game_id, None)
+
+    # --- Config ---
+    async def get_config(self, key: str):
+        value = self.config.get(key)
+        return int(value) if value is not None and value.isdigit() else value
+
+    async def set_config(self, key: str, value):
+        self.config[key] = str(value)
+
+    # --- Events ---
+    async def create_event(self, title: str, description: str, creator_id: int, event_time=None):
+        event_id = self._next_event_id
+        self._next_event_id += 1
+        self.events[event_id] = (event_id, title, description, event_time, creator_id)
+        return event_id
+
+    async def get_upcoming_events(self):
+        now = datetime.now().isoformat(sep=" ")
+        return [event for event in self.events.values() if event[3] is None or str(event[3]) >= now]
+
+    async def update_event_rsvp(self, event_id: int, user_id: int, status: str):
+        if event_id not in self.events:
+            return False
+        self.event_rsvps[(event_id, user_id)] = status
+        return True
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import nextcord
+from dotenv import load_dotenv
+from config import Config
+from ipc import IPCServer
+from delivery import DMWorkerPool
+from logs import setup_logging, get_logger
+from cogs.gamedetection import get_steam_game_image
+
+log = get_logger("notifier")
+
+async def run_notifier(token: str, socket_path: str = Config.IPC_SOCKET_PATH):
+    """Notifier process: receives notifications from the gateway process and sends them."""
+    client = nextcord.Client(intents=nextcord.Intents.none())
+    # Sending messages only needs the REST API, so no gateway connection is opened here
+    await client.login(token)
+    dms = DMWorkerPool(client)
+    dms.start()
+
+    async def send_notification(message):
+        embed = nextcord.Embed.from_dict(message["embed"])
+        if message.get("image_url"):
+            embed.set_image(url=message["image_url"])
+        elif message.get("image_for"):
+            # Artwork lookup is a blocking HTTP call; keep it off this process's loop too
+            game_image = await asyncio.to_thread(get_steam_game_image, message["image_for"])
+            if game_image: embed.set_image(url=game_image)
+
+        channel = client.get_partial_messageable(message["channel_id"])
+        role_ids = message.get("role_ids") or []
+        if role_ids:
+            allowed_mentions = nextcord.AllowedMentions(roles=[nextcord.Object(id=role_id) for role_id in role_ids])
+            await channel.send(content=message.get("content"), embed=embed, allowed_mentions=allowed_mentions)
+        else:
+            await channel.send(content=message.get("content") or None, embed=embed)
+        if message.get("dm_user_ids"):
+            dms.submit(message["dm_user_ids"], embed=embed)
+
+    server = IPCServer(socket_path, send_notification)
+    await server.start()
+    log.info("Notifier listening", extra={"path": socket_path})
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        await dms.drain()
+        await client.close()
+
+def main(token: str = None):
+    load_dotenv()
+    # Forked from the bot process: its log writer thread didn't come along, so start our own
+    setup_logging()
+    token = token or os.getenv('DISCORD_TOKEN')
+    if not token:
+        return log.error("DISCORD_TOKEN not found in environment variables")
+    asyncio.run(run_notifier(token))
+
+if __name__ == '__main__':
+    main()
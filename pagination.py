@@ -0,0 +1,109 @@
+import nextcord
+from nextcord.ui import Button, View
+
+REGISTRATIONS_PER_PAGE = 20
+
+class PaginatedView(View):
+    """Prev/next buttons over a keyset-paginated query.
+
+    `fetch_page(after=..., before=..., limit=...)` must return rows in ascending cursor
+    order, and `build_embed(rows, page_number)` turns one page of rows into an embed.
+    Only the rows of the page being shown are ever fetched. If every row is gone by the
+    time someone pages, `empty_text` is shown in place of the rows and both buttons are disabled.
+    """
+    def __init__(self, fetch_page, build_embed, per_page: int = 20, key=lambda row: row, author_id: int = None, timeout: float = 180,
+                 empty_text: str = "Nothing left to show."):
+        super().__init__(timeout=timeout)
+        self.fetch_page = fetch_page
+        self.build_embed = build_embed
+        self.empty_text = empty_text
+        self.per_page = per_page
+        self.key = key
+        self.author_id = author_id
+        self.page_number = 1
+        self.rows = []
+        self.has_prev = False
+        self.has_next = False
+
+        self.prev_button = Button(label="◀ Prev", style=nextcord.ButtonStyle.secondary)
+        self.prev_button.callback = self.prev_callback
+        self.next_button = Button(label="Next ▶", style=nextcord.ButtonStyle.secondary)
+        self.next_button.callback = self.next_callback
+        self.add_item(self.prev_button)
+        self.add_item(self.next_button)
+
+    async def _load(self, after=None, before=None):
+        # Fetch one extra row to find out whether there is another page in that direction
+        rows = await self.fetch_page(after=after, before=before, limit=self.per_page + 1)
+        if before is not None:
+            self.has_prev = len(rows) > self.per_page
+            self.has_next = True
+            self.rows = rows[-self.per_page:]
+        else:
+            self.has_prev = after is not None
+            self.has_next = len(rows) > self.per_page
+            self.rows = rows[:self.per_page]
+        self.prev_button.disabled = not self.has_prev
+        self.next_button.disabled = not self.has_next
+
+    async def start(self):
+        """Loads the first page. Returns its embed, or None if there are no rows at all."""
+        await self._load()
+        if not self.rows:
+            return None
+        return self.build_embed(self.rows, self.page_number)
+
+    async def interaction_check(self, interaction: nextcord.Interaction) -> bool:
+        if self.author_id and interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the person who asked for this list can page through it.", ephemeral=True)
+            return False
+        return True
+
+    async def _restart_if_empty(self):
+        # Rows can disappear between clicks; fall back to the first page
+        if not self.rows:
+            await self._load()
+            self.page_number = 1
+
+    async def _show(self, interaction: nextcord.Interaction):
+        embed = self.build_embed(self.rows, self.page_number)
+        if not self.rows:
+            embed.description = self.empty_text  # _load has disabled both buttons
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    async def prev_callback(self, interaction: nextcord.Interaction):
+        if self.rows:
+            await self._load(before=self.key(self.rows[0]))
+            self.page_number = max(1, self.page_number - 1)
+        await self._restart_if_empty()
+        await self._show(interaction)
+
+    async def next_callback(self, interaction: nextcord.Interaction):
+        if self.rows:
+            await self._load(after=self.key(self.rows[-1]))
+            self.page_number += 1
+        await self._restart_if_empty()
+        await self._show(interaction)
+
+
+async def registrations_view(db, game_id: int, game_name: str, author_id: int = None):
+    """Builds a paginated view of a game's subscribers, or returns None if there are none."""
+    total = await db.count_registrations_for_game_id(game_id)
+
+    def fetch_page(after=None, before=None, limit=REGISTRATIONS_PER_PAGE):
+        return db.get_registrations_page(game_id, after=after, before=before, limit=limit)
+
+    def build_embed(user_ids, page_number):
+        pages = max(1, -(-total // REGISTRATIONS_PER_PAGE))
+        embed = nextcord.Embed(
+            title=f"🎮 Registrations for {game_name}",
+            description="\n".join(f"<@{user_id}>" for user_id in user_ids),
+            color=nextcord.Color.blue()
+        )
+        embed.set_footer(text=f"Page {page_number}/{pages} • {total} registered")
+        return embed
+
+    view = PaginatedView(fetch_page, build_embed, per_page=REGISTRATIONS_PER_PAGE, author_id=author_id,
+                         empty_text="No one is registered for this game any more.")
+    view.first_embed = await view.start()
+    return view if view.first_embed else None
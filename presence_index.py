@@ -0,0 +1,146 @@
+import bisect
+import time
+import nextcord
+from config import Config
+from game_index import normalize_name
+
+def playing_game(member):
+    """Name of the game a member is playing right now, or None."""
+    for activity in member.activities:
+        if activity.type == nextcord.ActivityType.playing and activity.name:
+            return activity.name
+    return None
+
+class RankedCounts:
+    """Positive counts per key, also bucketed by count, so the k largest are read without visiting every key."""
+    def __init__(self):
+        self.counts = {}   # key -> count
+        self.buckets = {}  # count -> set(keys)
+        self.levels = []   # counts that have a bucket, ascending
+
+    def __len__(self):
+        return len(self.counts)
+
+    def get(self, key):
+        return self.counts.get(key, 0)
+
+    def add(self, key, delta: int = 1):
+        old = self.counts.get(key, 0)
+        new = old + delta
+        if old:
+            bucket = self.buckets[old]
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[old]
+                del self.levels[bisect.bisect_left(self.levels, old)]
+        if new > 0:
+            self.counts[key] = new
+            if new not in self.buckets:
+                self.buckets[new] = set()
+                bisect.insort(self.levels, new)
+            self.buckets[new].add(key)
+        else:
+            self.counts.pop(key, None)
+
+    def top(self, k: int = 10):
+        """The k keys with the highest counts as [(key, count)]; ties come in no particular order."""
+        result = []
+        for count in reversed(self.levels):
+            for key in self.buckets[count]:
+                if len(result) == k:
+                    return result
+                result.append((key, count))
+        return result
+
+class NowPlayingIndex:
+    """Live map of game -> members currently playing it, kept up to date from presence changes."""
+    def __init__(self):
+        self.players = {}      # game_name -> set(member_ids)
+        self.playing = {}      # member_id -> game_name
+        self.counts = RankedCounts()  # game_name -> players, for top()
+        self.normalized = {}   # normalize_name(game_name) -> set(game_names), for players_of()
+
+    def update(self, member_id: int, game_name):
+        """Moves a member to `game_name` (or out of every game when None). Returns the previous game."""
+        previous = self.playing.get(member_id)
+        if previous == game_name:
+            return previous
+        if previous is not None:
+            members = self.players[previous]
+            members.discard(member_id)
+            self.counts.add(previous, -1)
+            if not members:
+                del self.players[previous]
+                key = normalize_name(previous)
+                self.normalized[key].discard(previous)
+                if not self.normalized[key]:
+                    del self.normalized[key]
+        if game_name is None:
+            self.playing.pop(member_id, None)
+        else:
+            self.playing[member_id] = game_name
+            if game_name not in self.players:
+                self.players[game_name] = set()
+                self.normalized.setdefault(normalize_name(game_name), set()).add(game_name)
+            self.players[game_name].add(member_id)
+            self.counts.add(game_name)
+        return previous
+
+    def players_of(self, game_name: str):
+        """Members playing a game, matched exactly or else ignoring case and spacing."""
+        if game_name in self.players:
+            return self.players[game_name]
+        names = self.normalized.get(normalize_name(game_name), ())
+        return set().union(*(self.players[name] for name in names))
+
+    def top(self, k: int = 10):
+        """The k most played games right now as [(game_name, player_count)]."""
+        return self.counts.top(k)
+
+class TrendingCounter:
+    """Sliding-window count of game session starts, split into fixed time slots.
+
+    Running totals are adjusted as slots expire, so reading the top games never
+    re-counts the window.
+    """
+    def __init__(self, window_seconds: int = Config.TRENDING_WINDOW_MINUTES * 60, slots: int = Config.TRENDING_SLOTS):
+        self.slot_seconds = max(1, window_seconds // slots)
+        self.slots = slots
+        self.buckets = {}  # slot number -> {game_name: starts}
+        self.totals = RankedCounts()  # game_name -> starts across the whole window
+
+    def _expire(self, now: float):
+        oldest_live = int(now // self.slot_seconds) - self.slots + 1
+        for slot in [slot for slot in self.buckets if slot < oldest_live]:
+            for game_name, count in self.buckets.pop(slot).items():
+                self.totals.add(game_name, -count)
+
+    def record(self, game_name: str, now: float = None):
+        now = time.time() if now is None else now
+        self._expire(now)
+        bucket = self.buckets.setdefault(int(now // self.slot_seconds), {})
+        bucket[game_name] = bucket.get(game_name, 0) + 1
+        self.totals.add(game_name)
+
+    def top(self, k: int = 10, now: float = None):
+        """The k games started most often inside the window as [(game_name, starts)]."""
+        self._expire(time.time() if now is None else now)
+        return self.totals.top(k)
+
+def now_playing_embed(index: NowPlayingIndex, trending: TrendingCounter, k: int = 10):
+    """Embed with the most played games right now and the trending games in the window."""
+    embed = nextcord.Embed(title="🟢 Now Playing", color=nextcord.Color.green())
+    top = index.top(k)
+    if top:
+        embed.description = "\n".join(f"**{game_name}** — {count} playing" for game_name, count in top)
+    else:
+        embed.description = "Nobody is playing anything right now."
+
+    trending_games = trending.top(k)
+    if trending_games:
+        embed.add_field(
+            name=f"🔥 Trending (last {Config.TRENDING_WINDOW_MINUTES} min)",
+            value="\n".join(f"**{game_name}** — {starts} sessions started" for game_name, starts in trending_games),
+            inline=False
+        )
+    return embed
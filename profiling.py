@@ -0,0 +1,178 @@
+import asyncio
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from nextcord.utils import utcnow
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Samples one thread's stack from a background thread every `interval` seconds.
+
+    Only the watched thread's current frame is read, so the event loop pays nothing
+    per call; the cost is one short GIL hold per sample.
+    """
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # tuple of frame labels, root first -> samples
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Stacks in the folded format flamegraph.pl / speedscope / inferno read."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 40) -> str:
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        lines = [f"{self.samples} samples every {self.interval * 1000:.1f} ms", "", f"{'self %':>7} {'total %':>8}  function"]
+        for label, count in own.most_common(limit):
+            lines.append(f"{100 * count / self.samples:>7.1f} {100 * total[label] / self.samples:>8.1f}  {label}")
+        return "\n".join(lines)
+
+async def profile_event_loop(seconds: float, mode: str = "sample"):
+    """Profiles the running event loop for `seconds` and returns {filename: bytes} to attach."""
+    if mode == "sample":
+        profiler = SamplingProfiler(threading.get_ident())
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+        return {
+            "profile_top.txt": profiler.top_functions().encode(),
+            "profile_stacks.folded": profiler.collapsed().encode(),
+        }
+
+    if mode == "cprofile":
+        # cProfile hooks every call on this thread, which is the event loop thread, so it
+        # sees every task that runs while we sleep. Much heavier than sampling.
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(40)
+        with tempfile.TemporaryDirectory() as tmp:
+            dump = os.path.join(tmp, "profile.prof")
+            profiler.dump_stats(dump)
+            with open(dump, "rb") as f:
+                raw = f.read()
+        return {"profile_top.txt": text.getvalue().encode(), "profile.prof": raw}
+
+    raise ValueError(f"Unknown profiler mode: {mode}")
+
+class TimingStats:
+    """Call counts and durations for Database methods and bot commands, switched on at runtime."""
+    def __init__(self):
+        self.stats = {}  # name -> [calls, total seconds, max seconds]
+        self.enabled = False
+        self._instrumented = []
+        self._command_starts = {}
+
+    def record(self, name: str, elapsed: float):
+        entry = self.stats.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - started)
+        return timed
+
+    def instrument(self, obj, prefix: str):
+        """Wraps every public coroutine method of `obj` (on the instance only, so it can be undone)."""
+        for name, method in inspect.getmembers(obj, inspect.iscoroutinefunction):
+            if not name.startswith("_"):
+                setattr(obj, name, self._wrap(f"{prefix}.{name}", method))
+                self._instrumented.append((obj, name))
+
+    def enable(self, bot, db):
+        if self.enabled:
+            return
+        self.instrument(db, type(db).__name__)
+        bot.add_listener(self._on_command, "on_command")
+        bot.add_listener(self._on_command_done, "on_command_completion")
+        bot.add_listener(self._on_command_error, "on_command_error")
+        bot.add_listener(self._on_app_command_done, "on_application_command_completion")
+        self.enabled = True
+
+    def disable(self, bot):
+        if not self.enabled:
+            return
+        for obj, name in self._instrumented:
+            delattr(obj, name)
+        self._instrumented = []
+        bot.remove_listener(self._on_command, "on_command")
+        bot.remove_listener(self._on_command_done, "on_command_completion")
+        bot.remove_listener(self._on_command_error, "on_command_error")
+        bot.remove_listener(self._on_app_command_done, "on_application_command_completion")
+        self._command_starts.clear()
+        self.enabled = False
+
+    # on_command receives a copy of the context, so starts are keyed by the message ID
+    async def _on_command(self, ctx):
+        self._command_starts[ctx.message.id] = time.perf_counter()
+
+    async def _on_command_done(self, ctx):
+        started = self._command_starts.pop(ctx.message.id, None)
+        if started is not None:
+            self.record(f"!{ctx.command.qualified_name}", time.perf_counter() - started)
+
+    async def _on_command_error(self, ctx, error):
+        await self._on_command_done(ctx)
+
+    async def _on_app_command_done(self, interaction):
+        # No start event for slash commands; time from the interaction's creation instead
+        elapsed = (utcnow() - interaction.created_at).total_seconds()
+        self.record(f"/{interaction.application_command.qualified_name}", elapsed)
+
+    def report(self, limit: int = 30) -> str:
+        if not self.stats:
+            return "No timings recorded yet."
+        rows = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        lines = [f"{'calls':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8}  name"]
+        for name, (calls, total, worst) in rows:
+            lines.append(f"{calls:>7} {total * 1000:>10.1f} {total / calls * 1000:>8.2f} {worst * 1000:>8.2f}  {name}")
+        return "\n".join(lines)
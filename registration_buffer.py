@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+from config import Config
+from storage import Storage
+from logs import get_logger
+
+log = get_logger(__name__)
+
+class RegistrationBuffer:
+    """Write-behind queue for registration changes coming from the panels.
+
+    Changes are applied to an in-memory copy of every game's subscribers straight
+    away, so the caller can answer the interaction immediately, and are written to
+    the database in one transaction every REGISTRATION_FLUSH_INTERVAL seconds.
+    """
+    def __init__(self, db: Storage, flush_interval: float = Config.REGISTRATION_FLUSH_INTERVAL, durability: str = Config.REGISTRATION_DURABILITY):
+        if durability not in ("buffered", "commit"):
+            raise ValueError(f"Unknown registration durability mode: {durability}")
+        self.db = db
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.subscribers = {}  # game_id -> set(user_ids), optimistic view of the table
+        self.pending = {}      # (user_id, game_id) -> True to register / False to unregister
+        self.waiters = []      # futures resolved when the batch holding their change commits
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self._stopping = asyncio.Event()
+        # Keep the in-memory view current when other paths write to the table directly
+        self.db.add_registration_listener(self._on_db_change)
+
+    async def start(self):
+        """Loads the current registrations and starts the background flusher."""
+        if self._task:
+            return
+        self.subscribers = await self.db.get_all_registrations()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def reload(self):
+        """Writes out queued changes and re-reads every registration, e.g. after a restore replaced the table."""
+        await self.flush()
+        async with self._flush_lock:
+            self.subscribers = await self.db.get_all_registrations()
+
+    def _on_db_change(self, user_id, game_id, registered):
+        if (user_id, game_id) in self.pending:
+            return  # A newer queued change wins over what was just written
+        if registered:
+            self.subscribers.setdefault(game_id, set()).add(user_id)
+        else:
+            self.subscribers.get(game_id, set()).discard(user_id)
+
+    def is_registered(self, user_id: int, game_id: int) -> bool:
+        return user_id in self.subscribers.get(game_id, ())
+
+    async def register(self, user_id: int, game_id: int) -> bool:
+        """Registers a user for a game. Returns False if they were already registered."""
+        subscribers = self.subscribers.setdefault(game_id, set())
+        if user_id in subscribers:
+            return False
+        subscribers.add(user_id)
+        self.pending[(user_id, game_id)] = True
+        await self._wait_for_durability()
+        return True
+
+    async def unregister(self, user_id: int, game_id: int) -> bool:
+        """Unregisters a user from a game. Returns False if they weren't registered."""
+        subscribers = self.subscribers.get(game_id)
+        if not subscribers or user_id not in subscribers:
+            return False
+        subscribers.discard(user_id)
+        self.pending[(user_id, game_id)] = False
+        await self._wait_for_durability()
+        return True
+
+    async def _wait_for_durability(self):
+        if self.durability == "commit":
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            await waiter
+
+    async def flush(self):
+        """Writes every queued change in a single transaction."""
+        async with self._flush_lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, {}
+            waiters, self.waiters = self.waiters, []
+            adds = [key for key, registered in batch.items() if registered]
+            removes = [key for key, registered in batch.items() if not registered]
+            try:
+                await self.db.apply_registration_batch(adds, removes)
+            except Exception:
+                log.exception("Error flushing registrations, will retry", extra={"adds": len(adds), "removes": len(removes)})
+                # Put the batch back underneath anything queued since, and retry next tick
+                for key, registered in batch.items():
+                    self.pending.setdefault(key, registered)
+                self.waiters = waiters + self.waiters
+                return
+
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def paused(self):
+        """Writes out queued changes, then holds every write until the block exits (e.g. while a restore
+        replaces the database). Changes made meanwhile stay queued and go out with the next flush."""
+        await self.flush()
+        async with self._flush_lock:
+            yield
+
+    async def _flush_loop(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    async def drain(self):
+        """Stops the background flusher and writes out everything still queued."""
+        if self._task:
+            # Wake the flusher, letting a write already in progress finish rather than cancelling it
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
@@ -0,0 +1,260 @@
+"""Bulk-imports games from a local Steam app-list or store dump, without loading it into memory.
+
+    python -m steam_import imports/applist.json
+    python -m steam_import imports/appdetails.json --restart
+
+Reads GetAppList output ({"applist": {"apps": [{"appid", "name"}, ...]}}), plain arrays of
+app objects, and appdetails-style dumps keyed by app ID ({"570": {"data": {...}}}).
+Progress is checkpointed next to the dump after every batch, so an interrupted import
+picks up where it stopped.
+"""
+import argparse
+import asyncio
+import codecs
+import json
+import os
+import re
+import unicodedata
+from config import Config
+from storage import Storage
+
+HEADER_IMAGE_URL = "https://cdn.cloudflare.steamstatic.com/steam/apps/{appid}/header.jpg"
+MAX_NAME_LENGTH = 100  # Discord select option labels can't be longer
+# Catalogue entries that aren't something anyone "plays"; --all keeps them
+NOT_A_GAME = re.compile(r"\b(soundtrack|ost|demo|dedicated server|sdk|playtest|trailer|teaser|wallpapers?|artbook)\b", re.IGNORECASE)
+APP_ID_KEY = re.compile(r'"(\d+)"\s*:\s*$')  # `"570": ` right before an object in a dump keyed by app ID
+TRADEMARKS = str.maketrans({"™": "", "®": "", "©": "", "‘": "'", "’": "'", "“": '"', "”": '"'})
+
+def clean_game_name(raw: str) -> str:
+    """Steam's name without trademark signs, curly quotes, odd Unicode forms or extra whitespace."""
+    name = unicodedata.normalize("NFKC", raw.translate(TRADEMARKS))
+    return " ".join(name.split())
+
+def game_aliases(raw: str, name: str):
+    """The name exactly as Steam spells it, and a punctuation-free spelling, where they differ."""
+    plain = " ".join(re.sub(r"[^\w\s]", " ", name.replace("'", "")).split())
+    aliases = []
+    for alias in (" ".join(raw.split()), plain):
+        if alias and alias != name and alias not in aliases and len(alias) <= MAX_NAME_LENGTH:
+            aliases.append(alias)
+    return aliases
+
+def header_image_url(appid: int) -> str:
+    return HEADER_IMAGE_URL.format(appid=appid)
+
+def app_from(key, obj):
+    """(appid, name, type, header_image) if `obj` describes one app, else None."""
+    data = obj.get("data") if isinstance(obj.get("data"), dict) else obj
+    name = data.get("name")
+    appid = data.get("appid") or data.get("steam_appid") or key
+    if not isinstance(name, str) or not str(appid).isdigit():
+        return None
+    return int(appid), name, data.get("type"), data.get("header_image")
+
+class AppListReader:
+    """Yields apps from a JSON dump a chunk at a time.
+
+    Scans for the next `{` and tries to decode one object there. Objects that aren't
+    an app (the {"applist": ...} wrapper, or anything too big to be one entry) are
+    stepped into rather than decoded whole, so only about `max_entry` characters are
+    ever held in memory. Blocking; run it in a thread.
+    """
+    def __init__(self, path: str, offset: int = 0, chunk_size: int = 1 << 16, max_entry: int = 1 << 20):
+        self.file = open(path, "rb")
+        self.file.seek(offset)
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.chunk_size = chunk_size
+        self.max_entry = max_entry
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.buffer = ""
+        self.base = offset  # byte offset of buffer[0] in the file
+        self.pos = 0        # everything before this in the buffer has been consumed
+        self.eof = False
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def offset(self):
+        """Byte offset just past the last app returned; resuming here skips nothing and repeats nothing."""
+        return self.base + len(self.buffer[:self.pos].encode("utf-8"))
+
+    def _fill(self):
+        if self.eof:
+            return False
+        # Drop what's consumed before growing the buffer
+        self.base = self.offset
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        chunk = self.file.read(self.chunk_size)
+        self.eof = not chunk
+        self.buffer += self.text.decode(chunk, final=self.eof)
+        return True
+
+    def next_app(self):
+        while True:
+            start = self.buffer.find("{", self.pos)
+            if start == -1:
+                if not self._fill():
+                    return None
+                continue
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, start)
+            except json.JSONDecodeError:
+                if not self.eof and len(self.buffer) - start < self.max_entry:
+                    self._fill()
+                    continue
+                self.pos = start + 1  # A wrapper too big to decode whole, or broken JSON: look inside
+                continue
+            key = APP_ID_KEY.search(self.buffer, self.pos, start)
+            app = app_from(key.group(1) if key else None, obj) if isinstance(obj, dict) else None
+            if app is None:
+                self.pos = start + 1  # Not an app itself, but the apps may be inside it
+                continue
+            self.pos = end
+            return app
+
+    def read_batch(self, size: int):
+        apps = []
+        while len(apps) < size:
+            app = self.next_app()
+            if app is None:
+                break
+            apps.append(app)
+        return apps
+
+class ImportProgress:
+    def __init__(self, size: int, offset: int = 0, seen: int = 0, added: int = 0, updated: int = 0, skipped: int = 0):
+        self.size = size
+        self.offset = offset
+        self.seen = seen
+        self.added = added
+        self.updated = updated
+        self.skipped = skipped
+        self.done = False
+
+    @property
+    def percent(self):
+        return 100 * self.offset / self.size if self.size else 100.0
+
+    def summary(self):
+        return (f"{self.percent:.0f}% · {self.seen:,} apps read · {self.added:,} games added · "
+                f"{self.updated:,} updated · {self.skipped:,} skipped")
+
+class SteamImporter:
+    """Streams a dump into the games table in batches, one transaction per batch.
+
+    Reading and parsing run in a worker thread and each batch is written by the
+    storage backend, so the bot keeps serving events while an import runs. After every
+    batch the byte offset and counters are saved to `<dump>.import-state.json`; a
+    later run resumes from there unless the dump has changed since.
+    """
+    def __init__(self, db: Storage, path: str, batch_size: int = Config.STEAM_IMPORT_BATCH, include_all: bool = False):
+        self.db = db
+        self.path = path
+        self.state_path = path + ".import-state.json"
+        self.batch_size = batch_size
+        self.include_all = include_all
+
+    def _fingerprint(self):
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    def load_progress(self):
+        """Saved progress for this dump, or a fresh start if there is none or the dump changed."""
+        fingerprint = self._fingerprint()
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if not state or state.get("dump") != fingerprint:
+            return ImportProgress(fingerprint["size"])
+        return ImportProgress(fingerprint["size"], **state["progress"])
+
+    def _save_progress(self, progress: ImportProgress):
+        state = {"dump": self._fingerprint(), "progress": {
+            "offset": progress.offset, "seen": progress.seen, "added": progress.added,
+            "updated": progress.updated, "skipped": progress.skipped}}
+        partial = self.state_path + ".partial"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(partial, self.state_path)
+
+    def _rows(self, apps):
+        """Turns parsed apps into (name, image_url, aliases) rows. Returns (rows, skipped)."""
+        rows, skipped = [], 0
+        for appid, raw, app_type, header_image in apps:
+            name = clean_game_name(raw)
+            if not name or len(name) > MAX_NAME_LENGTH or (not self.include_all and (
+                    (app_type and app_type != "game") or NOT_A_GAME.search(name))):
+                skipped += 1
+                continue
+            rows.append((name, header_image or header_image_url(appid), game_aliases(raw, name)))
+        return rows, skipped
+
+    def _read_rows(self, reader: AppListReader):
+        apps = reader.read_batch(self.batch_size)
+        rows, skipped = self._rows(apps)
+        return len(apps), rows, skipped, reader.offset
+
+    async def run(self, restart: bool = False, progress_callback=None):
+        """Imports the dump (resuming unless `restart`). `progress_callback(progress)` is awaited after each batch."""
+        progress = ImportProgress(self._fingerprint()["size"]) if restart else self.load_progress()
+        reader = await asyncio.to_thread(AppListReader, self.path, progress.offset)
+        try:
+            while True:
+                seen, rows, skipped, offset = await asyncio.to_thread(self._read_rows, reader)
+                if not seen:
+                    break
+                if rows:
+                    added, updated = await self.db.import_games(rows)
+                    progress.added += added
+                    progress.updated += updated
+                progress.seen += seen
+                progress.skipped += skipped
+                progress.offset = offset
+                await asyncio.to_thread(self._save_progress, progress)
+                if progress_callback:
+                    await progress_callback(progress)
+        finally:
+            await asyncio.to_thread(reader.close)
+
+        progress.offset = progress.size
+        progress.done = True
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return progress
+
+def resolve_dump(name: str, import_dir: str = Config.IMPORT_DIR):
+    """Finds a dump by file name inside import_dir (no directories, so admins can't point elsewhere)."""
+    path = os.path.join(import_dir, os.path.basename(name))
+    return path if os.path.isfile(path) else None
+
+def main():
+    from database import Database
+    parser = argparse.ArgumentParser(description="Import games from a Steam app-list or store JSON dump.")
+    parser.add_argument("dump")
+    parser.add_argument("--db", default=Config.DATABASE_PATH)
+    parser.add_argument("--batch", type=int, default=Config.STEAM_IMPORT_BATCH, help="games per transaction")
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and start from the top")
+    parser.add_argument("--all", action="store_true", help="also import DLC, soundtracks, demos, tools and so on")
+    args = parser.parse_args()
+
+    async def run():
+        db = Database(args.db)
+        await db.init_db()
+        importer = SteamImporter(db, args.dump, args.batch, include_all=args.all)
+        async def report(progress):
+            print(f"\r⏳ {progress.summary()}", end="", flush=True)
+        return await importer.run(restart=args.restart, progress_callback=report)
+
+    try:
+        progress = asyncio.run(run())
+    except KeyboardInterrupt:
+        raise SystemExit("\n⏸️ Import interrupted; run the same command again to resume.")
+    print(f"\r✅ Import finished: {progress.summary()}")
+
+if __name__ == "__main__":
+    main()
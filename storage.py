@@ -0,0 +1,209 @@
+import asyncio
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from game_index import GameNameIndex
+from logs import get_logger
+
+log = get_logger(__name__)
+
+class KeyedLock:
+    """One asyncio.Lock per key, created on first use and dropped once nobody holds or waits on it."""
+    def __init__(self):
+        self._locks = {}  # key -> [lock, holders and waiters]
+
+    def __len__(self):
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def __call__(self, key):
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+class Storage(ABC):
+    """Everything the cogs need from a storage backend.
+
+    Implemented by database.Database (SQLite) and memory_storage.MemoryDatabase
+    (dicts and sets, nothing on disk). Both must behave identically; run
+    `python -m loadtest.conformance` after changing either one.
+    """
+    def __init__(self):
+        # Callbacks fired as (user_id, game_id, registered) whenever a registration changes
+        self.registration_listeners = []
+        # Callbacks fired as (game_id, role_id or None) after a game is deleted
+        self.game_delete_listeners = []
+        # In-memory name/alias index for autocomplete, kept in sync by add_game/delete_game
+        self.name_index = GameNameIndex()
+
+    def add_registration_listener(self, callback):
+        """Register a callback that is told about every registration change."""
+        self.registration_listeners.append(callback)
+
+    def add_game_delete_listener(self, callback):
+        """Register a callback that is told about every deleted game and the managed role it had."""
+        self.game_delete_listeners.append(callback)
+
+    def _notify_game_deleted(self, game_id, role_id):
+        for callback in self.game_delete_listeners:
+            try:
+                callback(game_id, role_id)
+            except Exception:
+                log.exception("Error in game delete listener", extra={"game_id": game_id})
+
+    def _notify_registration_change(self, user_id, game_id, registered):
+        for callback in self.registration_listeners:
+            try:
+                callback(user_id, game_id, registered)
+            except Exception:
+                log.exception("Error in registration listener", extra={"user_id": user_id, "game_id": game_id})
+
+    # --- Setup ---
+    @abstractmethod
+    async def init_db(self): ...
+
+    @abstractmethod
+    async def init_config_table(self): ...
+
+    @abstractmethod
+    async def load_name_index(self): ...
+
+    # --- Games and aliases ---
+    @abstractmethod
+    async def get_game_id_from_name_or_alias(self, name_or_alias): ...
+
+    @abstractmethod
+    async def add_game(self, name, image_url=None, aliases=None):
+        """Adds a game with comma-separated aliases. Returns its ID, or None if the name is taken."""
+
+    @abstractmethod
+    async def get_all_games(self): ...
+
+    @abstractmethod
+    async def get_all_games_for_panel(self): ...
+
+    @abstractmethod
+    async def get_game_name_by_id(self, game_id: int): ...
+
+    @abstractmethod
+    async def get_game_image_url(self, game_id: int): ...
+
+    @abstractmethod
+    async def import_games(self, games):
+        """Upserts (name, image_url, aliases) rows in one transaction. Unknown names become games;
+        games already known by name or alias only gain missing artwork and new aliases.
+        Returns (games added, existing games updated)."""
+
+    @abstractmethod
+    async def delete_game(self, game_id): ...
+
+    @abstractmethod
+    async def delete_game_by_name(self, name): ...
+
+    # --- Registrations ---
+    @abstractmethod
+    async def register_user_for_game(self, user_id, game_name, create_missing=True): ...
+
+    @abstractmethod
+    async def unregister_user_from_game(self, user_id, game_name): ...
+
+    @abstractmethod
+    async def get_user_registered_games(self, user_id): ...
+
+    @abstractmethod
+    def get_user_registered_games_sync(self, user_id: int): ...
+
+    @abstractmethod
+    async def get_users_registered_for_game(self, game_name): ...
+
+    @abstractmethod
+    async def get_registrations_for_game_id(self, game_id: int): ...
+
+    @abstractmethod
+    async def apply_registration_batch(self, adds, removes): ...
+
+    @abstractmethod
+    async def get_registrations_page(self, game_id: int, after=None, before=None, limit: int = 20): ...
+
+    @abstractmethod
+    async def get_user_registered_games_page(self, user_id: int, after=None, before=None, limit: int = 20): ...
+
+    @abstractmethod
+    async def count_registrations_for_game_id(self, game_id: int): ...
+
+    @abstractmethod
+    async def get_all_registrations(self): ...
+
+    @abstractmethod
+    async def delete_user_registrations(self, user_id: int):
+        """Drops every registration of one user. Returns how many were removed."""
+
+    @abstractmethod
+    async def prune_registrations(self, keep_user_ids):
+        """Drops registrations of every user not in `keep_user_ids`. Returns how many were removed."""
+
+    # --- Delivery preferences ---
+    @abstractmethod
+    async def get_all_delivery_preferences(self):
+        """Every stored preference as ({user_id: (delivery, quiet_start, quiet_end)}, {(user_id, game_id): (muted, cooldown_minutes)})."""
+
+    @abstractmethod
+    async def set_user_delivery_preferences(self, user_id: int, delivery: str, quiet_start=None, quiet_end=None): ...
+
+    @abstractmethod
+    async def set_game_delivery_preference(self, user_id: int, game_id: int, muted: bool, cooldown_minutes: int):
+        """Stores a per-game override; an unmuted override without cooldown is removed."""
+
+    # --- Maintenance ---
+    @abstractmethod
+    async def compact(self):
+        """Returns free space to the OS and refreshes planner statistics in small steps. Returns pages freed."""
+
+    # --- Play session analytics ---
+    @abstractmethod
+    async def apply_play_session_batch(self, sessions, hourly, daily, players): ...
+
+    @abstractmethod
+    async def get_game_play_stats(self, game_name: str, since_day: int): ...
+
+    @abstractmethod
+    async def get_top_played_games(self, since_day: int, limit: int = 10): ...
+
+    # --- Managed roles ---
+    @abstractmethod
+    async def get_game_role(self, game_id: int): ...
+
+    @abstractmethod
+    async def get_all_game_roles(self): ...
+
+    @abstractmethod
+    async def set_game_role(self, game_id: int, role_id: int): ...
+
+    @abstractmethod
+    async def delete_game_role(self, game_id: int): ...
+
+    # --- Config ---
+    @abstractmethod
+    async def get_config(self, key: str):
+        """Gets a config value; values made only of digits come back as ints."""
+
+    @abstractmethod
+    async def set_config(self, key: str, value): ...
+
+    # --- Events ---
+    @abstractmethod
+    async def create_event(self, title: str, description: str, creator_id: int, event_time=None):
+        """Creates an event and returns its ID."""
+
+    @abstractmethod
+    async def get_upcoming_events(self):
+        """Events without a time or with a time in the future, as (id, title, description, event_time, creator_id)."""
+
+    @abstractmethod
+    async def update_event_rsvp(self, event_id: int, user_id: int, status: str):
+        """Sets a user's RSVP. Returns False if the event doesn't exist."""